@@ -0,0 +1,393 @@
+"""
+단계별 마이크로 벤치마크 (합성 슬라이드 / PDF, 시간 + 피크 RSS)
+
+측정 단계:
+- 이미지: get_local_background_color, create_gradient_fill, clean_watermark_roi,
+          detect_content_bounds, 인코더 (포맷 × 인코딩 프로필)
+- PDF:    rasterize, clean_page (로고 유무), merge (포맷별), pipeline (process_pdf_optimized 전체)
+
+(케이스, 단계)마다 별도 프로세스에서 실행하고, 입력 준비가 끝난 뒤 피크 RSS(VmHWM)를
+초기화해 단계 자체의 피크만 기록한다 (pdftoppm 등 자식 프로세스 피크는 따로 기록).
+시간은 --repeat 회 중 최솟값을 기록한다. 결과는 JSON으로 저장하고 기준값과 비교할 수 있다.
+
+사용:
+    python benchmarks/bench_stages.py                      # 전체 실행 → results/latest.json
+    python benchmarks/bench_stages.py --quick              # 작은 케이스만
+    python benchmarks/bench_stages.py --compare            # baseline.json과 비교 (느려지면 종료 코드 1)
+    python benchmarks/bench_stages.py --save-baseline      # 이번 결과를 baseline.json으로 저장
+    python benchmarks/bench_stages.py --only merge         # 이름에 merge가 들어간 단계만
+"""
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import resource
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(os.path.dirname(BENCH_DIR), "scripts")
+LOGO_PATH = os.path.join(os.path.dirname(BENCH_DIR), "logo.png")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# 케이스 구성 (슬라이드 픽셀 크기 / PDF 페이지 수 × 로고 유무)
+IMAGE_SIZES = [(1920, 1080), (2867, 1600), (3840, 2160)]
+PDF_PAGE_COUNTS = [5, 15, 40]
+QUICK_IMAGE_SIZES = [(1920, 1080)]
+QUICK_PDF_PAGE_COUNTS = [5]
+PDF_PAGE_SIZE = (2867, 1600)
+
+FORMATS = ('webp', 'jpeg', 'png')
+PROFILES = ('fast', 'balanced', 'smallest')
+
+# 비교 시 잡음으로 보고 무시할 절대 차이
+TIME_NOISE_SECONDS = 0.005
+RSS_NOISE_MB = 10
+
+def read_status_mb(field):
+    """/proc/self/status 값 (MB, Linux 전용, 없으면 None)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+def reset_peak_rss():
+    """VmHWM(피크 RSS) 초기화 → 성공 여부 (Linux 4.0+)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb(reset=False):
+    # VmHWM을 초기화할 수 있으면 그 값, 아니면 프로세스 전체 ru_maxrss (Linux: KB 단위)
+    if reset:
+        value = read_status_mb("VmHWM")
+        if value is not None:
+            return value
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def current_rss_mb(reset=False):
+    if reset:
+        value = read_status_mb("VmRSS")
+        if value is not None:
+            return value
+    return peak_rss_mb()
+
+def image_stages():
+    stages = ["get_local_background_color", "create_gradient_fill", "clean_watermark_roi", "detect_content_bounds"]
+    stages += [f"encode_{fmt}_{profile}" for fmt in FORMATS for profile in PROFILES]
+    return stages
+
+def pdf_stages():
+    return ["rasterize", "clean_page"] + [f"merge_{fmt}" for fmt in FORMATS] + ["pipeline"]
+
+def build_cases(quick=False):
+    """[{"name", "kind", ...}] (이미지 케이스 + PDF 페이지 수 × 로고 유무)"""
+    cases = []
+    for width, height in (QUICK_IMAGE_SIZES if quick else IMAGE_SIZES):
+        cases.append({"name": f"slide_{width}x{height}", "kind": "image", "width": width, "height": height})
+    for pages in (QUICK_PDF_PAGE_COUNTS if quick else PDF_PAGE_COUNTS):
+        for logo in (False, True):
+            cases.append({
+                "name": f"pdf_{pages}p_{'logo' if logo else 'nologo'}",
+                "kind": "pdf", "pages": pages, "logo": logo,
+            })
+    return cases
+
+# ─────────────────────────────────────────────────────────────────
+# 자식 프로세스: 입력 준비 → 단계 실행 (준비 비용은 측정에서 제외)
+# ─────────────────────────────────────────────────────────────────
+
+def prepare_image_stage(case, stage):
+    """이미지 단계 → 매 반복마다 호출할 함수"""
+    from synthetic import make_slide
+    from remove_watermark import (
+        get_watermark_region, get_local_background_color,
+        create_gradient_fill, clean_watermark_roi,
+    )
+    from pdf_smart import detect_content_bounds
+
+    img = make_slide(case["width"], case["height"])
+    img.load()
+    wm = get_watermark_region(img.width, img.height)
+    box = (wm['x1'], wm['y1'], wm['x2'], wm['y2'])
+
+    if stage == "get_local_background_color":
+        return lambda: get_local_background_color(img, *box)
+    if stage == "create_gradient_fill":
+        bg = get_local_background_color(img, *box)
+        return lambda: create_gradient_fill(img, *box, bg)
+    if stage == "clean_watermark_roi":
+        # img를 직접 수정하므로 매번 사본 사용 (사본 비용은 작은 편이라 함께 측정)
+        return lambda: clean_watermark_roi(img.copy(), *box)
+    if stage == "detect_content_bounds":
+        return lambda: detect_content_bounds(img)
+    if stage.startswith("encode_"):
+        import io
+        from PIL import Image
+        from encode_profiles import PROFILES as ENCODE_PROFILES
+        from multi_format import FORMATS as PIL_FORMATS
+
+        _, fmt, profile = stage.split("_")
+        # 블로그 최적화와 같은 1200px 폭 결과물 기준
+        ratio = 1200 / img.width
+        resized = img.resize((1200, int(img.height * ratio)), Image.Resampling.LANCZOS)
+        kwargs = ENCODE_PROFILES[profile][fmt]
+
+        def encode():
+            buffer = io.BytesIO()
+            resized.save(buffer, PIL_FORMATS[fmt][1], **kwargs)
+            return {"bytes": buffer.tell()}
+        return encode
+    raise ValueError(f"알 수 없는 단계: {stage}")
+
+def prepare_pdf_stage(case, stage, pdf_path, work_dir):
+    """PDF 단계 → 매 반복마다 호출할 함수"""
+    from pdf2image import convert_from_path
+    from pdf_smart import BATCH_SIZE, calculate_optimal_dpi, clean_page, process_pdf_optimized
+    from strip_merge import merge_vertical
+
+    target_width = 1200
+    dpi = calculate_optimal_dpi(target_width)
+    logo_path = LOGO_PATH if case["logo"] else None
+    pages = case["pages"]
+
+    if stage == "rasterize":
+        def rasterize():
+            for first in range(1, pages + 1, BATCH_SIZE):
+                last = min(first + BATCH_SIZE - 1, pages)
+                convert_from_path(pdf_path, dpi=dpi, first_page=first, last_page=last)
+        return rasterize
+
+    if stage == "pipeline":
+        out_dir = os.path.join(work_dir, "pipeline")
+
+        def pipeline():
+            shutil.rmtree(out_dir, ignore_errors=True)
+            process_pdf_optimized(pdf_path, logo_path or "none", out_dir, True, target_width, 'webp')
+        return pipeline
+
+    rendered = convert_from_path(pdf_path, dpi=dpi)
+    if stage == "clean_page":
+        def clean_all():
+            # 파이프라인처럼 페이지마다 결과를 바로 버림 (피크 = 페이지 1장 분량)
+            for page in rendered:
+                clean_page(page.copy(), dpi, target_width, logo_path)
+        return clean_all
+
+    if stage.startswith("merge_"):
+        import numpy as np
+        fmt = stage.split("_")[1]
+        cleaned = [np.asarray(clean_page(page, dpi, target_width, logo_path)) for page in rendered]
+        rendered = None
+        sizes = [(a.shape[1], a.shape[0]) for a in cleaned]
+        kwargs = {'webp': {'quality': 85, 'method': 6},
+                  'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+                  'png': {}}[fmt]
+        ext = {'webp': '.webp', 'jpeg': '.jpg', 'png': '.png'}[fmt]
+
+        def merge():
+            paths = merge_vertical(cleaned, os.path.join(work_dir, f"merged{ext}"), fmt,
+                                   width=target_width, sizes=sizes, **kwargs)
+            return {"bytes": sum(os.path.getsize(p) for p in paths)}
+        return merge
+    raise ValueError(f"알 수 없는 단계: {stage}")
+
+def run_child(spec):
+    case, stage, repeat = spec["case"], spec["stage"], spec["repeat"]
+    work_dir = tempfile.mkdtemp(prefix="mps_bench_")
+    try:
+        if case["kind"] == "image":
+            fn = prepare_image_stage(case, stage)
+        else:
+            fn = prepare_pdf_stage(case, stage, spec["pdf_path"], work_dir)
+
+        # 단계 자체 출력(print)은 결과 JSON과 섞이지 않게 버림
+        stdout = sys.stdout
+        gc.collect()
+        reset = reset_peak_rss()
+        before = current_rss_mb(reset)
+        timings = []
+        extra = None
+        with open(os.devnull, "w") as devnull:
+            sys.stdout = devnull
+            try:
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    out = fn()
+                    timings.append(time.perf_counter() - start)
+                    if isinstance(out, dict):
+                        extra = out
+            finally:
+                sys.stdout = stdout
+        after = peak_rss_mb(reset)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    result = {
+        "case": case["name"],
+        "stage": stage,
+        "seconds": round(min(timings), 5),
+        "seconds_all": [round(t, 5) for t in timings],
+        "peak_rss_mb": round(after, 1),
+        "peak_rss_increase_mb": round(after - before, 1),
+    }
+    if children:
+        result["child_peak_rss_mb"] = round(children, 1)
+    if extra:
+        result.update(extra)
+    print(json.dumps(result))
+
+# ─────────────────────────────────────────────────────────────────
+# 부모 프로세스: 케이스/단계 실행, 결과 저장, 기준값 비교
+# ─────────────────────────────────────────────────────────────────
+
+def machine_info():
+    import numpy
+    import PIL
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "numpy": numpy.__version__,
+    }
+
+def run_suite(quick=False, repeat=3, only=None):
+    from synthetic import make_pdf
+
+    cases = build_cases(quick)
+    results = []
+    pdf_dir = tempfile.mkdtemp(prefix="mps_bench_pdf_")
+    try:
+        for case in cases:
+            stages = image_stages() if case["kind"] == "image" else pdf_stages()
+            stages = [s for s in stages if not only or any(o in s for o in only)]
+            if not stages:
+                continue
+
+            spec = {"case": case, "repeat": repeat}
+            if case["kind"] == "pdf":
+                spec["pdf_path"] = os.path.join(pdf_dir, f"{case['pages']}p.pdf")
+                if not os.path.exists(spec["pdf_path"]):
+                    make_pdf(spec["pdf_path"], case["pages"], *PDF_PAGE_SIZE)
+
+            print(f"\n📊 {case['name']}")
+            for stage in stages:
+                # 전체 파이프라인은 오래 걸리므로 한 번만
+                spec.update(stage=stage, repeat=1 if stage == "pipeline" else repeat)
+                out = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+                    capture_output=True, text=True,
+                )
+                if out.returncode != 0:
+                    error = out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "unknown"
+                    print(f"  ❌ {stage}: {error}")
+                    results.append({"case": case["name"], "stage": stage, "error": error})
+                    continue
+                result = json.loads(out.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(f"  {stage:<28} {result['seconds']*1000:9.1f} ms   "
+                      f"피크 RSS +{result['peak_rss_increase_mb']:7.1f} MB")
+    finally:
+        shutil.rmtree(pdf_dir, ignore_errors=True)
+
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "suite": "quick" if quick else "full",
+        "repeat": repeat,
+        "machine": machine_info(),
+        "results": results,
+    }
+
+def compare(current, baseline, threshold=0.2):
+    """
+    (케이스, 단계)별 기준값 대비 변화 출력
+
+    시간 또는 피크 RSS 증가량이 threshold(비율) 이상 늘고 잡음 한도도 넘으면 회귀로 판단.
+    반환값: 회귀 목록
+    """
+    base = {(r["case"], r["stage"]): r for r in baseline["results"] if "error" not in r}
+    if baseline.get("machine") != current.get("machine"):
+        print("⚠️ 기준값과 측정 환경이 다릅니다 (시간 비교는 참고용)")
+
+    regressions = []
+    print(f"\n=== 기준값 비교 ({baseline.get('created', '?')}) ===")
+    for r in current["results"]:
+        key = (r["case"], r["stage"])
+        if "error" in r:
+            regressions.append({"case": key[0], "stage": key[1], "error": r["error"]})
+            continue
+        if key not in base:
+            print(f"  {key[0]} / {key[1]}: 기준값 없음")
+            continue
+        b = base[key]
+        time_ratio = r["seconds"] / max(b["seconds"], 1e-9)
+        rss_delta = r["peak_rss_increase_mb"] - b["peak_rss_increase_mb"]
+        slower = time_ratio > 1 + threshold and r["seconds"] - b["seconds"] > TIME_NOISE_SECONDS
+        bigger = (rss_delta > RSS_NOISE_MB
+                  and r["peak_rss_increase_mb"] > b["peak_rss_increase_mb"] * (1 + threshold))
+        mark = "❌" if slower or bigger else ("✅" if time_ratio < 1 - threshold else "  ")
+        print(f"{mark} {key[0]:<22} {key[1]:<28} 시간 x{time_ratio:5.2f}   RSS {rss_delta:+7.1f} MB")
+        if slower or bigger:
+            regressions.append({
+                "case": key[0], "stage": key[1],
+                "time_ratio": round(time_ratio, 3), "rss_delta_mb": round(rss_delta, 1),
+            })
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="MPS 단계별 벤치마크")
+    parser.add_argument("--quick", action="store_true", help="작은 케이스만 실행")
+    parser.add_argument("--repeat", type=int, default=3, help="단계별 반복 횟수 (최솟값 기록)")
+    parser.add_argument("--only", nargs="*", help="이름에 포함된 단계만 실행 (예: merge encode_webp)")
+    parser.add_argument("--output", default=os.path.join(RESULTS_DIR, "latest.json"), help="결과 JSON 경로")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="비교할 기준값 JSON (기본 baseline.json)")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀 판단 비율 (기본 0.2 = 20%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 baseline.json으로도 저장")
+    args = parser.parse_args()
+
+    # 결과 파일이 기준값과 같은 경로일 수 있으므로 먼저 읽어 둠
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    report = run_suite(args.quick, args.repeat, args.only)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 결과 저장: {args.output}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.output, BASELINE_PATH)
+        print(f"💾 기준값 저장: {BASELINE_PATH}")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ 회귀 {len(regressions)}건")
+            sys.exit(1)
+        print("\n✅ 회귀 없음")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(json.loads(sys.argv[2]))
+    else:
+        main()
@@ -0,0 +1,93 @@
+"""
+워터마크 제거 메모리 벤치마크: 전체 프레임 vs ROI
+
+4000 x 6000px 합성 이미지에서 워터마크 제거 단계만 실행하고
+단계 전후의 최대 RSS(ru_maxrss) 증가량과 소요 시간을 비교한다.
+모드마다 별도 프로세스에서 실행해 이전 측정의 피크가 섞이지 않게 한다.
+
+사용:
+    python benchmarks/bench_watermark_roi.py [width] [height]
+"""
+import os
+import sys
+import json
+import time
+import resource
+import subprocess
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+
+def peak_rss_mb():
+    # Linux: KB 단위
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def make_slide(width, height):
+    """NotebookLM 스타일 합성 슬라이드 (밝은 배경 + 콘텐츠 블록 + 우측 하단 워터마크)"""
+    import numpy as np
+    from PIL import Image, ImageDraw
+
+    img = Image.new('RGB', (width, height), (246, 244, 240))
+    draw = ImageDraw.Draw(img)
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        x1, y1 = int(rng.integers(0, width - 400)), int(rng.integers(0, height - 400))
+        color = tuple(int(c) for c in rng.integers(0, 220, 3))
+        draw.rectangle([x1, y1, x1 + int(rng.integers(50, 400)), y1 + int(rng.integers(20, 400))], fill=color)
+    draw.rectangle([width - 146, height - 30, width - 9, height - 17], fill=(120, 120, 120))
+    return img
+
+def run_child(mode, width, height):
+    from remove_watermark import (
+        get_watermark_region, get_local_background_color,
+        create_gradient_fill, clean_watermark_roi,
+    )
+
+    img = make_slide(width, height)
+    wm = get_watermark_region(width, height)
+    box = (wm['x1'], wm['y1'], wm['x2'], wm['y2'])
+
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "full":
+        bg = get_local_background_color(img, *box)
+        img = create_gradient_fill(img, *box, bg)
+    else:
+        clean_watermark_roi(img, *box)
+    elapsed = time.perf_counter() - start
+    after = peak_rss_mb()
+
+    print(json.dumps({
+        "mode": mode,
+        "size": f"{width}x{height}",
+        "seconds": round(elapsed, 4),
+        "peak_rss_mb": round(after, 1),
+        "peak_rss_increase_mb": round(after - before, 1),
+    }))
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 6000
+
+    print(f"=== 워터마크 제거 벤치마크 ({width} x {height}px) ===")
+    results = []
+    for mode in ("full", "roi"):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, str(width), str(height)],
+            check=True, capture_output=True, text=True,
+        )
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        results.append(result)
+        print(f"  {mode:>4}: {result['seconds']*1000:8.1f} ms, "
+              f"피크 RSS 증가 {result['peak_rss_increase_mb']:7.1f} MB")
+
+    full, roi = results
+    print(f"\n✅ ROI 모드: 피크 RSS {full['peak_rss_increase_mb'] - roi['peak_rss_increase_mb']:.1f} MB 절약, "
+          f"{full['seconds'] / max(roi['seconds'], 1e-9):.0f}배 빠름")
+    return results
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        main()
@@ -0,0 +1,70 @@
+"""
+벤치마크용 합성 입력 (NotebookLM 스타일 슬라이드 / 여러 페이지 PDF)
+
+- 외부 파일 없이 로컬에서 생성, 시드가 같으면 항상 같은 픽셀
+- 슬라이드: 세로 그라디언트 배경 + 제목 바 + 본문 줄 + 사진 같은 블록 + 우측 하단 워터마크(137x13)
+"""
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+# NotebookLM 워터마크 실측 크기 (1376px 폭 기준)
+WATERMARK_SIZE = (137, 13)
+REFERENCE_WIDTH = 1376
+
+def make_slide(width, height, seed=0, watermark=True):
+    """16:9 등 임의 크기의 합성 슬라이드 (RGB)"""
+    rng = np.random.default_rng(seed)
+    scale = width / REFERENCE_WIDTH
+
+    # 밝은 베이지 → 옅은 남색 세로 그라디언트
+    t = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    top = np.array([246, 242, 234], dtype=np.float32)
+    bottom = np.array([222, 228, 240], dtype=np.float32)
+    column = (top * (1 - t) + bottom * t).astype(np.uint8)
+    arr = np.ascontiguousarray(np.broadcast_to(column[:, None, :], (height, width, 3)))
+
+    # 사진 같은 블록 (저해상도 노이즈를 키우고 흐린 뒤 약한 노이즈 추가)
+    photo_w, photo_h = width // 3, height // 2
+    small = rng.normal(128, 60, (max(1, photo_h // 8), max(1, photo_w // 8), 3)).clip(0, 255).astype(np.uint8)
+    photo = Image.fromarray(small).resize((photo_w, photo_h), Image.BICUBIC).filter(ImageFilter.GaussianBlur(2))
+    photo = (np.asarray(photo, dtype=np.int16) + rng.integers(-12, 12, (photo_h, photo_w, 3))).clip(0, 255)
+    px, py = width * 3 // 5, height // 4
+    arr[py:py + photo_h, px:px + photo_w] = photo.astype(np.uint8)
+
+    img = Image.fromarray(arr)
+    draw = ImageDraw.Draw(img)
+
+    # 제목 바 + 본문 줄 (글자 대신 짧은 막대)
+    margin = int(60 * scale)
+    draw.rectangle([margin, int(50 * scale), int(width * 0.55), int(110 * scale)], fill=(20, 40, 90))
+    line_gap = int(48 * scale) or 1
+    y = int(150 * scale)
+    while y < height * 0.85:
+        draw.ellipse([margin, y + 4, margin + int(10 * scale) + 1, y + int(14 * scale) + 1], fill=(200, 60, 60))
+        x = margin + int(30 * scale)
+        for _ in range(int(rng.integers(3, 8))):
+            word = int(rng.integers(30, 110) * scale)
+            if x + word > px - margin:
+                break
+            draw.rectangle([x, y, x + word, y + max(1, int(16 * scale))], fill=(50, 50, 50))
+            x += word + int(12 * scale)
+        y += line_gap
+
+    # 우측 하단 워터마크 (회색 막대, 실측 137x13 비율)
+    if watermark:
+        wm_w, wm_h = max(1, int(WATERMARK_SIZE[0] * scale)), max(1, int(WATERMARK_SIZE[1] * scale))
+        x2, y2 = width - int(9 * scale), height - int(17 * scale)
+        draw.rectangle([x2 - wm_w, y2 - wm_h, x2, y2], fill=(120, 120, 120))
+
+    return img
+
+def make_pdf(path, pages, width=2867, height=1600, dpi=300):
+    """
+    슬라이드 pages장으로 PDF 생성 (페이지마다 시드가 달라 내용이 다름)
+
+    width/height: 페이지 이미지 픽셀 크기, dpi: PDF에 기록할 해상도 (페이지 크기 = 픽셀 / dpi 인치)
+    """
+    first = make_slide(width, height, seed=0)
+    rest = (make_slide(width, height, seed=i) for i in range(1, pages))
+    first.save(path, 'PDF', save_all=True, append_images=rest, resolution=dpi)
+    return path
@@ -0,0 +1,134 @@
+"""
+비동기 작업 상태 저장소
+
+POST /jobs 로 등록된 작업의 상태와 진행 이벤트를 메모리에 보관한다.
+GET /jobs/{id} 는 현재 상태를, GET /jobs/{id}/events 는 이벤트를 SSE로 흘려보낸다.
+"""
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# 상태: queued → running → done | failed
+FINISHED_STATES = ("done", "failed")
+
+class Job:
+    def __init__(self, kind, job_id=None):
+        self.id = job_id or str(uuid.uuid4())
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.progress = {}
+
+        self._events = []
+        self._cond = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in FINISHED_STATES
+
+    def publish(self, event):
+        """진행 이벤트 추가 (대기 중인 SSE 스트림을 깨움)"""
+        with self._cond:
+            event = dict(event)
+            event["seq"] = len(self._events)
+            self._events.append(event)
+            if event.get("type") in ("page", "start"):
+                self.progress.update({k: v for k, v in event.items() if k in ("done", "total", "page")})
+            self._cond.notify_all()
+
+    def set_running(self):
+        with self._cond:
+            self.status = "running"
+            self.started_at = time.time()
+        self.publish({"type": "status", "status": "running"})
+
+    def set_done(self, result):
+        with self._cond:
+            self.result = result
+            self.status = "done"
+            self.finished_at = time.time()
+        self.publish({"type": "status", "status": "done"})
+
+    def set_failed(self, error):
+        with self._cond:
+            self.error = str(error)
+            self.status = "failed"
+            self.finished_at = time.time()
+        self.publish({"type": "status", "status": "failed", "error": str(error)})
+
+    def wait_events(self, after_seq, timeout=15.0):
+        """
+        after_seq 이후의 이벤트 반환 (없으면 timeout까지 대기)
+        """
+        with self._cond:
+            if len(self._events) <= after_seq and not self.finished:
+                self._cond.wait(timeout)
+            return self._events[after_seq:]
+
+    def to_dict(self):
+        with self._cond:
+            return {
+                "jobId": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "progress": dict(self.progress),
+                "createdAt": self.created_at,
+                "startedAt": self.started_at,
+                "finishedAt": self.finished_at,
+                "result": self.result,
+                "error": self.error,
+            }
+
+    def sse_stream(self, keepalive=15.0):
+        """
+        Server-Sent Events 제너레이터
+
+        - event: progress  (진행 이벤트)
+        - event: done / failed (마지막 이벤트, 작업 상태 전체 포함)
+        """
+        seq = 0
+        while True:
+            events = self.wait_events(seq, timeout=keepalive)
+            if not events and not self.finished:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                seq = event["seq"] + 1
+                yield f"event: progress\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+            if self.finished and seq >= len(self._events):
+                yield f"event: {self.status}\ndata: {json.dumps(self.to_dict(), ensure_ascii=False)}\n\n"
+                return
+
+class JobStore:
+    """작업 목록 (완료된 작업은 max_jobs 초과 시 오래된 것부터 제거)"""
+
+    def __init__(self, max_jobs=200):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, kind, job_id=None):
+        job = Job(kind, job_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in list(self._jobs.keys()):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].finished:
+                del self._jobs[job_id]
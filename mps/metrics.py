@@ -0,0 +1,147 @@
+"""
+Prometheus 메트릭 저장소 (외부 라이브러리 없이 텍스트 형식 출력)
+
+- 단계별 소요 시간 히스토그램 + 피크 메모리 게이지 (워커가 돌려준 샘플 포함)
+- 엔드포인트별 요청 수 / 오류 수 / 응답 시간 히스토그램
+- GET /metrics 가 render() 결과를 text/plain; version=0.0.4 로 반환
+"""
+import threading
+
+# 단계 소요 시간 버킷 (초): 워터마크 ROI 수 ms ~ 대용량 PDF 병합 수십 초
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    def __init__(self, name, help_text, label_names):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+class Gauge(Counter):
+    def set(self, *labels, value):
+        self._values[labels] = value
+
+    def set_max(self, *labels, value):
+        self._values[labels] = max(self._values.get(labels, value), value)
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+class Histogram:
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values = {}  # labels → [버킷별 개수, 합계, 개수]
+
+    def observe(self, *labels, value):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                entry[0][i] += 1
+                break
+        entry[1] += value
+        entry[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                le = 'le="%s"' % _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """
+    서버 프로세스 하나의 메트릭 (스레드 안전)
+
+    - observe_stage(sample): telemetry.stage() 샘플 기록
+    - observe_request(endpoint, seconds, error): 요청 1건 기록
+    - count_error(endpoint): 응답 본문으로 실패를 알리는 경우 ({"success": False}) 오류 수만 증가
+    - count_reclaimed(reason, nbytes): 보관 관리자가 삭제한 바이트
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stage_seconds = Histogram(
+            "mps_stage_duration_seconds", "처리 단계별 소요 시간", ("stage",), STAGE_BUCKETS)
+        self.stage_peak = Gauge(
+            "mps_stage_peak_rss_bytes", "처리 단계 중 프로세스 피크 RSS (가장 최근 값)", ("stage",))
+        self.stage_peak_max = Gauge(
+            "mps_stage_peak_rss_max_bytes", "처리 단계 중 프로세스 피크 RSS (서버 시작 후 최댓값)", ("stage",))
+        self.requests = Counter("mps_requests_total", "엔드포인트별 요청 수", ("endpoint",))
+        self.errors = Counter("mps_request_errors_total", "엔드포인트별 오류 수", ("endpoint",))
+        self.request_seconds = Histogram(
+            "mps_request_duration_seconds", "엔드포인트별 응답 시간", ("endpoint",), REQUEST_BUCKETS)
+        self.reclaimed = Counter(
+            "mps_retention_reclaimed_bytes_total", "보관 관리로 삭제한 바이트 (intermediate / expired / quota / source)",
+            ("reason",))
+
+    def observe_stage(self, sample):
+        with self._lock:
+            self.stage_seconds.observe(sample["stage"], value=sample["seconds"])
+            if sample.get("peak_rss_bytes"):
+                self.stage_peak.set(sample["stage"], value=sample["peak_rss_bytes"])
+                self.stage_peak_max.set_max(sample["stage"], value=sample["peak_rss_bytes"])
+
+    def observe_stages(self, samples):
+        for sample in samples or ():
+            self.observe_stage(sample)
+
+    def observe_request(self, endpoint, seconds, error=False):
+        with self._lock:
+            self.requests.inc(endpoint)
+            self.request_seconds.observe(endpoint, value=seconds)
+            if error:
+                self.errors.inc(endpoint)
+
+    def count_error(self, endpoint):
+        with self._lock:
+            self.errors.inc(endpoint)
+
+    def count_reclaimed(self, reason, nbytes):
+        with self._lock:
+            self.reclaimed.inc(reason, amount=nbytes)
+
+    def render(self):
+        with self._lock:
+            lines = []
+            for metric in (self.stage_seconds, self.stage_peak, self.stage_peak_max,
+                           self.requests, self.errors, self.request_seconds, self.reclaimed):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
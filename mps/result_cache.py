@@ -0,0 +1,197 @@
+"""
+결과 캐시 (업로드 내용 해시 + 옵션 기준) + single-flight 중복 제거
+
+- 같은 파일을 같은 옵션으로 다시 올리면 기존 출력 URL을 바로 반환
+- 동일한 요청이 동시에 들어오면 하나만 계산하고 나머지는 그 결과를 기다림
+- 디스크 용량 한도를 넘으면 가장 오래 안 쓴 결과부터 삭제 (LRU)
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def hash_fileobj(fileobj):
+    """파일 객체 내용의 SHA-256 (읽은 뒤 처음 위치로 되돌림)"""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    while True:
+        chunk = fileobj.read(HASH_CHUNK_SIZE)
+        if not chunk:
+            break
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+def make_cache_key(content_hash, kind, options):
+    """내용 해시 + 작업 유형 + 정규화된 옵션 → 캐시 키"""
+    normalized = json.dumps(options, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{content_hash}:{kind}:{normalized}".encode()).hexdigest()
+
+class _Flight:
+    """진행 중인 계산 하나 (결과를 기다리는 요청들이 공유)"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class ResultCache:
+    """
+    출력 URL 목록 캐시
+
+    - get_or_compute(key, compute): 캐시 적중이면 바로 반환, 아니면 compute() 실행
+      반환값: (output_files, cached)
+    - remove_files(urls): LRU로 내보낸 결과 파일을 지우는 함수 (서버는 보관 관리자의 discard를 넘겨
+      제공 중인 파일을 지우지 않게 함, 없으면 바로 삭제)
+    """
+
+    def __init__(self, output_dir, url_prefix="/output/", max_bytes=512 * 1024 * 1024, remove_files=None):
+        self.output_dir = output_dir
+        self.url_prefix = url_prefix
+        self.max_bytes = max_bytes
+        self.remove_files = remove_files or self._remove_files
+
+        self._entries = OrderedDict()  # key → {"files", "bytes", "created", "last_access"}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._shared = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_bytes > 0
+
+    def _url_to_path(self, url):
+        return os.path.join(self.output_dir, url[len(self.url_prefix):])
+
+    def _files_exist(self, files):
+        return all(os.path.exists(self._url_to_path(url)) for url in files)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if not self._files_exist(entry["files"]):
+            # 외부에서 삭제됨 → 항목 제거 후 다시 계산
+            self._drop(key)
+            return None
+        entry["last_access"] = time.time()
+        self._entries.move_to_end(key)
+        return entry["files"]
+
+    def peek(self, key):
+        """캐시 적중이면 출력 URL 목록, 아니면 None (계산하지 않음)"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            files = self._lookup(key)
+            if files is None:
+                return None
+            self._hits += 1
+            return list(files)
+
+    def get_or_compute(self, key, compute):
+        if not self.enabled:
+            return compute(), False
+
+        with self._lock:
+            files = self._lookup(key)
+            if files is not None:
+                self._hits += 1
+                return list(files), True
+
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self._misses += 1
+            else:
+                self._shared += 1
+
+        if not leader:
+            # 같은 요청이 이미 계산 중 → 결과 공유
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return list(flight.result), True
+
+        try:
+            result = compute()
+            flight.result = result
+            self._store(key, result)
+            return result, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def _store(self, key, files):
+        size = 0
+        for url in files:
+            try:
+                size += os.path.getsize(self._url_to_path(url))
+            except OSError:
+                pass
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            now = time.time()
+            self._entries[key] = {"files": list(files), "bytes": size, "created": now, "last_access": now}
+            self._total_bytes += size
+            self._evict(keep=key)
+
+    def _evict(self, keep=None):
+        """용량 한도 초과 시 가장 오래 안 쓴 항목부터 삭제"""
+        for key in list(self._entries.keys()):
+            if self._total_bytes <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            self._drop(key, delete_files=True)
+            self._evictions += 1
+
+    def _drop(self, key, delete_files=False):
+        entry = self._entries.pop(key)
+        self._total_bytes -= entry["bytes"]
+        if delete_files:
+            self.remove_files(entry["files"])
+
+    def _remove_files(self, files):
+        for url in files:
+            path = self._url_to_path(url)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            # PDF 결과 폴더가 비었으면 함께 삭제
+            parent = os.path.dirname(path)
+            if os.path.abspath(parent) != os.path.abspath(self.output_dir):
+                try:
+                    os.rmdir(parent)
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "sharedInflight": self._shared,
+                "evictions": self._evictions,
+                "inflight": len(self._inflight),
+            }
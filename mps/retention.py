@@ -0,0 +1,297 @@
+"""
+출력 보관 관리 (TTL + 디스크 용량 한도 + 작업별 중간 파일 정리)
+
+- 출력 파일: 마지막으로 제공(다운로드)된 뒤 ttl_seconds가 지나면 삭제,
+  전체 용량이 max_bytes를 넘으면 가장 오래 제공되지 않은 파일부터 삭제
+- 작업 공간: 작업마다 uploads/{job_id}/ 폴더를 만들어 업로드 원본과 파생 파일(스트리밍 응답의 페이지 임시 파일 등)을 모두 그 안에 두고,
+  작업이 끝나면 폴더째 삭제 (PDF temp_pages처럼 다른 곳에 생기는 중간 파일은 track_intermediate로 등록)
+- 제공 중이거나 빌려 간(use) 출력 파일은 만료/용량 정리에서 제외 (끝난 뒤 다음 정리에서 삭제)
+- 삭제한 바이트 수를 사유별로 집계 (intermediate / expired / quota)
+
+Cloud Run의 디스크는 인스턴스 메모리를 사용하므로 쌓이면 곧 OOM으로 이어진다.
+"""
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+
+import telemetry
+
+def path_size(path):
+    """파일 또는 폴더 전체 크기 (없으면 0)"""
+    if os.path.isfile(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def remove_path(path):
+    """파일/폴더 삭제 → 삭제한 바이트 수"""
+    if not os.path.lexists(path):
+        return 0
+    size = path_size(path)
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    except OSError:
+        return 0
+    return size
+
+class RetentionManager:
+    """
+    출력 파일 보관 관리자 (스레드 안전)
+
+    - workspace(job_id) / release_job(job_id): 작업 공간 생성 / 작업 종료 시 중간 파일 일괄 삭제
+    - register(urls): 작업 결과 파일 등록 (바로 용량 한도 확인)
+    - touch(url): 파일이 제공될 때 호출 → LRU 순서 갱신
+    - use(urls): 파일을 읽는/제공하는 동안 빌림 (with 블록 동안은 삭제하지 않음)
+    - discard(urls): 다른 보관소(결과 캐시)가 내보낸 파일 삭제 (빌려 간 파일은 남겨 두고 나중에 정리)
+    - sweep(): TTL 만료 + 용량 초과분 삭제 (백그라운드 스레드가 주기적으로 호출)
+    """
+
+    def __init__(self, output_dir, work_dir, url_prefix="/output/", ttl_seconds=3600,
+                 max_bytes=512 * 1024 * 1024, on_reclaim=None):
+        self.output_dir = output_dir
+        self.work_dir = work_dir
+        self.url_prefix = url_prefix
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.on_reclaim = on_reclaim
+
+        self._files = {}          # 출력 파일 경로 → {"bytes", "created", "last_served"}
+        self._intermediates = {}  # job_id → [경로, ...]
+        self._leases = {}         # 출력 파일 경로 → 빌려 간 수
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._reclaimed = {"intermediate": 0, "expired": 0, "quota": 0}
+        self._removed = {"intermediate": 0, "expired": 0, "quota": 0}
+        self._stop = threading.Event()
+        self._thread = None
+
+    # ── 작업 공간 / 중간 파일 ──────────────────────────────────────
+
+    def workspace(self, job_id):
+        """작업 전용 폴더 (업로드 원본 + 파생 파일), 작업 종료 시 release_job()으로 삭제"""
+        path = os.path.join(self.work_dir, job_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def track_intermediate(self, job_id, path):
+        """작업 공간 밖에 생기는 중간 파일/폴더 등록 (작업 종료 시 함께 삭제)"""
+        with self._lock:
+            self._intermediates.setdefault(job_id, []).append(path)
+
+    def release_job(self, job_id):
+        """작업 공간 + 등록된 중간 파일 삭제 → 삭제한 바이트 수"""
+        with self._lock:
+            paths = self._intermediates.pop(job_id, [])
+        paths.append(os.path.join(self.work_dir, job_id))
+
+        reclaimed = sum(remove_path(path) for path in paths)
+        if reclaimed:
+            self._count("intermediate", reclaimed, len(paths))
+            telemetry.log("intermediates_removed", job_id=job_id, bytes=reclaimed)
+        return reclaimed
+
+    # ── 출력 파일 ──────────────────────────────────────────────────
+
+    def _url_to_path(self, url):
+        return os.path.join(self.output_dir, url[len(self.url_prefix):])
+
+    def _add(self, path, now, size=None):
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return
+        old = self._files.get(path)
+        if old is not None:
+            self._total_bytes -= old["bytes"]
+        self._files[path] = {"bytes": size, "created": now, "last_served": now}
+        self._total_bytes += size
+
+    def register(self, urls):
+        """작업 결과(출력 URL 목록) 등록 후 용량 한도 확인"""
+        now = time.time()
+        with self._lock:
+            for url in urls:
+                self._add(self._url_to_path(url), now)
+        if self.max_bytes and self._total_bytes > self.max_bytes:
+            self.sweep()
+
+    def touch(self, url):
+        """출력 파일이 제공됨 → 마지막 제공 시각 갱신"""
+        path = self._url_to_path(url)
+        with self._lock:
+            entry = self._files.get(path)
+            if entry is not None:
+                entry["last_served"] = time.time()
+
+    @contextmanager
+    def use(self, urls):
+        """출력 파일을 빌림 (with 블록 동안은 만료/용량 정리에서 제외, 끝나면 마지막 제공 시각 갱신)"""
+        paths = [self._url_to_path(url) for url in urls]
+        with self._lock:
+            for path in paths:
+                self._leases[path] = self._leases.get(path, 0) + 1
+        try:
+            yield
+        finally:
+            now = time.time()
+            with self._lock:
+                for path in paths:
+                    self._leases[path] -= 1
+                    if not self._leases[path]:
+                        del self._leases[path]
+                    entry = self._files.get(path)
+                    if entry is not None:
+                        entry["last_served"] = now
+
+    def discard(self, urls):
+        """출력 파일 삭제 (빌려 간 파일은 등록된 채로 남겨 두고 다음 정리에서 삭제) → 삭제한 바이트 수"""
+        reclaimed = 0
+        with self._lock:
+            for url in urls:
+                path = self._url_to_path(url)
+                if self._leases.get(path):
+                    continue
+                if path in self._files:
+                    reclaimed += self._remove_output(path)
+                else:
+                    reclaimed += remove_path(path)
+                    self._remove_empty_parent(path)
+        return reclaimed
+
+    def adopt_existing(self):
+        """
+        서버 시작 시 디스크에 남아 있는 출력 파일을 수정 시각 기준으로 등록,
+        이전 인스턴스가 남긴 작업 공간은 삭제
+        """
+        with self._lock:
+            for root, _, files in os.walk(self.output_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    self._add(path, stat.st_mtime, stat.st_size)
+
+        stale = [os.path.join(self.work_dir, name) for name in os.listdir(self.work_dir)] \
+            if os.path.isdir(self.work_dir) else []
+        reclaimed = sum(remove_path(path) for path in stale)
+        if reclaimed:
+            self._count("intermediate", reclaimed, len(stale))
+        self.sweep()
+
+    def _remove_output(self, path):
+        entry = self._files.pop(path)
+        self._total_bytes -= entry["bytes"]
+        removed = remove_path(path)
+        self._remove_empty_parent(path)
+        return removed
+
+    def _remove_empty_parent(self, path):
+        """PDF 결과 폴더가 비었으면 함께 삭제"""
+        parent = os.path.dirname(path)
+        if os.path.abspath(parent) != os.path.abspath(self.output_dir):
+            try:
+                os.rmdir(parent)
+            except OSError:
+                pass
+
+    def sweep(self):
+        """
+        TTL 만료 → 용량 초과 순서로 삭제
+
+        반환값: {"expired", "evicted", "bytes"}
+        """
+        now = time.time()
+        expired = evicted = reclaimed_expired = reclaimed_quota = 0
+        with self._lock:
+            # 다른 경로(결과 캐시 등)로 이미 지워진 파일은 목록에서만 제거
+            for path in [p for p in self._files if not os.path.exists(p)]:
+                self._total_bytes -= self._files.pop(path)["bytes"]
+
+            if self.ttl_seconds:
+                for path, entry in list(self._files.items()):
+                    if self._leases.get(path):
+                        continue
+                    if now - entry["last_served"] > self.ttl_seconds:
+                        reclaimed_expired += self._remove_output(path)
+                        expired += 1
+
+            if self.max_bytes and self._total_bytes > self.max_bytes:
+                by_last_served = sorted(self._files.items(), key=lambda item: item[1]["last_served"])
+                for path, _ in by_last_served:
+                    if self._total_bytes <= self.max_bytes:
+                        break
+                    if self._leases.get(path):
+                        continue
+                    reclaimed_quota += self._remove_output(path)
+                    evicted += 1
+
+        if expired:
+            self._count("expired", reclaimed_expired, expired)
+        if evicted:
+            self._count("quota", reclaimed_quota, evicted)
+        if expired or evicted:
+            telemetry.log("retention_sweep", expired=expired, evicted=evicted,
+                          bytes=reclaimed_expired + reclaimed_quota, total_bytes=self._total_bytes)
+        return {"expired": expired, "evicted": evicted, "bytes": reclaimed_expired + reclaimed_quota}
+
+    def _count(self, reason, nbytes, nfiles):
+        with self._lock:
+            self._reclaimed[reason] += nbytes
+            self._removed[reason] += nfiles
+        if self.on_reclaim is not None:
+            self.on_reclaim(reason, nbytes)
+
+    # ── 백그라운드 정리 ────────────────────────────────────────────
+
+    def start(self, interval_seconds=60, sweepers=()):
+        """주기적 정리 스레드 시작 (sweepers: 같은 주기로 함께 호출할 다른 보관소의 정리 함수)"""
+        if self._thread is not None or interval_seconds <= 0:
+            return
+        self._stop.clear()
+
+        def run():
+            while not self._stop.wait(interval_seconds):
+                for sweep in (self.sweep, *sweepers):
+                    try:
+                        sweep()
+                    except Exception as e:
+                        telemetry.log("retention_sweep_failed", error=str(e))
+
+        self._thread = threading.Thread(target=run, name="mps-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "bytes": self._total_bytes,
+                "maxBytes": self.max_bytes,
+                "ttlSeconds": self.ttl_seconds,
+                "trackedJobs": len(self._intermediates),
+                "leasedFiles": len(self._leases),
+                "reclaimedBytes": dict(self._reclaimed),
+                "removedFiles": dict(self._removed),
+            }
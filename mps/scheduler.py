@@ -0,0 +1,155 @@
+"""
+작업 유형별 동시 실행 제한 + 대기열 (백프레셔)
+
+Cloud Run 인스턴스 하나에서 PDF/이미지 작업이 무한정 동시에 돌면 OOM이 난다.
+작업 유형(lane)마다 동시 실행 수와 대기열 길이를 제한하고,
+대기열까지 가득 차면 즉시 QueueFullError를 던져 429로 응답하게 한다.
+"""
+import math
+import threading
+import time
+
+class QueueFullError(Exception):
+    """대기열이 가득 참 (HTTP 429로 변환)"""
+
+    def __init__(self, lane, retry_after):
+        super().__init__(f"'{lane}' 작업 대기열이 가득 찼습니다. {retry_after}초 후 다시 시도하세요.")
+        self.lane = lane
+        self.retry_after = retry_after
+
+class JobLane:
+    """
+    작업 유형 하나의 실행 슬롯 + 대기열
+
+    - max_running: 동시에 실행할 수 있는 작업 수
+    - max_queued: 슬롯을 기다릴 수 있는 작업 수 (초과 시 거절)
+    """
+
+    def __init__(self, name, max_running, max_queued):
+        self.name = name
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+
+        # 통계
+        self._admitted = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._last_wait = 0.0
+        self._avg_duration = None  # 지수 이동 평균 (초)
+
+    def _estimate_retry_after(self):
+        """대기열이 빠지는 데 걸릴 시간 추정 (초)"""
+        duration = self._avg_duration or 5.0
+        backlog = self._waiting + 1
+        return max(1, math.ceil(duration * backlog / self.max_running))
+
+    def admit(self):
+        """
+        대기열 등록 (가득 차 있으면 즉시 QueueFullError)
+
+        반환된 AdmissionTicket을 `with`로 진입하면 실행 슬롯이 날 때까지 대기한다.
+        비동기 작업은 요청 시점에 admit()으로 자리만 잡고, 실제 대기는 백그라운드에서 한다.
+        """
+        with self._cond:
+            # 아직 슬롯에 들어가지 않은 티켓(/jobs처럼 admit 후 나중에 진입)도 자리를 차지하므로
+            # 실행 중 + 대기 중 합계로 제한
+            if self._running + self._waiting >= self.max_running + self.max_queued:
+                self._rejected += 1
+                raise QueueFullError(self.name, self._estimate_retry_after())
+            self._waiting += 1
+        return AdmissionTicket(self)
+
+    def _acquire(self, enqueued_at):
+        with self._cond:
+            while self._running >= self.max_running:
+                self._cond.wait()
+            self._waiting -= 1
+            self._running += 1
+
+            waited = time.monotonic() - enqueued_at
+            self._admitted += 1
+            self._total_wait += waited
+            self._last_wait = waited
+            self._max_wait = max(self._max_wait, waited)
+        return waited
+
+    def _release(self, duration):
+        with self._cond:
+            self._running -= 1
+            if self._avg_duration is None:
+                self._avg_duration = duration
+            else:
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+            self._cond.notify()
+
+    def _cancel(self):
+        with self._cond:
+            self._waiting -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "running": self._running,
+                "queued": self._waiting,
+                "maxRunning": self.max_running,
+                "maxQueued": self.max_queued,
+                "admitted": self._admitted,
+                "rejected": self._rejected,
+                "avgWaitSec": round(self._total_wait / self._admitted, 3) if self._admitted else 0.0,
+                "maxWaitSec": round(self._max_wait, 3),
+                "lastWaitSec": round(self._last_wait, 3),
+                "avgDurationSec": round(self._avg_duration, 3) if self._avg_duration else None,
+            }
+
+class AdmissionTicket:
+    """
+    대기열 자리 하나
+
+    - with 진입: 실행 슬롯 대기 후 획득 (대기 시간(초) 반환)
+    - with 종료: 슬롯 반납
+    - cancel(): 실행하지 않고 대기열에서 빠짐
+    """
+
+    def __init__(self, lane):
+        self._lane = lane
+        self._enqueued_at = time.monotonic()
+        self._state = "queued"
+
+    def __enter__(self):
+        waited = self._lane._acquire(self._enqueued_at)
+        self._state = "running"
+        self._started_at = time.monotonic()
+        return waited
+
+    def __exit__(self, exc_type, exc, tb):
+        self._state = "done"
+        self._lane._release(time.monotonic() - self._started_at)
+        return False
+
+    def cancel(self):
+        if self._state == "queued":
+            self._state = "cancelled"
+            self._lane._cancel()
+
+class JobScheduler:
+    """작업 유형별 JobLane 묶음"""
+
+    def __init__(self, limits):
+        """
+        limits: {"image": (max_running, max_queued), "pdf": (...), ...}
+        """
+        self.lanes = {
+            name: JobLane(name, max_running, max_queued)
+            for name, (max_running, max_queued) in limits.items()
+        }
+
+    def admit(self, lane):
+        return self.lanes[lane].admit()
+
+    def stats(self):
+        return {name: lane.stats() for name, lane in self.lanes.items()}
@@ -0,0 +1,101 @@
+"""
+용량 한도(바이트 예산) 맞춤 인코더
+
+- 메모리 버퍼에 인코딩해서 크기 확인 → 품질을 이진 탐색 → 디스크에는 마지막에 한 번만 저장
+- 기존처럼 품질을 5씩 내리며 매번 save() + getsize() 하지 않음
+"""
+import io
+import os
+
+from output_sink import open_output
+
+# 네이버 블로그 이미지 업로드 한도
+NAVER_BLOG_MAX_BYTES = 10 * 1024 * 1024
+
+def encode_to_bytes(img, format, **save_kwargs):
+    buffer = io.BytesIO()
+    img.save(buffer, format, **save_kwargs)
+    return buffer.getvalue()
+
+def search_quality(encode, max_bytes, quality=85, min_quality=60):
+    """
+    max_bytes 이하가 되는 가장 높은 품질 찾기
+
+    encode(quality) → bytes 를 받아 quality에서 먼저 시도하고,
+    넘치면 [min_quality, quality) 구간을 이진 탐색한다.
+
+    반환값: (bytes, 선택된 품질, 한도 이내 여부)
+    min_quality로도 넘치면 min_quality 결과를 돌려준다.
+    """
+    data = encode(quality)
+    if len(data) <= max_bytes:
+        return data, quality, True
+
+    best = None
+    lowest = None
+    lo, hi = min_quality, quality - 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        data = encode(mid)
+        if len(data) <= max_bytes:
+            best = (data, mid)
+            lo = mid + 1
+        else:
+            if mid == min_quality:
+                lowest = data
+            hi = mid - 1
+
+    if best is not None:
+        return best[0], best[1], True
+    if lowest is None:
+        lowest = encode(min_quality)
+    return lowest, min_quality, False
+
+def write_bytes(output_path, data):
+    with open_output(output_path) as f:
+        f.write(data)
+
+def encode_within_budget(img, format, max_bytes, output_path=None, quality=85, min_quality=60, **save_kwargs):
+    """
+    이미지를 용량 한도에 맞춰 인코딩
+
+    Args:
+    - img: PIL 이미지
+    - format: 'JPEG', 'WebP', 'PNG' (PNG 등 무손실은 품질 조절 없이 한 번만 인코딩)
+    - max_bytes: 바이트 예산
+    - output_path: 지정하면 최종 결과만 한 번 저장, 없으면 결과 bytes를 반환값에 포함
+    - quality / min_quality: 시작 품질 / 최저 품질
+    - save_kwargs: 나머지 인코더 옵션 (optimize, method 등)
+
+    Returns:
+    - {"path", "format", "quality", "bytes", "fits", "data"(output_path 없을 때)}
+    """
+    lossless = format.upper() == 'PNG' or save_kwargs.get('lossless')
+    if lossless:
+        data = encode_to_bytes(img, format, **save_kwargs)
+        chosen, fits = None, len(data) <= max_bytes
+    else:
+        def encode(q):
+            return encode_to_bytes(img, format, quality=q, **save_kwargs)
+        data, chosen, fits = search_quality(encode, max_bytes, quality, min_quality)
+
+    result = {
+        "path": output_path,
+        "format": format,
+        "quality": chosen,
+        "bytes": len(data),
+        "fits": fits,
+    }
+    if output_path:
+        write_bytes(output_path, data)
+    else:
+        result["data"] = data
+    return result
+
+def describe(result):
+    """로그용 한 줄 요약"""
+    size_mb = result["bytes"] / (1024 * 1024)
+    quality = f", 품질 {result['quality']}" if result["quality"] is not None else ""
+    status = "" if result["fits"] else " ⚠️ 한도 초과"
+    name = os.path.basename(result["path"]) if result["path"] else result["format"]
+    return f"{name}: {size_mb:.2f} MB{quality}{status}"
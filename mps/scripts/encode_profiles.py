@@ -0,0 +1,88 @@
+"""
+인코딩 속도 프로필 (fast / balanced / smallest / auto)
+
+NotebookLM 슬라이드 기준 측정값 (1200x675 슬라이드 15장을 세로로 이은 1200x10125, 12.2MP, 1코어)
+
+| 프로필    | WebP (q85)          | JPEG (q85)                  | PNG                  |
+|-----------|---------------------|-----------------------------|----------------------|
+| fast      | method 0: 833KB 0.32초 | 기본: 1110KB 0.05초        | level 1: 5.06MB 0.54초 |
+| balanced  | method 4: 702KB 0.87초 | optimize: 1048KB 0.08초    | level 6: 4.66MB 0.74초 |
+| smallest  | method 6: 645KB 1.69초 | optimize+progressive: 950KB 0.17초 | level 9: 4.64MB 1.16초 |
+
+- WebP 인코딩이 전체 시간을 좌우: smallest는 fast보다 약 5배 느리고 약 23% 작음
+- auto: 픽셀 수와 요청별 지연 예산(ms)으로 예상 인코딩 시간을 계산해
+  예산 안에 드는 가장 작은 결과의 프로필을 선택 (안 되면 fast)
+- 프로필을 지정하지 않으면(None) 각 출력이 기존 설정을 그대로 사용
+"""
+
+PROFILES = {
+    'fast': {
+        'webp': {'quality': 85, 'method': 0},
+        'jpeg': {'quality': 85},
+        'png': {'compress_level': 1},
+    },
+    'balanced': {
+        'webp': {'quality': 85, 'method': 4},
+        'jpeg': {'quality': 85, 'optimize': True},
+        'png': {'compress_level': 6},
+    },
+    'smallest': {
+        'webp': {'quality': 85, 'method': 6},
+        'jpeg': {'quality': 85, 'optimize': True, 'progressive': True},
+        'png': {'compress_level': 9},
+    },
+}
+
+# 결과가 큰 순서 (auto는 뒤쪽부터 예산에 맞는지 확인)
+PROFILE_ORDER = ('fast', 'balanced', 'smallest')
+
+# 메가픽셀당 예상 인코딩 시간 (ms, 위 측정값 기준)
+MS_PER_MEGAPIXEL = {
+    'fast': {'webp': 26, 'jpeg': 4, 'png': 45},
+    'balanced': {'webp': 72, 'jpeg': 7, 'png': 61},
+    'smallest': {'webp': 140, 'jpeg': 14, 'png': 95},
+}
+
+# auto 모드 기본 지연 예산 (요청별로 지정하지 않았을 때)
+DEFAULT_LATENCY_BUDGET_MS = 2000
+
+def validate_profile(profile):
+    """
+    API 입력 검증: None/'' → None, 알 수 없는 이름이면 ValueError
+    """
+    if not profile:
+        return None
+    profile = profile.lower()
+    if profile != 'auto' and profile not in PROFILES:
+        raise ValueError(f"알 수 없는 인코딩 프로필: {profile} (fast, balanced, smallest, auto)")
+    return profile
+
+def estimate_encode_ms(profile, pixels, formats):
+    """포맷별 인코딩을 순서대로 했을 때의 예상 시간 (ms)"""
+    megapixels = pixels / 1_000_000
+    return sum(MS_PER_MEGAPIXEL[profile][fmt] * megapixels for fmt in formats)
+
+def choose_profile(pixels, formats, latency_budget_ms=None):
+    """
+    auto 모드: 예상 인코딩 시간이 예산 안에 드는 가장 작은 결과의 프로필
+
+    - pixels: 인코딩할 전체 픽셀 수 (출력 여러 장이면 합계)
+    - formats: 인코딩할 포맷 이름 목록 ('webp', 'jpeg', 'png')
+    """
+    budget = latency_budget_ms or DEFAULT_LATENCY_BUDGET_MS
+    for profile in reversed(PROFILE_ORDER):
+        if estimate_encode_ms(profile, pixels, formats) <= budget:
+            return profile
+    return 'fast'
+
+def resolve_profile(profile, pixels, formats, latency_budget_ms=None):
+    """'auto'면 픽셀 수와 예산으로 실제 프로필 결정, 그 외는 그대로 (None 포함)"""
+    if profile == 'auto':
+        return choose_profile(pixels, formats, latency_budget_ms)
+    return profile
+
+def encoder_options(profile, fmt, default):
+    """프로필의 포맷별 인코더 옵션 (프로필 미지정이면 호출한 쪽의 기존 설정)"""
+    if profile is None:
+        return dict(default)
+    return dict(PROFILES[profile][fmt])
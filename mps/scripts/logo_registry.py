@@ -0,0 +1,133 @@
+"""
+로고 레지스트리
+
+- logos/ 폴더의 로고를 한 번만 읽고 디코딩해서 보관
+- 로고 색상 변환(흰색/투명 → 배경색)을 NumPy 마스크로 한 번에 처리
+- (로고, 배경색, 크기)별 변환 결과를 LRU 캐시 → 여러 페이지 PDF는 배경색이 다를 때만 다시 계산
+"""
+from PIL import Image
+import numpy as np
+import os
+import threading
+from collections import OrderedDict
+
+LOGOS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logos')
+LOGO_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+
+def recolor_logo(logo_array, background_color):
+    """
+    로고 색상 변환 (RGBA 배열)
+
+    - 거의 투명 (a < 10): 배경색 + 완전 투명
+    - 흰색 (r, g, b > 200): 배경색 + 불투명
+    - 나머지: 원래 색 유지
+    """
+    r = logo_array[..., 0]
+    g = logo_array[..., 1]
+    b = logo_array[..., 2]
+    a = logo_array[..., 3]
+
+    transparent = a < 10
+    white = ~transparent & (r > 200) & (g > 200) & (b > 200)
+
+    bg_r, bg_g, bg_b = (int(c) for c in background_color[:3])
+    new_logo = logo_array.copy()
+    new_logo[transparent] = (bg_r, bg_g, bg_b, 0)
+    new_logo[white] = (bg_r, bg_g, bg_b, 255)
+    return new_logo
+
+class LogoRegistry:
+    """
+    디코딩된 로고 + 변환 결과 캐시
+
+    - names(): {로고명: 경로}
+    - resolve(): 로고명 또는 경로 → 경로 (없으면 None)
+    - get_logo(): 배경색/크기에 맞게 변환·리사이즈된 RGBA 로고 (LRU 캐시)
+    """
+
+    def __init__(self, logos_dir=LOGOS_DIR, cache_size=64):
+        self.logos_dir = logos_dir
+        self.cache_size = cache_size
+        self._paths = None
+        self._decoded = {}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._paths is not None:
+            return
+        paths = {}
+        if os.path.isdir(self.logos_dir):
+            for filename in sorted(os.listdir(self.logos_dir)):
+                if filename.lower().endswith(LOGO_EXTENSIONS):
+                    name = os.path.splitext(filename)[0]
+                    paths[name] = os.path.join(self.logos_dir, filename)
+        self._paths = paths
+        for path in paths.values():
+            self._decode(path)
+
+    def _decode(self, path):
+        """로고 파일 → RGBA 배열 (한 번만 디코딩)"""
+        key = os.path.abspath(path)
+        if key not in self._decoded:
+            with Image.open(path) as logo:
+                self._decoded[key] = np.array(logo.convert('RGBA'))
+        return self._decoded[key]
+
+    def names(self):
+        with self._lock:
+            self._load()
+            return dict(self._paths)
+
+    def resolve(self, logo):
+        """로고명(favicon 등) 또는 파일 경로 → 실제 경로"""
+        with self._lock:
+            self._load()
+            if logo in self._paths:
+                return self._paths[logo]
+        if logo and os.path.exists(logo):
+            return logo
+        return None
+
+    def get_logo(self, logo, background_color, size):
+        """
+        배경색에 맞게 변환 + size x size로 리사이즈된 RGBA 로고
+
+        같은 (로고, 배경색, 크기) 요청은 캐시에서 바로 반환
+        """
+        path = self.resolve(logo)
+        if path is None:
+            raise FileNotFoundError(f"로고를 찾을 수 없습니다: {logo}")
+
+        bg = tuple(int(c) for c in background_color[:3])
+        key = (os.path.abspath(path), bg, int(size))
+
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+            logo_array = self._decode(path)
+
+        logo_converted = Image.fromarray(recolor_logo(logo_array, bg), 'RGBA')
+        logo_resized = logo_converted.resize((size, size), Image.Resampling.LANCZOS)
+
+        with self._lock:
+            self._cache[key] = logo_resized
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return logo_resized
+
+    def cache_info(self):
+        with self._lock:
+            return {"decoded": len(self._decoded), "cached": len(self._cache)}
+
+_registry = None
+
+def get_registry():
+    """프로세스당 하나의 레지스트리 (처음 호출 시 logos/ 로드)"""
+    global _registry
+    if _registry is None:
+        _registry = LogoRegistry()
+        _registry.names()
+    return _registry
@@ -2,6 +2,8 @@ from PIL import Image
 import os
 import sys
 
+from strip_merge import merge_vertical
+
 def merge_png_images(image_dir, output_path='merged_selected.png'):
     print("=== PNG 이미지 합치기 ===")
     
@@ -25,23 +27,23 @@ def merge_png_images(image_dir, output_path='merged_selected.png'):
     for idx, filepath in enumerate(image_files, 1):
         print(f"   {idx}. {os.path.basename(filepath)}")
     
-    print("\n2. 이미지 로드 중...")
-    images = []
+    print("\n2. 이미지 크기 확인 중 (헤더만 읽음)...")
+    valid_files = []
+    sizes = []
     for filepath in image_files:
         try:
-            img = Image.open(filepath)
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            images.append(img)
-            print(f"   ✅ {os.path.basename(filepath)}: {img.width} x {img.height}")
+            with Image.open(filepath) as img:
+                sizes.append(img.size)
+            valid_files.append(filepath)
+            print(f"   ✅ {os.path.basename(filepath)}: {sizes[-1][0]} x {sizes[-1][1]}")
         except Exception as e:
             print(f"   ❌ 오류: {os.path.basename(filepath)} - {str(e)}")
     
-    if not images:
+    if not valid_files:
         print("❌ 로드할 수 있는 이미지가 없습니다.")
         return None
     
-    widths = [img.width for img in images]
+    widths = [w for w, _ in sizes]
     if len(set(widths)) > 1:
         print(f"\n⚠️  경고: 이미지 너비가 다릅니다: {set(widths)}")
         print("   가장 큰 너비로 통일합니다.")
@@ -49,22 +51,17 @@ def merge_png_images(image_dir, output_path='merged_selected.png'):
     else:
         max_width = widths[0]
     
-    total_height = sum(img.height for img in images)
+    total_height = sum(h for _, h in sizes)
     
-    print(f"\n3. 이미지 합치는 중...")
+    print(f"\n3. 이미지 합치는 중 (한 장씩 스트리밍 저장)...")
     print(f"   최종 크기: {max_width} x {total_height}")
     
-    merged_image = Image.new('RGB', (max_width, total_height), (255, 255, 255))
-    
     y_offset = 0
-    for idx, img in enumerate(images, 1):
-        x_offset = (max_width - img.width) // 2
-        merged_image.paste(img, (x_offset, y_offset))
+    for idx, (_, height) in enumerate(sizes, 1):
         print(f"   페이지 {idx}: Y 위치 {y_offset}")
-        y_offset += img.height
+        y_offset += height
     
-    print(f"\n4. 저장 중...")
-    merged_image.save(output_path, 'PNG', quality=95)
+    merge_vertical(valid_files, output_path, 'png', width=max_width, align='center', sizes=sizes)
     
     print(f"✅ 완료! {output_path}로 저장되었습니다.")
     return output_path
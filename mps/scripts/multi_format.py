@@ -0,0 +1,81 @@
+"""
+여러 포맷 동시 인코딩 (디코딩된 이미지 하나 → 요청한 포맷만 스레드로 병렬 저장)
+
+- Pillow는 인코딩 중 GIL을 놓기 때문에 WebP/JPEG/PNG를 스레드로 동시에 인코딩 가능
+- 포맷별 인코딩 호출은 순차 저장과 같으므로 결과 파일도 바이트 단위로 동일
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+from budget_encoder import encode_within_budget
+from output_sink import open_output
+
+# 포맷 이름 → (확장자, Pillow 포맷)
+FORMATS = {
+    'webp': ('.webp', 'WebP'),
+    'jpeg': ('.jpg', 'JPEG'),
+    'png': ('.png', 'PNG'),
+}
+
+def normalize_formats(output_format):
+    """
+    'webp' / 'jpeg' / 'jpg' / 'png' / 'both'(webp+jpeg) / 'all' → 포맷 이름 튜플
+    """
+    output_format = output_format.lower()
+    if output_format == 'all':
+        return ('webp', 'jpeg', 'png')
+    if output_format == 'both':
+        return ('webp', 'jpeg')
+    if output_format == 'jpg':
+        return ('jpeg',)
+    return (output_format,)
+
+def run_concurrently(calls):
+    """
+    (함수, 인자, 키워드 인자) 목록을 스레드로 동시에 실행하고 결과를 같은 순서로 반환
+
+    하나만 있으면 스레드 없이 바로 실행. 각 스레드는 호출한 쪽의 contextvars(작업 id 등)를 이어받음
+    """
+    if len(calls) <= 1:
+        return [fn(*args, **kwargs) for fn, args, kwargs in calls]
+    with ThreadPoolExecutor(max_workers=len(calls), thread_name_prefix="mps-encode") as executor:
+        futures = [executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+                   for fn, args, kwargs in calls]
+        return [f.result() for f in futures]
+
+def thread_images(img, count):
+    """
+    스레드마다 쓸 이미지 객체 count개 (첫 번째는 img 그대로, 나머지는 img.copy())
+
+    Image.save()가 인코더 옵션을 이미지 객체(encoderinfo)에 기록하므로
+    스레드마다 객체를 따로 써야 옵션이 섞이지 않는다.
+    공개 API만 쓰기 위해 픽셀도 복사 (1200px 폭 페이지 1장 ≈ 3MB, 포맷 수 - 1장)
+    """
+    return [img] + [img.copy() for _ in range(count - 1)]
+
+def _save(img, output_path, format, save_kwargs):
+    with open_output(output_path) as fp:
+        img.save(fp, format, **save_kwargs)
+    return {"path": output_path, "format": format}
+
+def emit_formats(img, targets, max_bytes=None):
+    """
+    디코딩된 이미지 하나를 여러 포맷으로 동시에 저장
+
+    Args:
+    - img: PIL 이미지 (이미 RGB로 변환/리사이즈된 최종 이미지)
+    - targets: [(출력 경로, 포맷 이름, 인코더 옵션 dict), ...]  (포맷 이름은 FORMATS 키)
+    - max_bytes: 지정하면 포맷마다 budget_encoder로 용량 한도 맞춤
+
+    Returns:
+    - targets 순서대로 결과 dict 목록 ({"path", "format", ...})
+    """
+    img.load()
+    calls = []
+    for (output_path, fmt, save_kwargs), view in zip(targets, thread_images(img, len(targets))):
+        pil_format = FORMATS[fmt][1]
+        if max_bytes:
+            calls.append((encode_within_budget, (view, pil_format, max_bytes, output_path), save_kwargs))
+        else:
+            calls.append((_save, (view, output_path, pil_format, save_kwargs), {}))
+    return run_concurrently(calls)
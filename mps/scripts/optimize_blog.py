@@ -2,36 +2,124 @@ from PIL import Image
 import sys
 import os
 
+from budget_encoder import describe, write_bytes, NAVER_BLOG_MAX_BYTES
+from multi_format import emit_formats, normalize_formats
+from encode_profiles import resolve_profile, encoder_options
+from telemetry import stage
+
 Image.MAX_IMAGE_PIXELS = None
 
-input_path = sys.argv[1]
-output_webp = sys.argv[2] if len(sys.argv) > 2 else 'optimized.webp'
-output_jpeg = output_webp.replace('.webp', '.jpg')
+# 원본 그대로 내보낼 수 있는 입력 포맷 (PIL 포맷 → 출력 포맷 이름)
+PASSTHROUGH_FORMATS = {'WEBP': 'webp', 'JPEG': 'jpeg'}
+
+def read_original(original):
+    """원본 bytes (경로면 파일을 읽음)"""
+    if isinstance(original, (bytes, bytearray)):
+        return bytes(original)
+    with open(original, 'rb') as f:
+        return f.read()
+
+def passthrough_format(img, original, formats, max_width=1200, max_bytes=NAVER_BLOG_MAX_BYTES):
+    """
+    원본이 이미 출력 규격을 만족하면 그 출력 포맷 이름, 아니면 None
+
+    - 요청한 포맷과 같은 WebP/JPEG, 너비 max_width 이하, max_bytes 이하, RGB 정지 이미지
+    - EXIF가 있으면 제외 (재인코딩하면 항상 빠지던 촬영 정보·위치가 그대로 나가지 않도록)
+    """
+    fmt = PASSTHROUGH_FORMATS.get(img.format)
+    if fmt not in formats or img.mode != 'RGB' or img.width > max_width:
+        return None
+    if getattr(img, 'is_animated', False) or img.info.get('exif'):
+        return None
+    size = len(original) if isinstance(original, (bytes, bytearray)) else os.path.getsize(original)
+    return fmt if size <= max_bytes else None
+
+def optimize_blog(input_path, output_webp='optimized.webp', max_width=1200, max_bytes=NAVER_BLOG_MAX_BYTES,
+                  formats=('webp', 'jpeg'), profile=None, latency_budget_ms=None, original=None):
+    """
+    블로그용 이미지 최적화 (1200px 너비, WebP + JPEG)
+
+    Parameters:
+    - input_path: 입력 이미지 경로 / 파일 객체 / PIL 이미지 (워터마크 제거 결과를 디스크 없이 바로 받음)
+    - output_webp: WebP 출력 경로 (JPEG는 확장자만 .jpg로 바꿔 저장)
+    - max_width: 최대 너비 (기본 1200)
+    - max_bytes: 파일당 용량 한도 (기본 10MB, 넘으면 품질 85 → 60 사이에서 자동 조정)
+    - formats: 저장할 포맷 ('webp', 'jpeg' 중 요청한 것만, 여러 개면 동시에 인코딩)
+    - profile: 인코딩 프로필 ('fast', 'balanced', 'smallest', 'auto', 기본 None = method 6 / optimize+progressive)
+    - latency_budget_ms: auto 모드에서 인코딩에 쓸 수 있는 시간
+    - original: 입력 원본 bytes / 경로 (input_path가 원본을 그대로 연 이미지일 때만)
+      → 이미 출력 규격을 만족하는 포맷은 재인코딩 없이 원본 bytes를 그대로 저장
+
+    Returns:
+    - 저장된 파일 경로 목록 (formats 순서)
+    """
+    output_jpeg = output_webp.replace('.webp', '.jpg')
+
+    print("=== 블로그 이미지 최적화 ===")
+
+    img = input_path if isinstance(input_path, Image.Image) else Image.open(input_path)
+
+    passthrough = passthrough_format(img, original, formats, max_width, max_bytes) \
+        if original is not None else None
+    if passthrough:
+        path = output_webp if passthrough == 'webp' else output_jpeg
+        data = read_original(original)
+        write_bytes(path, data)
+        print(f"✅ {passthrough.upper()}: {path} ({len(data) / 1024:.0f} KB, 원본 그대로)")
+        if len(formats) == 1:
+            return [path]
+
+    if img.mode == 'RGBA':
+        background = Image.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        img = background
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    original_width, original_height = img.size
+    print(f"원본: {original_width} x {original_height}px")
+
+    if original_width > max_width:
+        ratio = max_width / original_width
+        new_height = int(original_height * ratio)
+        with stage("resize"):
+            img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
+        print(f"조정: {max_width} x {new_height}px")
+
+    chosen = resolve_profile(profile, img.width * img.height, formats, latency_budget_ms)
+    if chosen:
+        print(f"인코딩 프로필: {chosen}" + (" (auto)" if profile == 'auto' else ""))
 
-print("=== 블로그 이미지 최적화 ===")
+    targets = []
+    if 'webp' in formats and passthrough != 'webp':
+        targets.append((output_webp, 'webp', encoder_options(chosen, 'webp', {'quality': 85, 'method': 6})))
+    if 'jpeg' in formats and passthrough != 'jpeg':
+        targets.append((output_jpeg, 'jpeg',
+                        encoder_options(chosen, 'jpeg', {'quality': 85, 'optimize': True, 'progressive': True})))
 
-img = Image.open(input_path)
-if img.mode == 'RGBA':
-    background = Image.new('RGB', img.size, (255, 255, 255))
-    background.paste(img, mask=img.split()[3])
-    img = background
-elif img.mode != 'RGB':
-    img = img.convert('RGB')
+    with stage("encode", format="+".join(fmt for _, fmt, _ in targets)):
+        results = emit_formats(img, targets, max_bytes)
 
-original_width, original_height = img.size
-print(f"원본: {original_width} x {original_height}px")
+    print()
+    for result in results:
+        print(f"✅ {result['format'].upper()}: {result['path']} ({result['bytes'] / 1024:.0f} KB, 품질 {result['quality']})")
+        if not result["fits"]:
+            print(f"⚠️ {describe(result)}")
 
-if original_width > 1200:
-    ratio = 1200 / original_width
-    new_height = int(original_height * ratio)
-    img = img.resize((1200, new_height), Image.Resampling.LANCZOS)
-    print(f"조정: 1200 x {new_height}px")
+    paths = [result["path"] for result in results]
+    if passthrough:
+        # 반환 순서는 저장 순서와 같게 (webp → jpeg)
+        paths.insert(0 if passthrough == 'webp' else len(paths), path)
+    return paths
 
-img.save(output_webp, 'WebP', quality=85, method=6)
-img.save(output_jpeg, 'JPEG', quality=85, optimize=True, progressive=True)
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python optimize_blog.py <image> [output.webp] [webp|jpeg|both] [fast|balanced|smallest|auto]")
+        sys.exit(1)
 
-webp_kb = os.path.getsize(output_webp) / 1024
-jpeg_kb = os.path.getsize(output_jpeg) / 1024
+    input_path = sys.argv[1]
+    output_webp = sys.argv[2] if len(sys.argv) > 2 else 'optimized.webp'
+    formats = normalize_formats(sys.argv[3]) if len(sys.argv) > 3 else ('webp', 'jpeg')
+    profile = sys.argv[4] if len(sys.argv) > 4 else None
 
-print(f"\n✅ WebP: {output_webp} ({webp_kb:.0f} KB)")
-print(f"✅ JPEG: {output_jpeg} ({jpeg_kb:.0f} KB)")
+    optimize_blog(input_path, output_webp, formats=formats, profile=profile)
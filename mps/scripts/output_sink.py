@@ -0,0 +1,41 @@
+"""
+출력 대상 전환 (디스크 파일 ↔ 메모리 바이트)
+
+- 기본: 인코더가 출력 경로에 파일로 저장
+- capture(emit) 범위 안에서는 같은 인코딩을 메모리 버퍼에 한 뒤 emit(출력 경로, bytes) 호출 (디스크에 쓰지 않음)
+- 서버의 스트리밍 응답 모드: 워커가 받은 바이트를 큐로 보내 파일이 완성되는 대로 응답에 씀
+- contextvars 기반이라 run_concurrently()의 인코딩 스레드에도 그대로 적용됨
+"""
+import contextlib
+import contextvars
+import io
+
+_emit = contextvars.ContextVar("mps_output_emit", default=None)
+
+@contextlib.contextmanager
+def capture(emit):
+    """범위 안의 출력 파일을 emit(경로, bytes)로 보냄"""
+    token = _emit.set(emit)
+    try:
+        yield
+    finally:
+        _emit.reset(token)
+
+def capturing():
+    return _emit.get() is not None
+
+@contextlib.contextmanager
+def open_output(output_path):
+    """
+    출력 파일 쓰기용 파일 객체 (open(path, 'wb') 대신 사용)
+
+    capture 범위 안이면 메모리 버퍼를 주고, with 블록이 정상 종료될 때 내용을 emit으로 보냄
+    """
+    emit = _emit.get()
+    if emit is None:
+        with open(output_path, 'wb') as fp:
+            yield fp
+        return
+    buffer = io.BytesIO()
+    yield buffer
+    emit(output_path, buffer.getvalue())
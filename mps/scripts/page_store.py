@@ -0,0 +1,88 @@
+"""
+PDF 페이지 중간 저장소 (처리된 페이지 → 병합/개별 인코딩 단계)
+
+- 최근 페이지는 메모리에 RGB 배열 그대로 보관 (바이트 예산 이내)
+- 예산을 넘으면 오래된 페이지부터 무압축 .npy 파일로 내림 → 읽을 때 mmap
+- PNG 임시 파일과 달리 deflate/inflate 과정이 없음
+"""
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# 메모리에 보관할 페이지 바이트 예산 (1200px 폭 페이지 1장 ≈ 6MB)
+DEFAULT_MEMORY_BUDGET = 128 * 1024 * 1024
+
+def page_file_path(temp_dir, page_num):
+    return os.path.join(temp_dir, f"temp_{page_num - 1:04d}.npy")
+
+def write_page_file(temp_dir, page_num, img):
+    """
+    페이지를 무압축 .npy로 저장 (병렬 워커용)
+
+    반환값: (파일 경로, (너비, 높이))
+    """
+    arr = np.asarray(img)
+    path = page_file_path(temp_dir, page_num)
+    np.save(path, arr)
+    return path, (arr.shape[1], arr.shape[0])
+
+class PageStore:
+    """
+    페이지 번호 → RGB 배열 저장소
+
+    - put(page_num, img): 메모리에 보관 (예산 초과 시 오래된 페이지를 .npy로 내림)
+    - add_file(page_num, path, size): 다른 프로세스가 저장한 .npy 등록
+    - sources(): 페이지 순서대로 ndarray 또는 .npy 경로 (strip_merge 입력)
+    """
+
+    def __init__(self, temp_dir, memory_budget=DEFAULT_MEMORY_BUDGET):
+        self.temp_dir = temp_dir
+        self.memory_budget = memory_budget
+        self._memory = OrderedDict()  # page_num → ndarray
+        self._files = {}              # page_num → .npy 경로
+        self._sizes = {}              # page_num → (너비, 높이)
+        self._memory_bytes = 0
+        self.spilled = 0
+
+    def __contains__(self, page_num):
+        return page_num in self._sizes
+
+    def __len__(self):
+        return len(self._sizes)
+
+    def put(self, page_num, img):
+        arr = np.asarray(img)
+        self._memory[page_num] = arr
+        self._sizes[page_num] = (arr.shape[1], arr.shape[0])
+        self._memory_bytes += arr.nbytes
+
+        # 예산 초과 → 오래된 페이지부터 디스크로 (방금 넣은 페이지는 유지)
+        while self._memory_bytes > self.memory_budget and len(self._memory) > 1:
+            old_num, old_arr = self._memory.popitem(last=False)
+            self._files[old_num], _ = write_page_file(self.temp_dir, old_num, old_arr)
+            self._memory_bytes -= old_arr.nbytes
+            self.spilled += 1
+
+    def add_file(self, page_num, path, size):
+        self._files[page_num] = path
+        self._sizes[page_num] = size
+
+    def page_numbers(self):
+        return sorted(self._sizes)
+
+    def get(self, page_num):
+        """페이지 배열 (디스크에 있으면 mmap으로 읽기 전용 반환)"""
+        if page_num in self._memory:
+            return self._memory[page_num]
+        return np.load(self._files[page_num], mmap_mode='r')
+
+    def sources(self):
+        return [self._memory.get(p, self._files.get(p)) for p in self.page_numbers()]
+
+    def sizes(self):
+        return [self._sizes[p] for p in self.page_numbers()]
+
+    def clear(self):
+        self._memory.clear()
+        self._memory_bytes = 0
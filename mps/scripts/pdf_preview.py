@@ -0,0 +1,92 @@
+"""
+PDF 페이지 미리보기 (페이지 선택 화면용 저해상도 썸네일)
+
+- render_thumbnails(): 연속 구간의 페이지를 thumb_width 픽셀 폭으로 렌더링 (A4 160px ≈ 19 DPI) → WebP bytes
+- make_sprite(): 썸네일을 격자 한 장으로 합친 스프라이트 + 페이지별 위치
+- 서버는 페이지를 구간으로 나눠 여러 워커에서 render_thumbnails()를 동시에 실행
+"""
+import io
+import math
+import sys
+
+from PIL import Image
+
+from rasterizer import open_rasterizer
+from telemetry import stage
+
+THUMB_WIDTH = 160
+MIN_THUMB_WIDTH = 32
+MAX_THUMB_WIDTH = 400
+THUMB_QUALITY = 70
+
+SPRITE_COLUMNS = 10
+# WebP 한 변 최대 길이
+SPRITE_MAX_SIDE = 16383
+
+def clamp_thumb_width(thumb_width):
+    return max(MIN_THUMB_WIDTH, min(MAX_THUMB_WIDTH, int(thumb_width or THUMB_WIDTH)))
+
+def _encode(img):
+    buffer = io.BytesIO()
+    img.save(buffer, 'WEBP', quality=THUMB_QUALITY, method=4)
+    return buffer.getvalue()
+
+def render_thumbnails(pdf_path, first_page, last_page, thumb_width=THUMB_WIDTH, rasterizer='auto'):
+    """
+    first_page ~ last_page 썸네일
+
+    반환값: [(페이지 번호, (너비, 높이), WebP bytes), ...]
+    """
+    with open_rasterizer(pdf_path, rasterizer) as raster:
+        with stage("preview_rasterize", pages=last_page - first_page + 1, backend=raster.name):
+            images = raster.render(first_page, last_page, width=thumb_width)
+
+    thumbnails = []
+    with stage("preview_encode", pages=len(images)):
+        for offset, img in enumerate(images):
+            thumbnails.append((first_page + offset, img.size, _encode(img)))
+    return thumbnails
+
+def make_sprite(thumbnails, columns=SPRITE_COLUMNS):
+    """
+    썸네일 → 격자 스프라이트 한 장 (페이지 순서, 칸 크기는 가장 큰 썸네일 기준)
+
+    반환값: (WebP bytes, [{"page", "x", "y", "width", "height"}, ...])
+    """
+    thumbnails = sorted(thumbnails)
+    if not thumbnails:
+        raise ValueError("미리보기할 페이지가 없습니다.")
+    cell_w = max(size[0] for _, size, _ in thumbnails)
+    cell_h = max(size[1] for _, size, _ in thumbnails)
+
+    # 세로가 WebP 한도를 넘지 않도록 열 수 조정
+    columns = max(columns, math.ceil(len(thumbnails) / max(1, SPRITE_MAX_SIDE // cell_h)))
+    columns = min(columns, len(thumbnails))
+    rows = math.ceil(len(thumbnails) / columns)
+    if columns * cell_w > SPRITE_MAX_SIDE or rows * cell_h > SPRITE_MAX_SIDE:
+        raise ValueError("페이지가 너무 많아 스프라이트 한 장으로 만들 수 없습니다. 목록 방식(list)을 사용하세요.")
+
+    with stage("preview_sprite", pages=len(thumbnails)):
+        sprite = Image.new('RGB', (columns * cell_w, rows * cell_h), (255, 255, 255))
+        tiles = []
+        for index, (page_num, (w, h), data) in enumerate(thumbnails):
+            x, y = (index % columns) * cell_w, (index // columns) * cell_h
+            with Image.open(io.BytesIO(data)) as tile:
+                sprite.paste(tile.convert('RGB'), (x, y))
+            tiles.append({"page": page_num, "x": x, "y": y, "width": w, "height": h})
+        data = _encode(sprite)
+    return data, tiles
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python pdf_preview.py <pdf> <sprite.webp> [thumb_width]")
+        sys.exit(1)
+
+    pdf_path, sprite_path = sys.argv[1], sys.argv[2]
+    width = clamp_thumb_width(sys.argv[3] if len(sys.argv) > 3 else THUMB_WIDTH)
+    with open_rasterizer(pdf_path) as raster:
+        page_count = raster.page_count
+    data, tiles = make_sprite(render_thumbnails(pdf_path, 1, page_count, width))
+    with open(sprite_path, 'wb') as f:
+        f.write(data)
+    print(f"✅ {page_count}페이지 미리보기 저장: {sprite_path} ({len(data) / 1024:.1f} KB)")
@@ -1,11 +1,32 @@
-from pdf2image import convert_from_path
 from PIL import Image, ImageDraw
 import numpy as np
 import sys
 import os
+import logging
+import multiprocessing
+
+from remove_watermark import feather_fill, clean_watermark_roi
+from watermark_detect import detect_watermark
+from logo_registry import get_registry
+from strip_merge import merge_vertical
+from budget_encoder import NAVER_BLOG_MAX_BYTES
+from multi_format import FORMATS, emit_formats, normalize_formats, run_concurrently
+from page_store import PageStore, write_page_file, DEFAULT_MEMORY_BUDGET
+from encode_profiles import resolve_profile, encoder_options
+from rasterizer import open_rasterizer
+import telemetry
+from telemetry import stage
 
 Image.MAX_IMAGE_PIXELS = None
 
+# 배치 크기 (한 번에 래스터화하는 페이지 수, 메모리 절약을 위해 3장으로 보수적으로 잡음)
+BATCH_SIZE = 3
+
+# 래스터화 방식
+# - width: 페이지마다 정확히 target_width 픽셀 폭으로 렌더링 (pdftoppm -scale-to-x, 크기가 섞인 문서도 리사이즈 없음)
+# - dpi: 첫 페이지 크기로 정한 DPI 하나를 모든 페이지에 적용 (72~300 제한, 기존 방식)
+RENDER_MODES = ('width', 'dpi')
+
 def get_average_background_color(img, x1, y1, x2, y2):
     """기본 배경색 샘플링 (하위 호환성)"""
     region = img.crop((x1, y1, x2, y2))
@@ -69,55 +90,82 @@ def get_improved_background_color(img, wm_x1, wm_y1, wm_x2, wm_y2):
 
 def apply_gradient_blend(arr, wm_x1, wm_y1, wm_x2, wm_y2, bg_color):
     """
-    그라디언트 블렌딩 적용
+    그라디언트 블렌딩 적용 (remove_watermark.feather_fill 공용 구현, 선형 램프)
     """
-    height, width = arr.shape[:2]
-    feather_size = min(10, (wm_x2 - wm_x1) // 4, (wm_y2 - wm_y1) // 4)
-    
-    # 기본 채우기
-    arr[wm_y1:wm_y2, wm_x1:wm_x2] = bg_color
-    
-    # 좌측 블렌딩
-    if wm_x1 >= feather_size:
-        for i in range(feather_size):
-            alpha = (i + 1) / feather_size
-            x = wm_x1 + i
-            for y in range(wm_y1, wm_y2):
-                if x - feather_size >= 0:
-                    original = arr[y, x - feather_size].astype(float)
-                    arr[y, x] = (original * (1 - alpha) + np.array(bg_color) * alpha).astype(np.uint8)
-    
-    # 상단 블렌딩
-    if wm_y1 >= feather_size:
-        for i in range(feather_size):
-            alpha = (i + 1) / feather_size
-            y = wm_y1 + i
-            for x in range(wm_x1, wm_x2):
-                if y - feather_size >= 0:
-                    original = arr[y - feather_size, x].astype(float)
-                    arr[y, x] = (original * (1 - alpha) + np.array(bg_color) * alpha).astype(np.uint8)
-    
-    return arr
+    return feather_fill(arr, wm_x1, wm_y1, wm_x2, wm_y2, bg_color, smooth=False)
 
-def detect_content_bounds(img, threshold=240):
-    img_array = np.array(img.convert('L'))
-    rows_with_content = np.where(np.min(img_array, axis=1) < threshold)[0]
-    cols_with_content = np.where(np.min(img_array, axis=0) < threshold)[0]
-    
-    if len(rows_with_content) == 0 or len(cols_with_content) == 0:
+# 컨텐츠 영역 감지
+# - factor px마다 한 픽셀씩 뽑은 축소 이미지에서 컨텐츠 블록을 찾아 대략적인 경계를 잡고,
+#   그 바깥 여백과 경계 블록만 원본 해상도로 확인 → 안쪽 컨텐츠 영역은 회색조 변환·스캔하지 않음
+# - 결과는 전체 해상도 스캔(_content_bounds_full)과 항상 같음
+CONTENT_SCAN_FACTOR = 8
+CONTENT_PADDING = 30
+
+def _content_lines(region, threshold):
+    """영역의 컨텐츠 행/열 인덱스 (회색조 threshold 미만 픽셀이 있는 줄)"""
+    gray = np.asarray(region.convert('L'))
+    return (np.flatnonzero(gray.min(axis=1) < threshold),
+            np.flatnonzero(gray.min(axis=0) < threshold))
+
+def _content_bounds_full(img, threshold):
+    """전체 해상도 스캔 → (left, top, right, bottom) 또는 None (컨텐츠 없음)"""
+    rows, cols = _content_lines(img, threshold)
+    if len(rows) == 0 or len(cols) == 0:
+        return None
+    return cols[0], rows[0], cols[-1], rows[-1]
+
+def _content_bounds_coarse(img, threshold, factor):
+    """
+    축소 → 원본 순서로 찾은 (left, top, right, bottom) 또는 None (컨텐츠 없음)
+
+    축소 픽셀 (x, y)는 원본 factor×factor 블록 안의 실제 픽셀 하나 (NEAREST, 블록 중앙)
+    → 축소 이미지의 컨텐츠 픽셀은 그 블록에 컨텐츠가 있다는 확실한 표시.
+    (Image.reduce의 블록 평균은 원본 픽셀을 전부 읽어 전체 스캔만큼 느리고, 평균에 묻힌 옅은 픽셀 때문에 여유값이 필요함)
+    샘플 사이에 빠진 얇은 선 등은 여백 확인 단계에서 원본 해상도로 찾음.
+    """
+    width, height = img.size
+    coarse_w, coarse_h = width // factor, height // factor
+    coarse = np.asarray(img.resize((coarse_w, coarse_h), Image.Resampling.NEAREST,
+                                   box=(0, 0, coarse_w * factor, coarse_h * factor)).convert('L'))
+    coarse_rows = np.flatnonzero(coarse.min(axis=1) < threshold)
+    if len(coarse_rows) == 0:
+        # 샘플에 컨텐츠가 없으면 (빈 페이지, 얇은 선뿐) 전체 스캔
+        return _content_bounds_full(img, threshold)
+    coarse_cols = np.flatnonzero(coarse.min(axis=0) < threshold)
+
+    # 위/아래: 확실한 컨텐츠 블록까지의 가로 띠만 원본 해상도로 확인
+    top_end = min(height, (coarse_rows[0] + 1) * factor)
+    top = _content_lines(img.crop((0, 0, width, top_end)), threshold)[0][0]
+    bottom_start = coarse_rows[-1] * factor
+    bottom = bottom_start + _content_lines(img.crop((0, bottom_start, width, height)), threshold)[0][-1]
+
+    # 왼쪽/오른쪽: 컨텐츠 행 범위(top ~ bottom) 안의 세로 띠만 확인
+    left_end = min(width, (coarse_cols[0] + 1) * factor)
+    left = _content_lines(img.crop((0, top, left_end, bottom + 1)), threshold)[1][0]
+    right_start = coarse_cols[-1] * factor
+    right = right_start + _content_lines(img.crop((right_start, top, width, bottom + 1)), threshold)[1][-1]
+    return left, top, right, bottom
+
+def detect_content_bounds(img, threshold=240, factor=CONTENT_SCAN_FACTOR):
+    """
+    컨텐츠(회색조 threshold 미만 픽셀)를 감싸는 크롭 박스 (CONTENT_PADDING px 여백 포함)
+
+    반환값: (left, top, right, bottom), 컨텐츠가 없으면 이미지 전체
+    """
+    if img.mode in ('RGB', 'L') and min(img.size) >= factor * 2:
+        bounds = _content_bounds_coarse(img, threshold, factor)
+    else:
+        bounds = _content_bounds_full(img, threshold)
+
+    if bounds is None:
         return (0, 0, img.width, img.height)
-    
-    top = rows_with_content[0]
-    bottom = rows_with_content[-1]
-    left = cols_with_content[0]
-    right = cols_with_content[-1]
-    
-    padding = 30
-    top = max(0, top - padding)
-    left = max(0, left - padding)
-    bottom = min(img.height, bottom + padding)
-    right = min(img.width, right + padding)
-    
+    left, top, right, bottom = (int(v) for v in bounds)
+
+    top = max(0, top - CONTENT_PADDING)
+    left = max(0, left - CONTENT_PADDING)
+    bottom = min(img.height, bottom + CONTENT_PADDING)
+    right = min(img.width, right + CONTENT_PADDING)
+
     return (left, top, right, bottom)
 
 def calculate_optimal_dpi(target_width=1200):
@@ -127,8 +175,270 @@ def calculate_optimal_dpi(target_width=1200):
     optimal_dpi = int(optimal_dpi * 1.1)
     return optimal_dpi
 
-def process_pdf_optimized(pdf_path, logo_path, output_dir='output_optimized', 
-                         merge_pages=False, target_width=1200, output_format='webp', selected_pages=None):
+def page_dpi(page_num, optimal_dpi, target_width, page_widths=None):
+    """워터마크/로고 크기 계산에 쓸 페이지의 실제 렌더링 DPI"""
+    if page_widths is None:
+        return optimal_dpi
+    return target_width * 72 / page_widths[page_num]
+
+def plan_batches(max_pages, selected_pages=None, batch_size=BATCH_SIZE):
+    """
+    래스터화 계획: [(배치 번호, 연속된 페이지 목록), ...]
+
+    선택한 페이지 중 이어지는 페이지를 한 구간으로 묶고, 구간을 batch_size장씩 나눔
+    → 선택한 페이지만 정확히 한 번씩 렌더링 (선택하지 않은 페이지는 래스터화하지 않음)
+    예: [3, 4, 5, 6, 9], batch_size=3 → [(1, [3, 4, 5]), (2, [6]), (3, [9])]
+    """
+    if selected_pages is None:
+        pages = list(range(1, max_pages + 1))
+    else:
+        pages = sorted({p for p in selected_pages if 1 <= p <= max_pages})
+
+    # 연속 구간으로 묶기
+    runs = []
+    for page in pages:
+        if runs and page == runs[-1][-1] + 1:
+            runs[-1].append(page)
+        else:
+            runs.append([page])
+
+    batches = []
+    for run in runs:
+        for i in range(0, len(run), batch_size):
+            batches.append((len(batches) + 1, run[i:i + batch_size]))
+    return batches
+
+def report_progress(progress, event_type, **data):
+    """
+    진행 상황 콜백 호출 (progress=None이면 무시)
+
+    이벤트 예: {"type": "page", "page": 5, "done": 2, "total": 10}
+    """
+    if progress is None:
+        return
+    try:
+        progress({"type": event_type, **data})
+    except Exception as e:
+        print(f"⚠️ 진행 상황 전달 실패: {e}")
+
+def resolve_logo(logo_path):
+    """사용할 로고 경로 결정 (로고를 쓰지 않으면 None)"""
+    if logo_path is not None and logo_path.lower() == "none":
+        print(f"   ✅ 로고 없이 워터마크만 제거")
+        return None
+    if logo_path and os.path.exists(logo_path):
+        print(f"   ✅ 로고 사용: {os.path.basename(logo_path)}")
+        return logo_path
+    print(f"   ✅ 워터마크만 제거 (로고 비활성화)")
+    return None
+
+def clean_page(img, optimal_dpi, target_width, logo_path=None):
+    """
+    래스터화된 페이지 한 장 정리: 워터마크 감지 → 제거 (있을 때만) → 로고 삽입 → 컨텐츠 크롭 → 리사이즈
+    """
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+
+    width, height = img.size
+
+    # 워터마크 영역 계산
+    watermark_width = int(450 * (optimal_dpi / 300))
+    watermark_height = int(130 * (optimal_dpi / 300))
+
+    watermark_x1 = width - watermark_width
+    watermark_y1 = height - watermark_height
+    watermark_x2 = width
+    watermark_y2 = height
+
+    # 워터마크가 있을 때만 배경색 샘플링 및 제거 (워터마크 주변 ROI만 처리 후 붙여넣기)
+    with stage("watermark_detect"):
+        watermark = detect_watermark(img, (watermark_x1, watermark_y1, watermark_x2, watermark_y2))
+    if watermark["found"]:
+        with stage("watermark_fill"):
+            background_color = clean_watermark_roi(
+                img, watermark_x1, watermark_y1, watermark_x2, watermark_y2, smooth=False
+            )
+    elif logo_path:
+        background_color = clean_watermark_roi(
+            img, watermark_x1, watermark_y1, watermark_x2, watermark_y2, fill=False
+        )
+
+    # 로고 삽입 (레지스트리에서 한 번만 디코딩, 배경색별 변환 결과는 캐시)
+    if logo_path:
+        logo_size = int(90 * (optimal_dpi / 300))
+
+        logo_resized = get_registry().get_logo(logo_path, background_color, logo_size)
+
+        logo_x = width - logo_size - int(30 * (optimal_dpi / 300))
+        logo_y = height - logo_size - int(25 * (optimal_dpi / 300))
+
+        img.paste(logo_resized, (logo_x, logo_y), logo_resized)
+
+    # 컨텐츠 영역 감지 및 크롭
+    with stage("crop"):
+        bounds = detect_content_bounds(img)
+        crop_left, crop_top, crop_right, crop_bottom = bounds
+
+        if logo_path:
+            logo_left = logo_x
+            logo_right = logo_x + logo_size
+            crop_left = min(crop_left, logo_left)
+            crop_right = max(crop_right, logo_right)
+
+        img = img.crop((crop_left, crop_top, crop_right, crop_bottom))
+
+    # 리사이즈 (가로폭 1200 등)
+    current_width = img.width
+    if current_width > target_width:
+         resize_ratio = target_width / current_width
+         new_height = int(img.height * resize_ratio)
+         with stage("resize"):
+             img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
+
+    return img
+
+def render_and_clean_pages(raster, pages, optimal_dpi, target_width, logo_path, on_page, page_widths=None):
+    """
+    연속 구간 페이지를 래스터화·정리 (순차/병렬 모드 공통 작업 단위)
+
+    raster: 문서를 연 래스터화 백엔드 (rasterizer.open_rasterizer)
+    pages: 처리할 페이지 번호 목록 (1-based, 오름차순)
+    on_page(page_num, img): 정리된 페이지를 받을 콜백
+    page_widths: 페이지별 너비(pt), 있으면 width 모드 (페이지마다 target_width 픽셀로 렌더링)
+
+    반환값: 래스터화한 페이지 수 (first ~ last 구간 전체)
+    """
+    first_page, last_page = pages[0], pages[-1]
+    wanted = set(pages)
+
+    # 해당 구간만 이미지로 변환
+    with stage("rasterize", pages=last_page - first_page + 1, backend=raster.name):
+        batch_images = raster.render(first_page, last_page, dpi=optimal_dpi,
+                                     width=target_width if page_widths else None)
+
+    for idx_in_batch in range(len(batch_images)):
+        page_num = first_page + idx_in_batch
+        img = batch_images[idx_in_batch]
+        batch_images[idx_in_batch] = None # 원본 래스터 즉시 해제
+
+        # 개별 페이지 필터링
+        if page_num not in wanted:
+            continue
+
+        dpi = page_dpi(page_num, optimal_dpi, target_width, page_widths)
+        img = clean_page(img, dpi, target_width, logo_path)
+        on_page(page_num, img)
+
+        # 메모리 해제
+        img = None
+
+    return last_page - first_page + 1
+
+def render_pages_to_files(pdf_path, pages, optimal_dpi, target_width, logo_path, temp_dir, job_id=None,
+                          page_widths=None, rasterizer='auto'):
+    """
+    병렬 워커 작업: 페이지를 정리해서 무압축 .npy로 저장 (워커마다 문서를 따로 엶)
+
+    반환값: ([(페이지 번호, .npy 경로, (너비, 높이)), ...], 단계 측정 샘플 목록)
+    (샘플은 부모 프로세스가 telemetry.record_samples()로 자기 작업에 합침)
+    """
+    results = []
+
+    def on_page(page_num, img):
+        path, size = write_page_file(temp_dir, page_num, img)
+        results.append((page_num, path, size))
+
+    with telemetry.job(job_id, track_peak=True, capture_output=bool(job_id)) as samples:
+        with open_rasterizer(pdf_path, rasterizer) as raster:
+            render_and_clean_pages(raster, pages, optimal_dpi, target_width, logo_path, on_page, page_widths)
+    return results, samples
+
+def page_pool_context():
+    """
+    병렬 모드 페이지 워커의 multiprocessing 컨텍스트
+
+    forkserver: 이 모듈을 미리 import한 서버 프로세스에서 워커를 fork
+    → 작업마다 numpy/PIL/pdfium을 새로 import하지 않음 (처음 한 번만 약 0.6초, 이후 워커 시작은 수십 ms,
+      대신 병렬 작업을 한 프로세스마다 대기 중인 forkserver 하나, 약 33MB)
+    forkserver가 없는 플랫폼(Windows)은 spawn
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    ctx = multiprocessing.get_context("forkserver")
+    ctx.set_forkserver_preload(["pdf_smart"])
+    return ctx
+
+def process_batches_parallel(pdf_path, batches, optimal_dpi, target_width, logo_path, store,
+                             workers, max_pages_in_flight, progress, total_to_process, page_widths=None,
+                             rasterizer='auto'):
+    """
+    배치를 여러 워커 프로세스에 나눠 래스터화·정리 (병렬 모드)
+
+    - 워커 하나는 한 번에 배치 하나(최대 BATCH_SIZE장)만 메모리에 올림
+    - 동시 처리 페이지 수가 max_pages_in_flight를 넘지 않도록 워커 수를 제한
+    - 결과는 store에 .npy 파일로 등록, 실패하면 완료된 페이지까지만 등록 (나머지는 순차 모드, WARNING 로그)
+    - workers: 서버에서는 워커 풀 크기 / 동시 PDF 작업 수로 제한된 값 (server.py PDF_PAGE_WORKERS)
+
+    반환값: 완료된 배치에서 래스터화한 페이지 수
+    """
+    from concurrent.futures import ProcessPoolExecutor, as_completed
+
+    if not max_pages_in_flight:
+        max_pages_in_flight = workers * BATCH_SIZE
+    max_concurrent = max(1, max_pages_in_flight // BATCH_SIZE)
+    pool_size = max(1, min(workers, max_concurrent, len(batches)))
+
+    print(f"   ⚡ 병렬 모드: 워커 {pool_size}개, 동시 처리 최대 {pool_size * BATCH_SIZE}페이지")
+    rendered = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=pool_size, mp_context=page_pool_context()) as executor:
+            futures = {
+                executor.submit(render_pages_to_files, pdf_path, pages_in_batch, optimal_dpi,
+                                target_width, logo_path, store.temp_dir,
+                                telemetry.current_job_id(),
+                                page_widths and {p: page_widths[p] for p in pages_in_batch},
+                                rasterizer): (batch_num, pages_in_batch)
+                for batch_num, pages_in_batch in batches
+            }
+            for future in as_completed(futures):
+                batch_num, pages_in_batch = futures[future]
+                report_progress(progress, "batch", batch=batch_num,
+                                first_page=pages_in_batch[0], last_page=pages_in_batch[-1])
+                pages_done, samples = future.result()
+                telemetry.record_samples(samples)
+                rendered += pages_in_batch[-1] - pages_in_batch[0] + 1
+                for page_num, path, size in pages_done:
+                    store.add_file(page_num, path, size)
+                    report_progress(progress, "page", page=page_num,
+                                    done=len(store), total=total_to_process)
+                print(f"   ✅ 배치 {batch_num} 완료 ({len(store)}/{total_to_process})")
+    except Exception as e:
+        print(f"⚠️ 병렬 처리 실패, 순차 모드로 계속: {e}")
+        telemetry.log("parallel_pages_failed", level=logging.WARNING, error=str(e),
+                      workers=pool_size, pages_done=len(store), total=total_to_process)
+    return rendered
+
+def process_pdf_optimized(pdf_path, logo_path, output_dir='output_optimized',
+                         merge_pages=False, target_width=1200, output_format='webp', selected_pages=None,
+                         progress=None, workers=1, max_pages_in_flight=None,
+                         page_memory_budget=DEFAULT_MEMORY_BUDGET,
+                         encode_profile=None, latency_budget_ms=None, render_mode='width', rasterizer='auto'):
+    """
+    render_mode: 'width' (페이지마다 target_width 픽셀 폭으로 바로 렌더링) / 'dpi' (첫 페이지 기준 DPI 하나, 기존 방식)
+    rasterizer: 'auto' / 'pdfium' (pypdfium2, 같은 프로세스) / 'pdf2image' (poppler 외부 프로세스)
+    workers: 1이면 순차 모드 (BATCH_SIZE장씩, 저메모리), 2 이상이면 병렬 모드
+    max_pages_in_flight: 병렬 모드에서 동시에 메모리에 올리는 최대 페이지 수 (기본: workers * BATCH_SIZE)
+    page_memory_budget: 처리된 페이지를 메모리에 보관할 바이트 예산 (초과분은 무압축 .npy)
+    encode_profile: 'fast' / 'balanced' / 'smallest' / 'auto' (None이면 기존 인코더 설정)
+    latency_budget_ms: auto 모드에서 인코딩에 쓸 수 있는 시간 (전체 출력 픽셀 수로 프로필 선택)
+
+    반환값: {"files", "pages", "rendered_pages", "total_pages"}
+    - files: 저장한 출력 파일 경로 목록
+    - pages: 처리한(선택된) 페이지 수
+    - rendered_pages: 실제로 래스터화한 페이지 수 (선택된 페이지만 렌더링하므로 보통 pages와 같음)
+    - total_pages: PDF 전체 페이지 수
+    """
     print("=== 최적화된 PDF → PNG 변환 ===")
     print(f"목표 너비: {target_width}px")
     
@@ -138,266 +448,179 @@ def process_pdf_optimized(pdf_path, logo_path, output_dir='output_optimized',
     
     os.makedirs(output_dir, exist_ok=True)
     
-    from pdf2image import pdfinfo_from_path
-    
-    # PDF 정보 가져오기 (페이지 수 및 크기)
-    info = pdfinfo_from_path(pdf_path)
-    max_pages = info["Pages"]
+    if render_mode not in RENDER_MODES:
+        raise ValueError(f"알 수 없는 렌더링 방식: {render_mode} (사용 가능: {', '.join(RENDER_MODES)})")
     
-    # PDF 크기 기반 최적 DPI 계산 (가이드 참조)
-    # 예: "595.28 x 841.89 pts" -> width_pt 파싱
+    # PDF 열기 (페이지 수 및 크기, pdfium 백엔드는 문서를 한 번만 열어 끝까지 사용)
+    raster = open_rasterizer(pdf_path, rasterizer)
     try:
-        # pdf2image의 info는 딕셔너리지만 Page size는 문자열일 수 있음.
-        # size key가 없으면 기본값 사용
-        # 보통 'Page size' 키에 '612 x 792 pts' 형식으로 들어옴
-        page_size_str = info.get("Page size", "595 x 842 pts") 
-        width_pt = float(page_size_str.split('x')[0].strip())
+        max_pages = raster.page_count
+    
+        # PDF 크기 기반 최적 DPI 계산 (가이드 참조)
+        # 예: "595.28 x 841.89 pts" -> width_pt 파싱
+        try:
+            width_pt = raster.page_width(1)
         
-        # 가이드 공식: dpi = int((1200 / (pdf_width / 72)) * 72)
-        # width_inch = width_pt / 72
-        # dpi = 1200 / width_inch
-        optimal_dpi = int(target_width / (width_pt / 72))
+            # 가이드 공식: dpi = int((1200 / (pdf_width / 72)) * 72)
+            # width_inch = width_pt / 72
+            # dpi = 1200 / width_inch
+            optimal_dpi = int(target_width / (width_pt / 72))
         
-        # 너무 낮거나 높으면 조정 (최소 72, 최대 300)
-        optimal_dpi = max(72, min(300, optimal_dpi))
-        print(f"1. PDF 분석 완료: 총 {max_pages} 페이지, 너비 {width_pt}pts -> DPI {optimal_dpi}")
-    except Exception as e:
-        print(f"⚠️ DPI 계산 실패, 기본값 사용: {e}")
-        optimal_dpi = 150 # 안전한 기본값
+            # 너무 낮거나 높으면 조정 (최소 72, 최대 300)
+            optimal_dpi = max(72, min(300, optimal_dpi))
+            print(f"1. PDF 분석 완료: 총 {max_pages} 페이지, 너비 {width_pt}pts -> DPI {optimal_dpi}")
+        except Exception as e:
+            print(f"⚠️ DPI 계산 실패, 기본값 사용: {e}")
+            optimal_dpi = 150 # 안전한 기본값
 
-    # 배치 크기 설정 (메모리 절약을 위해 3장으로 더 보수적으로 잡음)
-    BATCH_SIZE = 3
-    images = []
-    
-    print(f"2. PDF 변환 및 처리 시작 (배치 크기: {BATCH_SIZE}페이지)...")
-    
-    # 배치 단위로 처리
-    info = None # 메모리 해제
+        # width 모드: 페이지별 너비를 읽어 페이지마다 target_width 픽셀로 렌더링 (버릴 픽셀을 만들지 않음)
+        page_widths = None
+        if render_mode == 'width':
+            page_widths = raster.page_widths()
+            print(f"   렌더링: 페이지마다 {target_width}px 폭 (페이지 크기 {len(set(page_widths.values()))}종)")
+        print(f"   래스터화 백엔드: {raster.name}")
 
+        # 저장할 포맷 ('all' = webp + jpeg + png)
+        formats = normalize_formats(output_format)
+
+        # 처리할 배치 목록: (배치 번호, 연속된 선택 페이지들)
+        batches = plan_batches(max_pages, selected_pages)
+        total_to_process = sum(len(pages) for _, pages in batches) # 진행률 계산용
+        report_progress(progress, "start", total_pages=max_pages, total=total_to_process, dpi=optimal_dpi,
+                        render_mode=render_mode, rasterizer=raster.name, batches=len(batches))
+
+        print(f"2. PDF 변환 및 처리 시작 (배치 크기: {BATCH_SIZE}페이지)...")
+        if selected_pages is not None:
+            print(f"   선택 페이지 {total_to_process}/{max_pages}장 → 연속 구간 기준 {len(batches)}개 배치")
     
-    # 로고 사용 여부 결정 (기본값: 비활성화)
-    use_logo = False
-    if logo_path is not None and logo_path.lower() == "none":
-        use_logo = False
-        print(f"   ✅ 로고 없이 워터마크만 제거")
-    elif logo_path and logo_path.lower() != "none" and os.path.exists(logo_path):
-        logo = Image.open(logo_path)
-        if logo.mode != 'RGBA':
-            logo = logo.convert('RGBA')
-        use_logo = True
-        print(f"   ✅ 로고 사용: {os.path.basename(logo_path)}")
-    else:
-        use_logo = False
-        print(f"   ✅ 워터마크만 제거 (로고 비활성화)")
-    
-    # 배치 처리 루프
-    processed_file_paths = [] # RAM에 이미지를 보관하지 않고, 저장된 파일 경로만 보관
+        # 로고 사용 여부 결정 (기본값: 비활성화)
+        logo_path = resolve_logo(logo_path)
     
-    # 임시 저장 경로
-    temp_dir = os.path.join(output_dir, "temp_pages")
-    os.makedirs(temp_dir, exist_ok=True)
+        # 임시 저장 경로
+        temp_dir = os.path.join(output_dir, "temp_pages")
+        os.makedirs(temp_dir, exist_ok=True)
 
-    # 0부터 max_pages까지 BATCH_SIZE 간격으로 반복
-    print(f"   메모리 보호 모드: {BATCH_SIZE}장씩 끊어서 처리 후 디스크에 임시 저장")
+        # 처리된 페이지 저장소 (최근 페이지는 메모리, 예산 초과분은 무압축 .npy)
+        store = PageStore(temp_dir, page_memory_budget)
+        rendered_pages = 0
+        if workers > 1 and len(batches) > 1:
+            rendered_pages += process_batches_parallel(
+                pdf_path, batches, optimal_dpi, target_width, logo_path, store,
+                workers, max_pages_in_flight, progress, total_to_process, page_widths, raster.name,
+            )
     
-    for i in range(0, max_pages, BATCH_SIZE):
-        first_page = i + 1
-        last_page = min(i + BATCH_SIZE, max_pages)
-        
-        # 선택된 페이지 필터링: 이 배치에 처리할 페이지가 없으면 스킵
-        if selected_pages is not None:
-            pages_in_batch = [p for p in range(first_page, last_page + 1) if p in selected_pages]
-            if not pages_in_batch:
-                print(f"   ⏭️ 배치 스킵: {first_page} ~ {last_page} (선택된 페이지 없음)")
-                continue
+        # 순차 모드 (저메모리 기본값, 병렬 모드 실패 시 남은 배치도 여기서 처리)
+        remaining = [(n, pages) for n, pages in batches if not all(p in store for p in pages)]
+        if remaining:
+            print(f"   메모리 보호 모드: {BATCH_SIZE}장씩 끊어서 처리")
 
-        print(f"\n   🔄 배치 처리: {first_page} ~ {last_page} (총 {max_pages})")
-        
-        # 해당 구간만 이미지로 변환
-        batch_images = convert_from_path(pdf_path, dpi=optimal_dpi, first_page=first_page, last_page=last_page)
-        
-        for idx_in_batch, img in enumerate(batch_images):
-            # 전체 페이지 인덱스 (1-based)
-            page_num_real = i + idx_in_batch + 1
-            
-            # 개별 페이지 필터링
-            if selected_pages is not None and page_num_real not in selected_pages:
-                 continue
-            
-            page_idx = page_num_real - 1 # 0-based index for logic if needed (but we use page_num_real for naming)
-            
-            if img.mode != 'RGB':
-                img = img.convert('RGB')
-            
-            width, height = img.size
-            
-            # 워터마크 영역 계산
-            watermark_width = int(450 * (optimal_dpi / 300))
-            watermark_height = int(130 * (optimal_dpi / 300))
-            
-            watermark_x1 = width - watermark_width
-            watermark_y1 = height - watermark_height
-            watermark_x2 = width
-            watermark_y2 = height
-            
-            # 배경색 샘플링 및 워터마크 제거
-            background_color = get_improved_background_color(
-                img, watermark_x1, watermark_y1, watermark_x2, watermark_y2
-            )
-            
-            img_array = np.array(img)
-            img_array = apply_gradient_blend(
-                img_array, watermark_x1, watermark_y1, watermark_x2, watermark_y2, background_color
-            )
-            img = Image.fromarray(img_array)
-            
-            # 로고 삽입
-            if use_logo:
-                logo_size = int(90 * (optimal_dpi / 300))
-                
-                logo_array = np.array(logo)
-                new_logo = np.zeros_like(logo_array)
-                for r_idx in range(logo_array.shape[0]):
-                    for c_idx in range(logo_array.shape[1]):
-                        r, g, b, a = logo_array[r_idx, c_idx]
-                        if a < 10:
-                            new_logo[r_idx, c_idx] = [background_color[0], background_color[1], background_color[2], 0]
-                        elif r > 200 and g > 200 and b > 200:
-                            new_logo[r_idx, c_idx] = [background_color[0], background_color[1], background_color[2], 255]
-                        else:
-                            new_logo[r_idx, c_idx] = [r, g, b, a]
-                
-                logo_converted = Image.fromarray(new_logo.astype('uint8'), 'RGBA')
-                logo_resized = logo_converted.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
-                
-                logo_x = width - logo_size - int(30 * (optimal_dpi / 300))
-                logo_y = height - logo_size - int(25 * (optimal_dpi / 300))
-                
-                img_rgba = img.convert('RGBA')
-                img_rgba.paste(logo_resized, (logo_x, logo_y), logo_resized)
-                img = img_rgba.convert('RGB')
+        def on_page(page_num, img):
+            store.put(page_num, img)
+            report_progress(progress, "page", page=page_num,
+                            done=len(store), total=total_to_process)
 
-            # 컨텐츠 영역 감지 및 크롭
-            bounds = detect_content_bounds(img)
-            crop_left, crop_top, crop_right, crop_bottom = bounds
-            
-            if use_logo:
-                logo_left = logo_x
-                logo_right = logo_x + logo_size
-                crop_left = min(crop_left, logo_left)
-                crop_right = max(crop_right, logo_right)
-            
-            img = img.crop((crop_left, crop_top, crop_right, crop_bottom))
-
-            # 리사이즈 (가로폭 1200 등)
-            current_width = img.width
-            if current_width > target_width:
-                 resize_ratio = target_width / current_width
-                 new_height = int(img.height * resize_ratio)
-                 img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-            
-            # 임시 파일로 저장 (개별 페이지.png)
-            # 나중에 합치기 쉽도록 PNG로 저장 (손실 없음)
-            temp_path = os.path.join(temp_dir, f"temp_{page_idx:04d}.png")
-            img.save(temp_path, 'PNG')
-            processed_file_paths.append(temp_path)
-            
-            # 메모리 해제
-            img = None
-            
-        print(f"   ✅ 배치 {i//BATCH_SIZE + 1} 완료")
-        batch_images = None # 배치 메모리 해제
-        
-    print(f"   총 {len(processed_file_paths)}개 페이지 임시 저장 완료")
+        for batch_num, pages_in_batch in remaining:
+            print(f"\n   🔄 배치 처리: {pages_in_batch[0]} ~ {pages_in_batch[-1]} (총 {max_pages})")
+            report_progress(progress, "batch", batch=batch_num,
+                            first_page=pages_in_batch[0], last_page=pages_in_batch[-1])
+            rendered_pages += render_and_clean_pages(raster, pages_in_batch, optimal_dpi, target_width,
+                                                     logo_path, on_page, page_widths)
+            print(f"   ✅ 배치 {batch_num} 완료")
+    finally:
+        raster.close() # 문서 핸들 해제 (예외가 나도, 이후 단계는 페이지 저장소만 사용)
+
+    # 페이지 순서대로 재조립
+    page_sources = store.sources()
+    print(f"   총 {len(page_sources)}개 페이지 처리 완료 (래스터화 {rendered_pages}페이지, 디스크로 내린 페이지 {store.spilled}개)")
     
     saved_files = []
 
+    # 인코딩 프로필 (auto면 전체 출력 픽셀 수로 결정)
+    sizes = store.sizes()
+    total_pixels = sum(w * h for w, h in sizes)
+    profile = resolve_profile(encode_profile, total_pixels, formats, latency_budget_ms)
+    if profile:
+        print(f"   인코딩 프로필: {profile}" + (" (auto)" if encode_profile == 'auto' else ""))
+
     # 4. 결과물 생성 (합치기 또는 재이동)
     if merge_pages:
-        print(f"\n4. 디스크에서 가져와 한 장으로 병합 중...")
-        
-        # 전체 높이 계산 및 이미지 로드
-        total_height = 0
-        unified_width = target_width # 이미 리사이즈 됨
+        print(f"\n4. 한 장으로 병합 중...")
+        report_progress(progress, "merge", pages=len(page_sources))
         
-        # 높이만 먼저 계산하고 싶지만 open 해야 함.
-        # Lazy loading으로 메타데이터만 읽음
-        for p in processed_file_paths:
-            with Image.open(p) as img:
-                total_height += img.height
-                # 폭 검증 (혹시 다르면?) - 생략, 위에서 다 맞춤
+        # 크기는 저장소에 기록된 값 사용 (픽셀 읽기 없음), 폭은 target_width로 통일
+        total_height = sum(h for _, h in sizes)
+        print(f"   최종 캔버스 크기: {target_width} x {total_height}px")
         
-        print(f"   최종 캔버스 크기: {unified_width} x {total_height}px")
-        
-        # 캔버스 생성 (여기서 메모리 Peak 발생 가능하지만 1장이면 충분)
+        # 스트리밍 병합: 페이지를 한 장씩 읽어 띠 단위로 인코딩 (전체 캔버스를 만들지 않음)
+        # 요청한 포맷이 여러 개면 같은 페이지 버퍼를 읽어 포맷별로 동시에 인코딩
+        merge_kwargs = {
+            'webp': encoder_options(profile, 'webp', {'quality': 85, 'method': 6}),
+            'jpeg': encoder_options(profile, 'jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+            'png': encoder_options(profile, 'png', {}),
+        }
         try:
-            merged_image = Image.new('RGB', (unified_width, total_height), (255, 255, 255))
-            
-            y_offset = 0
-            for p in processed_file_paths:
-                with Image.open(p) as img:
-                    merged_image.paste(img, (0, y_offset))
-                    y_offset += img.height
-            
-            # 저장
-            if output_format in ['webp', 'all']:
-                webp_path = os.path.join(output_dir, 'merged_optimized.webp')
-                merged_image.save(webp_path, 'WebP', quality=85, method=6)
-                saved_files.append(webp_path)
-            
-            if output_format in ['jpeg', 'all']:
-                jpeg_path = os.path.join(output_dir, 'merged_optimized.jpg')
-                merged_image.save(jpeg_path, 'JPEG', quality=85, optimize=True, progressive=True)
-                saved_files.append(jpeg_path)
-            
-            if output_format in ['png', 'all']:
-                png_path = os.path.join(output_dir, 'merged_optimized.png')
-                merged_image.save(png_path, 'PNG')
-                # 10MB 체크 로직 (생략 - 필요시 추가)
-                saved_files.append(png_path)
+            calls = [
+                (merge_vertical,
+                 (page_sources, os.path.join(output_dir, f"merged_optimized{FORMATS[fmt][0]}"), fmt),
+                 dict(width=target_width, sizes=sizes, max_bytes=NAVER_BLOG_MAX_BYTES, **merge_kwargs[fmt]))
+                for fmt in formats
+            ]
+            with stage("merge", format="+".join(formats), pages=len(page_sources)):
+                merged = run_concurrently(calls)
+            for paths in merged:
+                saved_files += paths
                 
             print(f"   ✅ 병합 완료: {len(saved_files)}개 파일 생성")
             
-        except MemoryError:
-            print("❌ 병합 중 메모리 부족! (이미지가 너무 큽니다)")
-            # 이 경우 어쩔 수 없이 개별 파일로 돌려줘야 함
+        except (MemoryError, OSError) as e:
+            # 병합 실패 시 만들다 만 파일을 지우고 개별 파일로 대신 반환
+            print(f"❌ 병합 실패, 개별 파일로 저장합니다: {e}")
+            for name in os.listdir(output_dir):
+                if name.startswith('merged_optimized'):
+                    try:
+                        os.remove(os.path.join(output_dir, name))
+                    except OSError:
+                        pass
+            saved_files = []
             merge_pages = False
-            # Fallthrough to else block? No, complex. Just fail gracefully logic needed but let's assume 2GB is enough.
         
     
     if not merge_pages:
         print(f"\n4. 개별 파일로 정리 중...")
-        # 임시 파일을 최종 경로로 이동/변환
-        for idx, temp_path in enumerate(processed_file_paths):
+        # 저장소의 페이지를 요청한 포맷으로 동시에 인코딩
+        page_kwargs = {
+            'webp': encoder_options(profile, 'webp', {'quality': 85}),
+            'jpeg': encoder_options(profile, 'jpeg', {'quality': 85}),
+            'png': encoder_options(profile, 'png', {}),
+        }
+        for idx, page_no in enumerate(store.page_numbers()):
             page_num = idx + 1
-            with Image.open(temp_path) as img:
-                if output_format in ['webp', 'all']:
-                    out_path = os.path.join(output_dir, f"page_{page_num:02d}.webp")
-                    img.save(out_path, 'WebP', quality=85)
-                    saved_files.append(out_path)
-                
-                if output_format in ['jpeg', 'all']:
-                    out_path = os.path.join(output_dir, f"page_{page_num:02d}.jpg")
-                    img.save(out_path, 'JPEG', quality=85)
-                    saved_files.append(out_path)
-                    
-                if output_format in ['png', 'all']:
-                    out_path = os.path.join(output_dir, f"page_{page_num:02d}.png")
-                    img.save(out_path, 'PNG') 
-                    saved_files.append(out_path)
+            with Image.fromarray(np.asarray(store.get(page_no))) as img:
+                targets = [
+                    (os.path.join(output_dir, f"page_{page_num:02d}{FORMATS[fmt][0]}"), fmt, page_kwargs[fmt])
+                    for fmt in formats
+                ]
+                with stage("encode", format="+".join(formats)):
+                    saved_files += [result["path"] for result in emit_formats(img, targets)]
     
     # 임시 파일 삭제
+    store.clear()
+    page_sources = None
     try:
         import shutil
         shutil.rmtree(temp_dir)
     except:
         pass
+    
+    report_progress(progress, "complete", files=len(saved_files), pages=total_to_process,
+                    rendered_pages=rendered_pages)
         
-    return saved_files
+    return {"files": saved_files, "pages": total_to_process, "rendered_pages": rendered_pages,
+            "total_pages": max_pages}
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
-        print("Usage: python pdf_smart.py <pdf> <logo> [out_dir] [merge] [width] [format]")
+        print("Usage: python pdf_smart.py <pdf> <logo> [out_dir] [merge] [width] [format] [--pages 1,2] [--workers N] [--max-pages-in-flight N] [--profile fast|balanced|smallest|auto] [--render-mode width|dpi] [--rasterizer auto|pdfium|pdf2image]")
         sys.exit(1)
     
     pdf_path = sys.argv[1]
@@ -418,4 +641,23 @@ if __name__ == "__main__":
         except:
             pass
     
-    process_pdf_optimized(pdf_path, logo_path, output_dir, merge_pages, target_width, output_format, selected_pages)
+    # --workers N: 병렬 모드 (N개 프로세스), --max-pages-in-flight N: 동시 처리 페이지 상한
+    workers = 1
+    max_pages_in_flight = None
+    if "--workers" in sys.argv:
+        workers = int(sys.argv[sys.argv.index("--workers") + 1])
+    if "--max-pages-in-flight" in sys.argv:
+        max_pages_in_flight = int(sys.argv[sys.argv.index("--max-pages-in-flight") + 1])
+    
+    # --profile: 인코딩 속도 프로필
+    encode_profile = sys.argv[sys.argv.index("--profile") + 1] if "--profile" in sys.argv else None
+    
+    # --render-mode: width (페이지별 목표 너비, 기본) / dpi (첫 페이지 기준 DPI)
+    render_mode = sys.argv[sys.argv.index("--render-mode") + 1] if "--render-mode" in sys.argv else 'width'
+    
+    # --rasterizer: auto (pypdfium2가 있으면 pdfium) / pdfium / pdf2image
+    rasterizer = sys.argv[sys.argv.index("--rasterizer") + 1] if "--rasterizer" in sys.argv else 'auto'
+    
+    process_pdf_optimized(pdf_path, logo_path, output_dir, merge_pages, target_width, output_format, selected_pages,
+                          workers=workers, max_pages_in_flight=max_pages_in_flight, encode_profile=encode_profile,
+                          render_mode=render_mode, rasterizer=rasterizer)
@@ -0,0 +1,147 @@
+"""
+PDF 래스터화 백엔드
+
+- pdf2image: poppler의 pdfinfo / pdftoppm 외부 프로세스 (poppler-utils 필요)
+  구간마다 프로세스를 새로 띄워 문서를 다시 파싱하고, 픽셀은 임시 PPM 파일을 거쳐 읽음
+- pdfium: pypdfium2로 같은 프로세스 안에서 문서를 한 번만 열어 두고 페이지를 메모리 비트맵에 바로 렌더링
+  페이지 크기도 pdfinfo 호출 없이 문서 핸들에서 읽음
+- auto: pypdfium2가 설치되어 있으면 pdfium, 없으면 pdf2image
+
+공통 인터페이스 (Rasterizer, with 문으로 사용)
+- page_count: 전체 페이지 수
+- page_width(page_num) / page_widths(): 페이지 너비 (pt)
+- render(first_page, last_page, dpi=None, width=None): 연속 구간의 PIL 이미지 목록
+  (width를 주면 페이지마다 그 픽셀 폭으로, 아니면 dpi로 렌더링)
+"""
+import re
+
+BACKENDS = ('auto', 'pdfium', 'pdf2image')
+
+# 페이지 크기를 읽지 못했을 때 쓰는 너비 (A4, pt)
+DEFAULT_WIDTH_PT = 595.0
+
+def _parse_width(size_str):
+    """'595.28 x 841.89 pts' → 595.28"""
+    return float(size_str.split('x')[0].strip())
+
+class Rasterizer:
+    """래스터화 백엔드 공통 부분 (하위 클래스가 page_count / page_width / render 구현)"""
+
+    name = None
+
+    def __init__(self, pdf_path):
+        self.pdf_path = pdf_path
+
+    def page_widths(self):
+        """{페이지 번호: 너비(pt)}"""
+        return {page: self.page_width(page) for page in range(1, self.page_count + 1)}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Pdf2ImageRasterizer(Rasterizer):
+    """pdfinfo / pdftoppm 외부 프로세스 (기존 방식)"""
+
+    name = 'pdf2image'
+
+    def __init__(self, pdf_path):
+        from pdf2image import pdfinfo_from_path
+
+        super().__init__(pdf_path)
+        self._info = pdfinfo_from_path(pdf_path)
+        self.page_count = self._info["Pages"]
+        self._widths = None
+
+    def page_width(self, page_num):
+        if page_num == 1 and self._widths is None:
+            # 보통 'Page size' 키에 '612 x 792 pts' 형식으로 들어옴 (첫 페이지)
+            return _parse_width(self._info.get("Page size", f"{DEFAULT_WIDTH_PT} x 0 pts"))
+        return self.page_widths()[page_num]
+
+    def page_widths(self):
+        """
+        pdfinfo -f 1 -l N 은 "Page    3 size: 1376 x 768 pts" 형식으로 페이지마다 한 줄씩 출력
+        (한 페이지 문서는 "Page size"). 읽지 못한 페이지는 첫 페이지 너비 사용.
+        """
+        if self._widths is None:
+            from pdf2image import pdfinfo_from_path
+
+            info = pdfinfo_from_path(self.pdf_path, first_page=1, last_page=self.page_count)
+            widths = {}
+            for key, value in info.items():
+                match = re.fullmatch(r"Page\s+(\d+)\s+size", key)
+                if match:
+                    widths[int(match.group(1))] = _parse_width(value)
+            first = widths.get(1) or _parse_width(info.get("Page size", f"{DEFAULT_WIDTH_PT} x 0 pts"))
+            self._widths = {page: widths.get(page, first) for page in range(1, self.page_count + 1)}
+        return self._widths
+
+    def render(self, first_page, last_page, dpi=None, width=None):
+        from pdf2image import convert_from_path
+
+        if width is not None:
+            # pdftoppm -scale-to-x: 페이지마다 정확히 width 픽셀
+            return convert_from_path(self.pdf_path, size=(width, None),
+                                     first_page=first_page, last_page=last_page)
+        return convert_from_path(self.pdf_path, dpi=dpi, first_page=first_page, last_page=last_page)
+
+class PdfiumRasterizer(Rasterizer):
+    """pypdfium2 (같은 프로세스, 문서 핸들 유지)"""
+
+    name = 'pdfium'
+
+    def __init__(self, pdf_path):
+        import pypdfium2
+
+        super().__init__(pdf_path)
+        self._doc = pypdfium2.PdfDocument(pdf_path)
+        self.page_count = len(self._doc)
+        self._widths = {}
+
+    def page_width(self, page_num):
+        width = self._widths.get(page_num)
+        if width is None:
+            width = self._widths[page_num] = self._doc.get_page_size(page_num - 1)[0]
+        return width
+
+    def render(self, first_page, last_page, dpi=None, width=None):
+        images = []
+        for page_num in range(first_page, min(last_page, self.page_count) + 1):
+            scale = width / self.page_width(page_num) if width is not None else dpi / 72
+            page = self._doc[page_num - 1]
+            try:
+                bitmap = page.render(scale=scale)
+                # 비트맵 버퍼를 참조하지 않도록 복사본으로 (RGB, pdftoppm 출력과 같은 모드)
+                images.append(bitmap.to_pil().convert('RGB'))
+                bitmap.close()
+            finally:
+                page.close()
+        return images
+
+    def close(self):
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
+def pdfium_available():
+    try:
+        import pypdfium2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def open_rasterizer(pdf_path, backend='auto'):
+    """backend 이름 → 문서를 연 Rasterizer"""
+    if backend not in BACKENDS:
+        raise ValueError(f"알 수 없는 래스터화 백엔드: {backend} (사용 가능: {', '.join(BACKENDS)})")
+    if backend == 'auto':
+        backend = 'pdfium' if pdfium_available() else 'pdf2image'
+    if backend == 'pdfium':
+        return PdfiumRasterizer(pdf_path)
+    return Pdf2ImageRasterizer(pdf_path)
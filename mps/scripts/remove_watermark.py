@@ -2,24 +2,18 @@ from PIL import Image, ImageDraw
 import numpy as np
 import sys
 import os
+from functools import lru_cache
+
+from logo_registry import get_registry
+from budget_encoder import encode_within_budget, write_bytes, NAVER_BLOG_MAX_BYTES
+from watermark_detect import detect_watermark
+from telemetry import stage
 
 Image.MAX_IMAGE_PIXELS = None
 
 def get_available_logos():
-    """사용 가능한 로고 목록 반환"""
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    logos_dir = os.path.join(os.path.dirname(script_dir), 'logos')
-    
-    if not os.path.exists(logos_dir):
-        return {}
-    
-    logos = {}
-    for filename in os.listdir(logos_dir):
-        if filename.lower().endswith(('.png', '.jpg', '.jpeg')):
-            name = os.path.splitext(filename)[0]
-            logos[name] = os.path.join(logos_dir, filename)
-    
-    return logos
+    """사용 가능한 로고 목록 반환 (레지스트리에 한 번만 로드됨)"""
+    return get_registry().names()
 
 def get_watermark_region(width, height):
     """
@@ -55,6 +49,16 @@ def get_watermark_region(width, height):
         'offset_bottom': offset_bottom
     }
 
+def find_watermark(img):
+    """
+    get_watermark_region 주변에서 워터마크 감지 (watermark_detect.detect_watermark)
+
+    반환값: {"found", "box", "score"} → found가 False면 제거를 건너뛰어도 됨
+    """
+    wm = get_watermark_region(img.width, img.height)
+    with stage("watermark_detect"):
+        return detect_watermark(img, (wm['x1'], wm['y1'], wm['x2'], wm['y2']))
+
 def get_local_background_color(img, wm_x1, wm_y1, wm_x2, wm_y2):
     """
     워터마크 주변 4방향에서 배경색 샘플링 (개선된 버전)
@@ -119,95 +123,128 @@ def get_local_background_color(img, wm_x1, wm_y1, wm_x2, wm_y2):
     
     return (240, 240, 240)
 
+@lru_cache(maxsize=32)
+def get_feather_ramp(feather_size, smooth=True):
+    """
+    페더링 알파 램프 (경계 → 안쪽으로 0에 가까운 값 → 1)
+
+    - smooth=True: smoothstep (t² · (3 - 2t))
+    - smooth=False: 선형 (t)
+    """
+    t = np.arange(1, feather_size + 1, dtype=np.float64) / feather_size
+    if smooth:
+        return t * t * (3 - 2 * t)
+    return t
+
+def feather_fill(arr, wm_x1, wm_y1, wm_x2, wm_y2, bg_color, smooth=True):
+    """
+    워터마크 영역을 배경색으로 채우고 4방향 경계를 페더링 (arr을 직접 수정)
+
+    - 각 경계를 (행 x feather x 3) 또는 (feather x 열 x 3) 배열 하나로 한 번에 블렌딩
+    - 경계 바깥 원본 픽셀(feather_size 만큼 떨어진 위치)과 배경색을 섞음
+    - 좌 → 상 → 우 → 하 순서로 적용 (모서리는 나중 경계가 덮어씀)
+    """
+    height, width = arr.shape[:2]
+
+    # 페더링 영역 크기 (경계를 부드럽게)
+    feather_size = min(10, (wm_x2 - wm_x1) // 4, (wm_y2 - wm_y1) // 4)
+
+    # 배경색으로 기본 채우기
+    arr[wm_y1:wm_y2, wm_x1:wm_x2] = bg_color
+
+    if feather_size <= 0:
+        return arr
+
+    f = feather_size
+    bg = np.asarray(bg_color, dtype=np.float64)
+    ramp = get_feather_ramp(f, smooth)
+
+    # 좌측 경계: 왼쪽 원본 픽셀과 블렌딩
+    if wm_x1 >= f:
+        alpha = ramp[np.newaxis, :, np.newaxis]
+        original = arr[wm_y1:wm_y2, wm_x1 - f:wm_x1].astype(np.float64)
+        arr[wm_y1:wm_y2, wm_x1:wm_x1 + f] = (original * (1 - alpha) + bg * alpha).astype(np.uint8)
+
+    # 상단 경계: 위쪽 원본 픽셀과 블렌딩
+    if wm_y1 >= f:
+        alpha = ramp[:, np.newaxis, np.newaxis]
+        original = arr[wm_y1 - f:wm_y1, wm_x1:wm_x2].astype(np.float64)
+        arr[wm_y1:wm_y1 + f, wm_x1:wm_x2] = (original * (1 - alpha) + bg * alpha).astype(np.uint8)
+
+    # 우측 경계 (워터마크가 이미지 끝이 아닌 경우): 오른쪽 원본 픽셀과 블렌딩
+    if wm_x2 < width - f:
+        alpha = (1 - ramp)[::-1][np.newaxis, :, np.newaxis]
+        original = arr[wm_y1:wm_y2, wm_x2:wm_x2 + f].astype(np.float64)
+        arr[wm_y1:wm_y2, wm_x2 - f:wm_x2] = (bg * alpha + original * (1 - alpha)).astype(np.uint8)
+
+    # 하단 경계 (워터마크가 이미지 끝이 아닌 경우): 아래쪽 원본 픽셀과 블렌딩
+    if wm_y2 < height - f:
+        alpha = (1 - ramp)[::-1][:, np.newaxis, np.newaxis]
+        original = arr[wm_y2:wm_y2 + f, wm_x1:wm_x2].astype(np.float64)
+        arr[wm_y2 - f:wm_y2, wm_x1:wm_x2] = (bg * alpha + original * (1 - alpha)).astype(np.uint8)
+
+    return arr
+
 def create_gradient_fill(img, wm_x1, wm_y1, wm_x2, wm_y2, bg_color):
     """
     워터마크 영역을 그라디언트로 부드럽게 채우기
     
     - 주변 픽셀과 자연스럽게 블렌딩
-    - 경계 부분에 페더링 적용
+    - 경계 부분에 페더링 적용 (smoothstep)
     - 더 자연스러운 결과
     """
     arr = np.array(img)
-    height, width = arr.shape[:2]
-    
-    # 워터마크 영역 크기
-    wm_width = wm_x2 - wm_x1
-    wm_height = wm_y2 - wm_y1
-    
-    # 페더링 영역 크기 (경계를 부드럽게)
-    feather_size = min(10, wm_width // 4, wm_height // 4)
-    
-    # 배경색으로 기본 채우기
-    arr[wm_y1:wm_y2, wm_x1:wm_x2] = bg_color
-    
-    # 좌측 경계 블렌딩
-    if wm_x1 >= feather_size:
-        for i in range(feather_size):
-            t = (i + 1) / feather_size
-            alpha = t * t * (3 - 2 * t) # Smoothstep blending
-            x = wm_x1 + i
-            # 왼쪽 원본 픽셀과 블렌딩
-            for y in range(wm_y1, wm_y2):
-                if x - feather_size >= 0:
-                    original = arr[y, x - feather_size].astype(float)
-                    blended = original * (1 - alpha) + np.array(bg_color) * alpha
-                    arr[y, x] = blended.astype(np.uint8)
-    
-    # 상단 경계 블렌딩
-    if wm_y1 >= feather_size:
-        for i in range(feather_size):
-            t = (i + 1) / feather_size
-            alpha = t * t * (3 - 2 * t)
-            y = wm_y1 + i
-            # 위쪽 원본 픽셀과 블렌딩
-            for x in range(wm_x1, wm_x2):
-                if y - feather_size >= 0:
-                    original = arr[y - feather_size, x].astype(float)
-                    blended = original * (1 - alpha) + np.array(bg_color) * alpha
-                    arr[y, x] = blended.astype(np.uint8)
-    
-    # 우측 경계 블렌딩 (워터마크가 이미지 끝이 아닌 경우)
-    if wm_x2 < width - feather_size:
-        for i in range(feather_size):
-            t = (i + 1) / feather_size
-            alpha = 1 - (t * t * (3 - 2 * t))
-            x = wm_x2 - 1 - i
-            # 오른쪽 원본 픽셀과 블렌딩
-            for y in range(wm_y1, wm_y2):
-                if x + feather_size < width:
-                    original = arr[y, x + feather_size].astype(float)
-                    blended = np.array(bg_color) * alpha + original * (1 - alpha)
-                    arr[y, x] = blended.astype(np.uint8)
-    
-    # 하단 경계 블렌딩 (워터마크가 이미지 끝이 아닌 경우)
-    if wm_y2 < height - feather_size:
-        for i in range(feather_size):
-            t = (i + 1) / feather_size
-            alpha = 1 - (t * t * (3 - 2 * t))
-            y = wm_y2 - 1 - i
-            # 아래쪽 원본 픽셀과 블렌딩
-            for x in range(wm_x1, wm_x2):
-                if y + feather_size < height:
-                    original = arr[y + feather_size, x].astype(float)
-                    blended = np.array(bg_color) * alpha + original * (1 - alpha)
-                    arr[y, x] = blended.astype(np.uint8)
-    
+    feather_fill(arr, wm_x1, wm_y1, wm_x2, wm_y2, bg_color)
     return Image.fromarray(arr)
 
-def remove_watermark(image_path, logo_path=None, output_path=None):
+# ROI 여백: 배경색 샘플링(40px) + 페더링 원본 참조(최대 10px)를 모두 포함
+ROI_MARGIN = 40
+
+def get_watermark_roi(width, height, wm_x1, wm_y1, wm_x2, wm_y2, margin=ROI_MARGIN):
+    """워터마크 박스 + 샘플링 여백 (이미지 경계로 잘림)"""
+    return (
+        max(0, wm_x1 - margin),
+        max(0, wm_y1 - margin),
+        min(width, wm_x2 + margin),
+        min(height, wm_y2 + margin),
+    )
+
+def clean_watermark_roi(img, wm_x1, wm_y1, wm_x2, wm_y2, smooth=True, fill=True):
     """
-    NotebookLM 워터마크 제거 + 로고 삽입 (선택)
-    
-    워터마크: 150 x 35px (최소)
-    로고: 40px (원래 크기)
-    
-    Parameters:
-    - image_path: 입력 이미지 경로
-    - logo_path: 로고 경로/이름 (None=기본, "none"=로고없음)
-    - output_path: 출력 경로 (None=자동생성)
+    워터마크 제거 (ROI 모드)
+
+    - 워터마크 박스 + 여백만 잘라낸 작은 버퍼에서 배경색 샘플링 + 페더링
+    - 결과 패치를 원래 위치에 붙여넣음 (img를 직접 수정)
+    - 메모리/복사 비용이 페이지 크기가 아닌 워터마크 크기에 비례
+    - 결과 픽셀은 전체 프레임 방식(get_local_background_color + create_gradient_fill)과 동일
+    - fill=False: 배경색만 샘플링하고 이미지는 그대로 (워터마크가 없는데 로고를 넣을 때)
+
+    Returns:
+    - 배경색 (r, g, b)
+    """
+    roi = get_watermark_roi(img.width, img.height, wm_x1, wm_y1, wm_x2, wm_y2)
+    rx, ry = roi[0], roi[1]
+
+    patch = np.array(img.crop(roi))
+    local_box = (wm_x1 - rx, wm_y1 - ry, wm_x2 - rx, wm_y2 - ry)
+
+    # 패치 경계 = 이미지 경계 또는 여백 바깥이므로 샘플링/페더링 조건이 전체 프레임과 같음
+    background_color = get_local_background_color(patch, *local_box)
+    if not fill:
+        return background_color
+    feather_fill(patch, *local_box, background_color, smooth=smooth)
+
+    img.paste(Image.fromarray(patch), (rx, ry))
+    return background_color
+
+def clean_image(image, logo_path=None, roi=True, watermark=None):
+    """
+    워터마크 제거 + 로고 삽입만 하고 저장하지 않음 (PIL 이미지 반환)
+
+    - image: 입력 이미지 경로 / 파일 객체(BytesIO 등) / PIL 이미지
+    - watermark: find_watermark() 결과 (None이면 여기서 감지), 워터마크가 없으면 제거 단계를 건너뜀
+    - 서버 파이프라인은 결과를 PNG로 저장했다 다시 읽지 않고 optimize_blog()에 바로 넘김
     """
-    print(f"=== NotebookLM 워터마크 제거 ===")
-    
     # 로고 사용 여부 결정 (기본값: 비활성화)
     use_logo = False
     if logo_path is not None and logo_path.lower() == "none":
@@ -227,21 +264,17 @@ def remove_watermark(image_path, logo_path=None, output_path=None):
             print(f"\n사용 가능한 로고:")
             for name in available_logos.keys():
                 print(f"  - {name}")
-            sys.exit(1)
+            raise FileNotFoundError(f"로고를 찾을 수 없습니다: {logo_path}")
     else:
         use_logo = True
         print(f"✅ 커스텀 로고: {logo_path}")
     
     if use_logo and not os.path.exists(logo_path):
         print(f"❌ 오류: 로고 파일 없음: {logo_path}")
-        sys.exit(1)
-    
-    if output_path is None:
-        base, ext = os.path.splitext(image_path)
-        output_path = f"{base}_clean{ext}"
+        raise FileNotFoundError(f"로고 파일 없음: {logo_path}")
     
     # 이미지 로드
-    img = Image.open(image_path)
+    img = image if isinstance(image, Image.Image) else Image.open(image)
     if img.mode != 'RGB':
         img = img.convert('RGB')
     
@@ -250,48 +283,43 @@ def remove_watermark(image_path, logo_path=None, output_path=None):
     
     # 워터마크 영역
     wm = get_watermark_region(width, height)
-    
-    print(f"워터마크 제거: {wm['width']} x {wm['height']}px")
-    print(f"  좌표: ({wm['x1']}, {wm['y1']}) → ({wm['x2']}, {wm['y2']})")
-    
-    # 배경색 (4방향 샘플링, 중앙값 사용)
-    background_color = get_local_background_color(img, wm['x1'], wm['y1'], wm['x2'], wm['y2'])
-    print(f"배경색: RGB{background_color}")
-    
-    # 워터마크 제거 (그라디언트 블렌딩 적용)
-    print(f"  그라디언트 블렌딩 적용 중...")
-    img = create_gradient_fill(img, wm['x1'], wm['y1'], wm['x2'], wm['y2'], background_color)
-    print(f"✅ 워터마크 제거 완료 (자연스러운 블렌딩)")
+    if watermark is None:
+        watermark = find_watermark(img)
+    
+    if not watermark["found"]:
+        # 워터마크 없음 → 제거하지 않음 (로고를 넣을 때만 배경색 샘플링)
+        print(f"✅ 워터마크 없음 (감지 점수 {watermark['score']}) → 제거 건너뜀")
+        background_color = clean_watermark_roi(img, wm['x1'], wm['y1'], wm['x2'], wm['y2'], fill=False) \
+            if use_logo else None
+    else:
+        print(f"워터마크 제거: {wm['width']} x {wm['height']}px")
+        print(f"  좌표: ({wm['x1']}, {wm['y1']}) → ({wm['x2']}, {wm['y2']})")
+        if watermark["box"] is not None:
+            print(f"  감지 위치: {watermark['box']} (점수 {watermark['score']})")
+
+        if roi:
+            # 워터마크 주변만 잘라서 배경색 샘플링 + 그라디언트 블렌딩 후 붙여넣기
+            print(f"  그라디언트 블렌딩 적용 중 (ROI)...")
+            with stage("watermark_fill"):
+                background_color = clean_watermark_roi(img, wm['x1'], wm['y1'], wm['x2'], wm['y2'])
+            print(f"배경색: RGB{background_color}")
+        else:
+            with stage("watermark_fill"):
+                # 배경색 (4방향 샘플링, 중앙값 사용)
+                background_color = get_local_background_color(img, wm['x1'], wm['y1'], wm['x2'], wm['y2'])
+                print(f"배경색: RGB{background_color}")
+
+                # 워터마크 제거 (그라디언트 블렌딩 적용)
+                print(f"  그라디언트 블렌딩 적용 중...")
+                img = create_gradient_fill(img, wm['x1'], wm['y1'], wm['x2'], wm['y2'], background_color)
+        print(f"✅ 워터마크 제거 완료 (자연스러운 블렌딩)")
     
     # 로고 삽입
     if use_logo:
-        logo = Image.open(logo_path)
-        if logo.mode != 'RGBA':
-            logo = logo.convert('RGBA')
-        
-        # 로고 색상 변환
-        logo_array = np.array(logo)
-        new_logo = np.zeros_like(logo_array)
-        
-        for i in range(logo_array.shape[0]):
-            for j in range(logo_array.shape[1]):
-                r, g, b, a = logo_array[i, j]
-                
-                if a < 10:
-                    new_logo[i, j] = [background_color[0], background_color[1], 
-                                     background_color[2], 0]
-                elif r > 200 and g > 200 and b > 200:
-                    new_logo[i, j] = [background_color[0], background_color[1], 
-                                     background_color[2], 255]
-                else:
-                    new_logo[i, j] = [r, g, b, a]
-        
-        logo_converted = Image.fromarray(new_logo.astype('uint8'), 'RGBA')
-        
         # 로고 크기: 40px (원래대로)
+        # 색상 변환 + 리사이즈 결과는 레지스트리가 (로고, 배경색, 크기)별로 캐시
         logo_size = 40
-        logo_resized = logo_converted.resize((logo_size, logo_size), 
-                                            Image.Resampling.LANCZOS)
+        logo_resized = get_registry().get_logo(logo_path, background_color, logo_size)
         
         # 로고 위치 (워터마크 영역 중앙)
         center_x = (wm['x1'] + wm['x2']) // 2
@@ -301,21 +329,42 @@ def remove_watermark(image_path, logo_path=None, output_path=None):
         
         print(f"로고: {logo_size}px")
         
-        # 합성
-        img_rgba = img.convert('RGBA')
-        img_rgba.paste(logo_resized, (logo_x, logo_y), logo_resized)
-        img = img_rgba.convert('RGB')
+        # 합성 (알파 마스크로 RGB 이미지에 바로 붙여넣기 → 전체 RGBA 변환 불필요)
+        img.paste(logo_resized, (logo_x, logo_y), logo_resized)
         
         print(f"✅ 로고 삽입 완료")
+
+    return img
+
+def remove_watermark(image_path, logo_path=None, output_path=None, roi=True):
+    """
+    NotebookLM 워터마크 제거 + 로고 삽입 (선택)
+    
+    워터마크: 150 x 35px (최소)
+    로고: 40px (원래 크기)
+    
+    Parameters:
+    - image_path: 입력 이미지 경로
+    - logo_path: 로고 경로/이름 (None=기본, "none"=로고없음)
+    - output_path: 출력 경로 (None=자동생성)
+    - roi: True=워터마크 주변만 잘라서 처리 (기본), False=전체 프레임 배열 복사 방식
+    """
+    print(f"=== NotebookLM 워터마크 제거 ===")
+    
+    if output_path is None:
+        base, ext = os.path.splitext(image_path)
+        output_path = f"{base}_clean{ext}"
     
-    # 저장
-    img.save(output_path, 'PNG', quality=95)
+    img = clean_image(image_path, logo_path, roi)
     
-    file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-    file_kb = os.path.getsize(output_path) / 1024
+    # 저장 (메모리에서 인코딩해 크기 확인 → 디스크에는 최종 결과만 한 번 기록)
+    with stage("encode", format="png"):
+        png = encode_within_budget(img, 'PNG', NAVER_BLOG_MAX_BYTES)
+    file_size_mb = png["bytes"] / (1024 * 1024)
+    over_limit = not png["fits"]
     
     # 10MB 초과 시 자동 압축
-    if file_size_mb > 10:
+    if over_limit:
         print(f"\n⚠️ PNG 용량이 10MB를 초과했습니다 ({file_size_mb:.2f} MB)")
         print(f"   네이버 블로그 업로드 한도에 맞춰 자동 압축합니다...")
         
@@ -327,38 +376,37 @@ def remove_watermark(image_path, logo_path=None, output_path=None):
             aspect_ratio = original_height / original_width
             target_height = int(target_width * aspect_ratio)
             
-            img_resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
+            with stage("resize"):
+                img_resized = img.resize((target_width, target_height), Image.Resampling.LANCZOS)
             print(f"   리사이즈: {original_width}px → {target_width}px")
             
-            # 리사이즈된 이미지 저장
-            img_resized.save(output_path, 'PNG', optimize=True)
-            file_size_mb = os.path.getsize(output_path) / (1024 * 1024)
-            file_kb = os.path.getsize(output_path) / 1024
+            with stage("encode", format="png"):
+                png = encode_within_budget(img_resized, 'PNG', NAVER_BLOG_MAX_BYTES, optimize=True)
+            file_size_mb = png["bytes"] / (1024 * 1024)
             
             print(f"   압축 후: {file_size_mb:.2f} MB")
-        
+    
+    write_bytes(output_path, png["data"])
+    file_kb = png["bytes"] / 1024
+    
+    if over_limit:
         # 2단계: 여전히 10MB 초과면 JPEG로 변환
-        if file_size_mb > 10:
+        if not png["fits"]:
             print(f"   PNG로는 10MB 이하 압축 불가능")
             print(f"   JPEG로 변환합니다...")
             
-            # JPEG로 변환
+            # JPEG로 변환 (품질 85 → 60 사이에서 이진 탐색, 디스크 저장은 한 번)
             base, _ = os.path.splitext(output_path)
             jpg_path = f"{base}.jpg"
             
             rgb_img = img.convert('RGB') if img.mode != 'RGB' else img
-            quality = 85
-            rgb_img.save(jpg_path, 'JPEG', quality=quality, optimize=True)
-            jpg_size = os.path.getsize(jpg_path) / (1024 * 1024)
-            
-            # 10MB 이하가 될 때까지 품질 낮추기
-            while jpg_size > 10 and quality > 60:
-                quality -= 5
-                rgb_img.save(jpg_path, 'JPEG', quality=quality, optimize=True)
-                jpg_size = os.path.getsize(jpg_path) / (1024 * 1024)
+            with stage("encode", format="jpeg"):
+                jpg = encode_within_budget(rgb_img, 'JPEG', NAVER_BLOG_MAX_BYTES, jpg_path,
+                                           quality=85, min_quality=60, optimize=True)
+            jpg_size = jpg["bytes"] / (1024 * 1024)
             
             print(f"   JPEG 저장: {jpg_path}")
-            print(f"   용량: {jpg_size:.2f} MB (품질 {quality}%)")
+            print(f"   용량: {jpg_size:.2f} MB (품질 {jpg['quality']}%)")
             print(f"\n✅ PNG는 고품질 원본으로 유지됩니다")
             print(f"   PNG: {output_path} ({file_size_mb:.2f} MB)")
             print(f"   JPEG: {jpg_path} ({jpg_size:.2f} MB) ⭐ 블로그 업로드용")
@@ -400,4 +448,7 @@ if __name__ == "__main__":
     logo_path = sys.argv[2] if len(sys.argv) > 2 else None
     output_path = sys.argv[3] if len(sys.argv) > 3 else None
     
-    remove_watermark(image_path, logo_path, output_path)
+    try:
+        remove_watermark(image_path, logo_path, output_path)
+    except FileNotFoundError:
+        sys.exit(1)
@@ -0,0 +1,351 @@
+"""
+스트리밍 세로 병합 엔진 (페이지 1장 분량 메모리로 긴 이미지 생성)
+
+- 크기는 파일 헤더만 읽어서 계산 (픽셀 디코딩 없음)
+- 페이지를 한 장씩 열어 가로 띠(strip) 단위로 출력
+  - PNG: zlib 스트리밍 인코더 (Pillow와 같은 행별 적응형 필터)
+  - JPEG: progressive/optimize 요청이면 JPEG_CANVAS_MAX_PIXELS 이하까지는 캔버스 한 장으로 한 번에 인코딩,
+          그보다 크면 256행 단위로 인코딩한 baseline JPEG 조각을 restart 마커로 이어 붙임 (파일이 조금 커짐)
+  - WebP: libwebp가 이미지 전체를 한 번에 받으므로 part마다 캔버스 한 장 (part 높이 ≤ 16383px → 1200px 폭 최대 약 59MB)
+          높이 제한을 넘으면 페이지 경계에서 여러 파일로 분할
+- 출력은 output_sink.open_output()으로 쓰므로 capture 범위에서는 디스크 대신 메모리로 나감
+- pdf_smart.py, merge_png.py 공용
+"""
+import io
+import os
+import re
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from budget_encoder import search_quality, encode_within_budget, write_bytes, describe
+from output_sink import open_output
+
+Image.MAX_IMAGE_PIXELS = None
+
+# 포맷별 최대 높이 (WebP는 16383px, JPEG는 65535px)
+MAX_HEIGHT = {
+    'webp': 16383,
+    'jpeg': 65535,
+    'png': 2 ** 31 - 1,
+}
+
+# JPEG 인코딩 단위 (행 수) - MCU 높이(최대 16행)의 배수여야 함
+JPEG_STRIP_ROWS = 256
+
+# progressive/optimize JPEG를 캔버스 한 장으로 인코딩할 최대 픽셀 수 (WebP part 하나 분량, 1200px 폭 약 59MB)
+# 넘으면 메모리 보호를 위해 baseline 띠 인코딩
+JPEG_CANVAS_MAX_PIXELS = 1200 * 16383
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def load_page(source):
+    """
+    페이지 소스 → (높이, 너비, 3) uint8 배열
+
+    source: RGB ndarray, .npy 경로 (mmap으로 열기), 이미지 파일 경로
+    """
+    if isinstance(source, np.ndarray):
+        return source
+    if str(source).endswith('.npy'):
+        return np.load(source, mmap_mode='r')
+    with Image.open(source) as img:
+        return np.asarray(img if img.mode == 'RGB' else img.convert('RGB'))
+
+def read_page_sizes(paths):
+    """헤더만 읽어서 (너비, 높이) 목록 반환 (ndarray/.npy도 가능)"""
+    sizes = []
+    for p in paths:
+        if isinstance(p, np.ndarray) or str(p).endswith('.npy'):
+            arr = load_page(p)
+            sizes.append((arr.shape[1], arr.shape[0]))
+            continue
+        with Image.open(p) as img:
+            sizes.append(img.size)
+    return sizes
+
+def plan_segments(sizes, max_height):
+    """
+    페이지를 출력 파일(part) 단위로 묶기
+
+    - 페이지 경계에서 나누되, 한 페이지가 max_height보다 길면 그 페이지만 행 단위로 분할
+    반환값: [[(페이지 인덱스, 시작 행, 끝 행), ...], ...]  (part별 세그먼트 목록)
+    """
+    parts = []
+    current = []
+    current_height = 0
+    for idx, (_, height) in enumerate(sizes):
+        if current and current_height + height > max_height:
+            parts.append(current)
+            current, current_height = [], 0
+
+        # 한 장이 제한보다 길면 제한 높이씩 잘라 각각 별도 part로
+        y = 0
+        while height - y > max_height:
+            parts.append([(idx, y, y + max_height)])
+            y += max_height
+
+        current.append((idx, y, height))
+        current_height += height - y
+    if current:
+        parts.append(current)
+    return parts
+
+def iter_segment_rows(paths, segments, width, align='left', background=(255, 255, 255)):
+    """
+    세그먼트를 순서대로 (높이, width, 3) uint8 배열로 반환 (한 번에 페이지 1장만 메모리에)
+    """
+    open_idx, page = None, None
+    for idx, y1, y2 in segments:
+        if idx != open_idx:
+            page = load_page(paths[idx])
+            open_idx = idx
+
+        rows = page[y1:y2]
+        if rows.shape[1] != width:
+            # 폭이 다르면 배경색으로 채운 뒤 정렬 (넘치는 부분은 잘라냄)
+            strip = np.empty((y2 - y1, width, 3), dtype=np.uint8)
+            strip[:] = background
+            page_width = min(rows.shape[1], width)
+            x = (width - page_width) // 2 if align == 'center' else 0
+            strip[:, x:x + page_width] = rows[:, :page_width]
+            rows = strip
+        yield rows
+    page = None
+
+def _png_chunk(fp, chunk_type, data):
+    fp.write(struct.pack('>I', len(data)))
+    fp.write(chunk_type)
+    fp.write(data)
+    fp.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
+
+def _png_idat(data):
+    """PNG 바이트에서 IDAT 데이터만 이어 붙여 반환"""
+    idat = []
+    i = len(PNG_SIGNATURE)
+    while i < len(data):
+        length = struct.unpack('>I', data[i:i + 4])[0]
+        if data[i + 4:i + 8] == b'IDAT':
+            idat.append(data[i + 8:i + 8 + length])
+        i += 12 + length
+    return b''.join(idat)
+
+def png_filter_rows(rows, prev_row):
+    """
+    PNG 행 필터링 (Pillow 인코더의 행별 적응형 필터를 그대로 사용)
+
+    - 바로 위 행을 맨 앞에 붙여 무압축 PNG로 인코딩 → 필터된 행에서 첫 행만 버림
+    - 위 행이 같으므로 한 번에 인코딩했을 때와 같은 필터/바이트가 나옴
+
+    rows: (높이, 너비, 3) uint8, prev_row: 바로 위 행 (너비, 3) (첫 행이면 0)
+    반환값: 필터 타입 바이트가 붙은 행들의 bytes
+    """
+    block = np.concatenate([prev_row[np.newaxis], rows])
+    buffer = io.BytesIO()
+    Image.fromarray(block).save(buffer, 'PNG', compress_level=0)
+    filtered = zlib.decompress(_png_idat(buffer.getvalue()))
+    return filtered[1 + rows.shape[1] * 3:]
+
+def write_png_stream(output_path, make_strips, width, height, max_bytes=None, compress_level=6):
+    """세로 띠들을 받아 PNG를 스트리밍으로 저장 (전체 캔버스를 만들지 않음)"""
+    # Pillow PNG 인코더와 같은 zlib 설정과 행 필터 (픽셀은 같고, IDAT 조각 경계가 달라 파일 bytes는 조금 다를 수 있음)
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, 15, 9, zlib.Z_FILTERED)
+    prev_row = np.zeros((width, 3), dtype=np.uint8)
+
+    with open_output(output_path) as fp:
+        fp.write(PNG_SIGNATURE)
+        _png_chunk(fp, b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+        for strip in make_strips():
+            data = compressor.compress(png_filter_rows(strip, prev_row))
+            if data:
+                _png_chunk(fp, b'IDAT', data)
+            prev_row = strip[-1]
+        _png_chunk(fp, b'IDAT', compressor.flush())
+        _png_chunk(fp, b'IEND', b'')
+        size = fp.tell()
+
+    # PNG는 무손실이라 품질 조절 없이 한도 초과 여부만 알림
+    if max_bytes and size > max_bytes:
+        print(f"   ⚠️ {os.path.basename(output_path)}: 용량 한도 초과 "
+              f"({size / (1024 * 1024):.2f} MB)")
+
+def _split_jpeg(data):
+    """JPEG 바이트 → (SOS 세그먼트까지의 헤더, 엔트로피 데이터) (EOI 제외)"""
+    i = 2
+    while True:
+        marker = data[i + 1]
+        length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        i += 2 + length
+        if marker == 0xDA:
+            return data[:i], data[i:-2]
+
+def _set_jpeg_height(header, height):
+    """헤더의 SOF0 세그먼트 높이 값 변경"""
+    header = bytearray(header)
+    i = 2
+    while True:
+        marker = header[i + 1]
+        length = struct.unpack('>H', header[i + 2:i + 4])[0]
+        if marker == 0xC0:
+            header[i + 5:i + 7] = struct.pack('>H', height)
+            return bytes(header)
+        i += 2 + length
+
+def _renumber_restarts(entropy, start):
+    """엔트로피 데이터 안의 RST0~7 마커를 start부터 이어지는 번호로 바꿈"""
+    counter = [start]
+
+    def replace(match):
+        marker = bytes((0xFF, 0xD0 + counter[0] % 8))
+        counter[0] += 1
+        return marker
+
+    return re.sub(rb'\xff[\xd0-\xd7]', replace, entropy), counter[0]
+
+def _rebatch_rows(strips, rows_per_batch):
+    """크기가 제각각인 띠를 rows_per_batch행 단위로 다시 묶기 (마지막만 짧을 수 있음)"""
+    buffer, buffered = [], 0
+    for strip in strips:
+        while len(strip):
+            take = min(rows_per_batch - buffered, len(strip))
+            buffer.append(strip[:take])
+            buffered += take
+            strip = strip[take:]
+            if buffered == rows_per_batch:
+                yield np.concatenate(buffer)
+                buffer, buffered = [], 0
+    if buffer:
+        yield np.concatenate(buffer)
+
+def _encode_jpeg_strips(fp, strips, height, **save_kwargs):
+    """baseline JPEG 띠들을 restart 마커로 이어 붙여 fp에 기록"""
+    restart = 0
+    for batch_num, rows in enumerate(_rebatch_rows(strips, JPEG_STRIP_ROWS)):
+        buffer = io.BytesIO()
+        Image.fromarray(rows).save(buffer, 'JPEG', restart_marker_rows=1, **save_kwargs)
+        header, entropy = _split_jpeg(buffer.getvalue())
+
+        if batch_num == 0:
+            fp.write(_set_jpeg_height(header, height))
+        else:
+            fp.write(bytes((0xFF, 0xD0 + restart % 8)))
+            restart += 1
+        entropy, restart = _renumber_restarts(entropy, restart)
+        fp.write(entropy)
+    fp.write(b'\xff\xd9')
+
+def write_jpeg_rowwise(output_path, make_strips, width, height, max_bytes=None, **save_kwargs):
+    """
+    JPEG 저장
+
+    - progressive/optimize: 전체 이미지 통계(스캔 분할, 허프만 표 하나)가 필요하므로 캔버스 한 장으로 인코딩
+      (JPEG_CANVAS_MAX_PIXELS를 넘으면 메모리 보호를 위해 두 옵션을 빼고 baseline 띠 인코딩으로 전환)
+    - baseline: 가로 띠 단위로 인코딩 후 이어 붙이기 (메모리는 페이지 1장 + 띠 하나 분량)
+      - 띠마다 같은 설정으로 인코딩 (MCU 행마다 restart 마커)
+      - 첫 띠의 헤더(높이만 전체 높이로 수정) + 각 띠의 엔트로피 데이터를 RST 마커로 연결
+      - 띠 높이가 MCU(16행)의 배수라 한 번에 인코딩한 것과 같은 바이트가 나옴
+    - max_bytes: 지정하면 품질을 이진 탐색 (띠를 다시 읽어 메모리 버퍼에 인코딩, 저장은 한 번)
+    """
+    if save_kwargs.get('progressive') or save_kwargs.get('optimize'):
+        if width * height <= JPEG_CANVAS_MAX_PIXELS:
+            return write_canvas(output_path, make_strips, width, height, 'JPEG', max_bytes, **save_kwargs)
+        save_kwargs.pop('progressive', None)
+        save_kwargs.pop('optimize', None)
+        print(f"   ⚠️ {os.path.basename(output_path)} {width} x {height}px: 메모리 보호를 위해 "
+              f"baseline 띠 인코딩 사용 (progressive/optimize 미적용)")
+
+    if not max_bytes:
+        with open_output(output_path) as fp:
+            _encode_jpeg_strips(fp, make_strips(), height, **save_kwargs)
+        return
+
+    quality = save_kwargs.pop('quality', 85)
+
+    def encode(q):
+        buffer = io.BytesIO()
+        _encode_jpeg_strips(buffer, make_strips(), height, quality=q, **save_kwargs)
+        return buffer.getvalue()
+
+    data, chosen, fits = search_quality(encode, max_bytes, quality)
+    write_bytes(output_path, data)
+    print(f"   💾 {describe({'path': output_path, 'format': 'JPEG', 'quality': chosen, 'bytes': len(data), 'fits': fits})}")
+
+def write_canvas(output_path, make_strips, width, height, format, max_bytes=None, **save_kwargs):
+    """띠들을 캔버스 한 장에 붙여 저장 (호출하는 쪽에서 크기를 제한: WebP part, 작은 progressive JPEG)"""
+    canvas = Image.new('RGB', (width, height))
+    y = 0
+    for strip in make_strips():
+        canvas.paste(Image.fromarray(strip), (0, y))
+        y += strip.shape[0]
+
+    if not max_bytes:
+        with open_output(output_path) as fp:
+            canvas.save(fp, format, **save_kwargs)
+        return
+    result = encode_within_budget(canvas, format, max_bytes, output_path, **save_kwargs)
+    print(f"   💾 {describe(result)}")
+
+def write_webp(output_path, make_strips, width, height, max_bytes=None, **save_kwargs):
+    """
+    WebP 한 part 저장
+
+    libwebp 인코더는 행 단위 입력을 받지 않으므로 part 하나 분량의 캔버스를 만든다
+    (높이 ≤ 16383px로 제한되어 페이지 수가 늘어도 part당 크기는 그 이상 커지지 않음)
+    """
+    print(f"   ℹ️ {os.path.basename(output_path)}: WebP는 part 캔버스로 인코딩 "
+          f"({width} x {height}px, {width * height * 3 / (1024 * 1024):.0f} MB)")
+    write_canvas(output_path, make_strips, width, height, 'WebP', max_bytes, **save_kwargs)
+
+WRITERS = {
+    'png': write_png_stream,
+    'jpeg': write_jpeg_rowwise,
+    'webp': write_webp,
+}
+
+def part_path(output_path, part_num, part_count):
+    """part가 여러 개면 merged.webp → merged_part01.webp"""
+    if part_count == 1:
+        return output_path
+    base, ext = os.path.splitext(output_path)
+    return f"{base}_part{part_num:02d}{ext}"
+
+def merge_vertical(paths, output_path, fmt='png', width=None, align='left',
+                   background=(255, 255, 255), sizes=None, max_bytes=None, **save_kwargs):
+    """
+    이미지들을 세로로 이어 붙여 저장 (페이지 1장 분량 메모리)
+
+    Args:
+    - paths: 입력 페이지 목록 (위에서 아래 순서, 이미지 경로 / .npy 경로 / RGB ndarray)
+    - fmt: 'png', 'jpeg', 'webp'
+    - width: 출력 너비 (None이면 가장 넓은 이미지 기준)
+    - align: 폭이 좁은 이미지 정렬 ('left' 또는 'center')
+    - sizes: 미리 알고 있는 (너비, 높이) 목록 (없으면 헤더에서 읽음)
+    - max_bytes: 파일(part)당 용량 한도 (WebP/JPEG는 품질 자동 조정, PNG는 경고만)
+    - save_kwargs: 인코더 옵션 (quality 등)
+
+    Returns:
+    - 저장된 파일 경로 목록 (높이 제한을 넘으면 여러 개)
+    """
+    if not paths:
+        return []
+    if sizes is None:
+        sizes = read_page_sizes(paths)
+    if width is None:
+        width = max(w for w, _ in sizes)
+
+    parts = plan_segments(sizes, MAX_HEIGHT[fmt])
+    writer = WRITERS[fmt]
+    saved = []
+    for part_num, segments in enumerate(parts, 1):
+        path = part_path(output_path, part_num, len(parts))
+        height = sum(y2 - y1 for _, y1, y2 in segments)
+        def make_strips(segments=segments):
+            return iter_segment_rows(paths, segments, width, align, background)
+        writer(path, make_strips, width, height, max_bytes, **save_kwargs)
+        saved.append(path)
+
+    if len(parts) > 1:
+        print(f"   ⚠️ {fmt.upper()} 높이 제한({MAX_HEIGHT[fmt]}px) 초과 → {len(parts)}개 파일로 분할")
+    return saved
@@ -0,0 +1,193 @@
+"""
+단계별 측정 + 구조화 로그 (워커/서버 공용)
+
+- stage("rasterize"): 소요 시간과 단계 중 피크 RSS를 샘플로 기록
+- job(job_id): 작업 하나의 샘플 수집 범위. 워커 프로세스는 모은 샘플을 결과와 함께 서버로 돌려준다
+- 작업 밖의 샘플은 set_sink()로 등록한 함수(서버의 메트릭 저장소)로 바로 전달
+- log(event, ...): job_id가 붙은 JSON 한 줄 로그 (stderr)
+- 작업 중 스크립트의 print()는 JSON 로그 줄로 바뀐다 (CLI로 실행할 때는 그대로 출력)
+
+피크 RSS는 /proc/self/clear_refs로 VmHWM을 단계 시작 시 초기화해서 측정한다 (Linux 전용).
+중첩된 단계는 바깥 단계의 피크에도 반영된다. 초기화할 수 없으면 단계 종료 시점 RSS를 기록한다.
+"""
+import contextlib
+import contextvars
+import io
+import json
+import logging
+import sys
+import time
+
+logger = logging.getLogger("mps")
+
+# 현재 작업 id / 샘플 목록 / 열려 있는 단계 (스레드·작업별로 분리)
+_job_id = contextvars.ContextVar("mps_job_id", default=None)
+_samples = contextvars.ContextVar("mps_stage_samples", default=None)
+_open_stages = contextvars.ContextVar("mps_open_stages", default=())
+
+# 작업 밖에서 기록된 샘플을 받을 함수 (서버: 메트릭 저장소)
+_sink = None
+
+# VmHWM 초기화는 프로세스 전체에 영향을 주므로 작업 하나만 도는 워커 프로세스에서만 사용
+_track_peak = False
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(level=logging.INFO):
+    """mps 로거를 JSON 한 줄 형식(stderr)으로 설정 (여러 번 호출해도 한 번만 적용)"""
+    if any(isinstance(h.formatter, JsonFormatter) for h in logger.handlers):
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+def log(event, level=logging.INFO, job_id=None, **fields):
+    """구조화 로그 한 줄 (job_id를 주지 않으면 현재 작업 id)"""
+    job_id = job_id or _job_id.get()
+    if job_id:
+        fields["job_id"] = job_id
+    logger.log(level, event, extra={"fields": fields})
+
+def current_job_id():
+    return _job_id.get()
+
+def set_sink(fn):
+    """작업 밖에서 기록된 샘플을 받을 함수 등록 (fn(sample))"""
+    global _sink
+    _sink = fn
+
+def _read_status_bytes(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+class _Stage:
+    __slots__ = ("name", "peak")
+
+    def __init__(self, name):
+        self.name = name
+        self.peak = 0
+
+def record(sample):
+    """샘플 기록: 현재 작업 목록 또는 sink"""
+    samples = _samples.get()
+    if samples is not None:
+        samples.append(sample)
+    elif _sink is not None:
+        _sink(sample)
+
+def record_samples(samples):
+    """다른 프로세스에서 돌려받은 샘플 기록 (병렬 페이지 워커 등)"""
+    for sample in samples or ():
+        record(sample)
+
+@contextlib.contextmanager
+def stage(name, **labels):
+    """
+    단계 측정: {"stage", "seconds", "peak_rss_bytes", "job_id", ...labels}
+    """
+    parents = _open_stages.get()
+    tracking = _track_peak
+    if tracking:
+        # 바깥 단계의 지금까지 피크를 보관한 뒤 초기화
+        hwm = _read_status_bytes("VmHWM") or 0
+        for parent in parents:
+            parent.peak = max(parent.peak, hwm)
+        tracking = _reset_peak()
+
+    current = _Stage(name)
+    token = _open_stages.set(parents + (current,))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        _open_stages.reset(token)
+        peak = _read_status_bytes("VmHWM" if tracking else "VmRSS") or 0
+        peak = max(peak, current.peak)
+        for parent in parents:
+            parent.peak = max(parent.peak, peak)
+
+        sample = {"stage": name, "seconds": seconds, "peak_rss_bytes": peak}
+        sample.update(labels)
+        if _job_id.get():
+            sample["job_id"] = _job_id.get()
+        record(sample)
+
+class _LogWriter(io.TextIOBase):
+    """print() 출력을 줄 단위 JSON 로그로 바꾸는 stdout 대체"""
+
+    def __init__(self):
+        self._buffer = ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            if line.strip():
+                log("script_output", message=line.strip())
+        return len(text)
+
+    def flush(self):
+        if self._buffer.strip():
+            log("script_output", message=self._buffer.strip())
+        self._buffer = ""
+
+@contextlib.contextmanager
+def job(job_id, track_peak=False, capture_output=True):
+    """
+    작업 하나의 측정 범위
+
+    - 반환값: 이 범위에서 기록된 샘플 목록 (with 블록이 끝난 뒤 읽으면 됨)
+    - track_peak: 단계별 VmHWM 초기화 사용 (작업 하나만 실행하는 워커 프로세스에서만)
+    - capture_output: 범위 안의 print()를 JSON 로그로 변환
+    """
+    global _track_peak
+    samples = []
+    tokens = (_job_id.set(job_id), _samples.set(samples), _open_stages.set(()))
+    previous_track = _track_peak
+    _track_peak = track_peak
+    if capture_output:
+        configure_logging()
+    writer = _LogWriter() if capture_output else None
+    try:
+        if writer is not None:
+            with contextlib.redirect_stdout(writer):
+                try:
+                    yield samples
+                finally:
+                    writer.flush()
+        else:
+            yield samples
+    finally:
+        _track_peak = previous_track
+        for var, token in zip((_job_id, _samples, _open_stages), tokens):
+            var.reset(token)
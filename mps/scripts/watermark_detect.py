@@ -0,0 +1,165 @@
+"""
+NotebookLM 워터마크 감지 (우측 하단 ROI만 검사)
+
+- 워터마크 자리 주변만 잘라 배경색(중앙값)과 다른 픽셀을 전경 마스크로 만듦
+- 실측 137x13px 마크 크기의 상자 템플릿을 적분 영상(누적합)으로 모든 위치에 한 번에 상관 계산
+  점수 = 상자 안 전경 비율 - 상자 둘레(띠) 전경 비율 → 배경 위에 떨어져 있는 마크 모양 덩어리일수록 높음
+- 크기 후보: 고정 137x13 (get_watermark_region 기준) + 이미지 폭에 비례한 크기 (1376px 폭 기준, PDF 페이지)
+- 주변이 복잡해서(사진 등) 판단할 수 없으면 있는 것으로 보고 기존처럼 제거
+"""
+import numpy as np
+
+# NotebookLM 워터마크 실측 크기와 기준 슬라이드 폭 (1376 x 768)
+MARK_SIZE = (137, 13)
+REFERENCE_WIDTH = 1376
+
+# 실제 마크 크기가 후보와 조금 달라도 잡히도록 후보마다 함께 보는 배율
+SCALE_STEPS = (0.8, 1.0, 1.25)
+
+# 이보다 낮은 마크 후보는 글자로 구별할 수 없으므로 보지 않음 (후보가 하나도 없으면 판단 불가)
+MIN_MARK_HEIGHT = 6
+
+# 제거 영역 바깥으로 더 살펴볼 여백 (px)
+SEARCH_MARGIN = 20
+
+# 배경색과 채널 차이가 이보다 크면 전경 픽셀
+FOREGROUND_DELTA = 24
+
+# 템플릿 점수가 이 이상이면 워터마크 있음
+MIN_SCORE = 0.12
+
+# 검사 영역의 전경 비율이 이보다 크면 배경이 복잡해 판단 불가 (있는 것으로 봄)
+BUSY_FRACTION = 0.3
+
+def mark_sizes(width):
+    """이미지 폭에서 가능한 마크 크기 후보 [(너비, 높이), ...] (큰 것부터)"""
+    scale = width / REFERENCE_WIDTH
+    bases = {MARK_SIZE, (round(MARK_SIZE[0] * scale), round(MARK_SIZE[1] * scale))}
+    sizes = {(max(2, round(w * step)), max(2, round(h * step))) for w, h in bases for step in SCALE_STEPS}
+    return sorted(sizes, reverse=True)
+
+def _search_box(width, height, fill_box, sizes):
+    """제거 영역 + 여백, 가장 큰 후보 마크가 둘레와 함께 들어가는 우측 하단 영역"""
+    x1, y1 = fill_box[0], fill_box[1]
+    mark_w, mark_h = sizes[0]
+    return (
+        max(0, min(x1 - SEARCH_MARGIN, width - mark_w * 3 // 2)),
+        max(0, min(y1 - SEARCH_MARGIN, height - mark_h * 4)),
+        width,
+        height,
+    )
+
+def _box_sums(integral, box_h, box_w):
+    """모든 위치의 box_h x box_w 상자 합 (integral: 앞에 0 행/열을 붙인 누적합)"""
+    return (integral[box_h:, box_w:] - integral[:-box_h, box_w:]
+            - integral[box_h:, :-box_w] + integral[:-box_h, :-box_w])
+
+def _overlapping_run(occupied, start, stop, gap):
+    """
+    occupied(1차원 bool)에서 [start, stop)과 겹치는 전경 구간 (gap 이하 빈칸은 이어진 것으로 봄)
+
+    반환값: (시작, 끝) 또는 겹치는 전경이 없으면 None
+    """
+    indices = np.flatnonzero(occupied)
+    if indices.size == 0:
+        return None
+    breaks = np.flatnonzero(np.diff(indices) > gap + 1)
+    starts = indices[np.r_[0, breaks + 1]]
+    ends = indices[np.r_[breaks, indices.size - 1]] + 1
+    hits = (starts < stop) & (ends > start)
+    if not hits.any():
+        return None
+    return int(starts[hits].min()), int(ends[hits].max())
+
+def _refine_box(mask, box, gap):
+    """
+    템플릿 위치(box, 검사 영역 좌표)를 실제 마크의 전경 범위로 맞춤
+
+    상자 크기가 고정이라 마크가 상자보다 길거나 짧으면 상자가 글자 일부만 덮으므로,
+    상자 행 주변에서 글자 간격(gap) 이하로 이어진 전경 열 → 그 열 범위의 전경 행 순으로 넓히거나 좁힘
+    """
+    x1, y1, x2, y2 = box
+    rows = mask[max(0, y1 - gap):y2 + gap]
+    columns = _overlapping_run(rows.any(axis=0), x1, x2, gap)
+    if columns is None:
+        return box
+    lines = _overlapping_run(mask[:, columns[0]:columns[1]].any(axis=1), y1, y2, max(1, gap // 2))
+    if lines is None:
+        return box
+    return columns[0], lines[0], columns[1], lines[1]
+
+def detect_watermark(img, fill_box):
+    """
+    우측 하단 워터마크 감지
+
+    - img: PIL 이미지
+    - fill_box: 호출 측이 지울 영역 (x1, y1, x2, y2), 이 주변을 검사
+
+    반환값: {"found", "box", "score"}
+    - box: 찾은 마크 위치 (x1, y1, x2, y2), 못 찾았거나 판단 불가면 None
+    - score: 가장 높은 템플릿 점수 (판단 불가면 None)
+    """
+    width, height = img.size
+    sizes = mark_sizes(width)
+    search = _search_box(width, height, fill_box, sizes)
+    sx, sy = search[0], search[1]
+
+    patch = np.asarray(img.crop(search).convert('RGB'), dtype=np.int16)
+    # 배경색: 4px 간격 표본의 중앙값 (영역 대부분이 배경이므로 충분)
+    background = np.median(patch[::4, ::4].reshape(-1, 3), axis=0).astype(np.int16)
+    mask = (np.abs(patch - background).max(axis=2) > FOREGROUND_DELTA).astype(np.int32)
+    if mask.mean() > BUSY_FRACTION:
+        return {"found": True, "box": None, "score": None}
+
+    # 오른쪽/아래는 이미지 경계 → 바깥은 배경으로 보고 0으로 채움 (마크가 가장자리에 붙어 있어도 둘레 계산 가능)
+    max_pad = max(2, sizes[0][1] // 2)
+    padded = np.pad(mask, ((0, max_pad), (0, max_pad)))
+    integral = np.pad(padded.cumsum(axis=0).cumsum(axis=1), ((1, 0), (1, 0)))
+
+    best = (None, None, None)
+    for mark_w, mark_h in sizes:
+        pad = max(2, mark_h // 2)
+        outer_h, outer_w = mark_h + 2 * pad, mark_w + 2 * pad
+        if mark_h < MIN_MARK_HEIGHT or mask.shape[0] < mark_h or mask.shape[1] < mark_w:
+            continue
+        if padded.shape[0] < outer_h or padded.shape[1] < outer_w:
+            continue
+
+        inner = _box_sums(integral, mark_h, mark_w)[pad:, pad:]
+        outer = _box_sums(integral, outer_h, outer_w)
+        inner = inner[:outer.shape[0], :outer.shape[1]]
+        ring = (outer - inner).astype(np.float32)
+        score = inner.astype(np.float32) * (1 / (mark_w * mark_h)) - ring * (1 / (outer_h * outer_w - mark_w * mark_h))
+
+        y, x = np.unravel_index(np.argmax(score), score.shape)
+        if best[0] is None or score[y, x] > best[0]:
+            x1, y1 = int(x) + pad, int(y) + pad
+            best = (float(score[y, x]), (x1, y1, x1 + mark_w, y1 + mark_h), mark_h)
+
+    score, box, mark_h = best
+    if score is None:
+        # 구별할 수 있는 크기의 마크 후보가 들어갈 자리도 없는 작은 이미지 → 판단 불가
+        return {"found": True, "box": None, "score": None}
+    if score < MIN_SCORE:
+        return {"found": False, "box": None, "score": round(score, 3)}
+    x1, y1, x2, y2 = _refine_box(mask, box, max(2, mark_h // 2))
+    box = (sx + x1, sy + y1, min(width, sx + x2), min(height, sy + y2))
+    return {"found": True, "box": box, "score": round(score, 3)}
+
+if __name__ == "__main__":
+    import sys
+
+    from PIL import Image
+
+    from remove_watermark import get_watermark_region
+
+    if len(sys.argv) < 2:
+        print("Usage: python watermark_detect.py <image> [image ...]")
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        with Image.open(path) as img:
+            wm = get_watermark_region(img.width, img.height)
+            result = detect_watermark(img, (wm['x1'], wm['y1'], wm['x2'], wm['y2']))
+        status = "있음" if result["found"] else "없음"
+        print(f"{path}: 워터마크 {status} (위치 {result['box']}, 점수 {result['score']})")
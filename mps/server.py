@@ -1,16 +1,189 @@
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, StreamingResponse, Response
 import uvicorn
 import shutil
 import os
-import subprocess
 import uuid
+import time
+import logging
+import contextlib
+import math
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional
 import json
 
+from worker_pool import WorkerPool, DEFAULT_WORKERS, iter_queue
+from scheduler import JobScheduler, QueueFullError
+from jobs import JobStore
+from result_cache import ResultCache, hash_fileobj, make_cache_key
+from retention import RetentionManager
+from source_store import SourceStore, SourceExpiredError
+from streaming import (media_type, content_disposition, split_first, zip_stream, data_url, json_line,
+                       ZIP_MEDIA_TYPE)
+import tasks
+import telemetry
+from telemetry import stage
+from metrics import MetricsRegistry, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from encode_profiles import validate_profile, DEFAULT_LATENCY_BUDGET_MS
+from pdf_preview import THUMB_WIDTH, clamp_thumb_width
+
 app = FastAPI()
 
+# 구조화 로그 (JSON 한 줄, job_id 포함) + 단계/요청 메트릭 (GET /metrics)
+telemetry.configure_logging()
+metrics = MetricsRegistry()
+telemetry.set_sink(metrics.observe_stage)
+
+# 사전 예열 워커 풀 (MPS_WORKERS 환경변수로 프로세스 수 조정)
+worker_pool = WorkerPool()
+
+# 작업 유형별 동시 실행 수 / 대기열 길이 (초과 시 429 + Retry-After)
+MAX_IMAGE_JOBS = int(os.environ.get("MPS_MAX_IMAGE_JOBS", DEFAULT_WORKERS))
+MAX_IMAGE_QUEUE = int(os.environ.get("MPS_MAX_IMAGE_QUEUE", 16))
+MAX_PDF_JOBS = int(os.environ.get("MPS_MAX_PDF_JOBS", 1))
+MAX_PDF_QUEUE = int(os.environ.get("MPS_MAX_PDF_QUEUE", 4))
+
+# 배치 처리 (POST /process-batch): 요청당 최대 파일 수, 동시에 실행할 배치 수 / 대기열 길이
+# 배치 하나는 파일들을 워커 프로세스 수만큼 동시에 처리
+MAX_BATCH_FILES = int(os.environ.get("MPS_MAX_BATCH_FILES", 100))
+MAX_BATCH_JOBS = int(os.environ.get("MPS_MAX_BATCH_JOBS", 1))
+MAX_BATCH_QUEUE = int(os.environ.get("MPS_MAX_BATCH_QUEUE", 4))
+
+# PDF 미리보기 (POST /pdf-preview): 동시에 실행할 미리보기 수 / 대기열 길이
+MAX_PREVIEW_JOBS = int(os.environ.get("MPS_MAX_PREVIEW_JOBS", 2))
+MAX_PREVIEW_QUEUE = int(os.environ.get("MPS_MAX_PREVIEW_QUEUE", 8))
+
+# PDF 1건의 페이지 병렬 처리 (1이면 순차 BATCH_SIZE 모드, 0이면 동시 처리 페이지 수 기본값 사용)
+# 페이지 워커는 워커 풀 밖의 프로세스이므로, 동시에 도는 PDF 작업(MAX_PDF_JOBS)의 페이지 워커 합이
+# 워커 풀 크기를 넘지 않도록 제한
+def cap_page_workers(requested, pool_size, max_pdf_jobs):
+    """요청한 페이지 워커 수 → 동시 PDF 작업 수 x 페이지 워커 수 ≤ 워커 풀 크기가 되도록 줄인 값"""
+    return max(1, min(requested, pool_size // max(1, max_pdf_jobs)))
+
+PDF_PAGE_WORKERS_REQUESTED = int(os.environ.get("MPS_PDF_PAGE_WORKERS", 1))
+PDF_PAGE_WORKERS = cap_page_workers(PDF_PAGE_WORKERS_REQUESTED, worker_pool.max_workers, MAX_PDF_JOBS)
+if PDF_PAGE_WORKERS < PDF_PAGE_WORKERS_REQUESTED:
+    telemetry.log("pdf_page_workers_capped", level=logging.WARNING, requested=PDF_PAGE_WORKERS_REQUESTED,
+                  page_workers=PDF_PAGE_WORKERS, workers=worker_pool.max_workers, max_pdf_jobs=MAX_PDF_JOBS)
+PDF_MAX_PAGES_IN_FLIGHT = int(os.environ.get("MPS_PDF_MAX_PAGES_IN_FLIGHT", 0))
+
+# PDF 래스터화 방식: width (페이지마다 target_width 픽셀 폭으로 바로 렌더링) / dpi (첫 페이지 기준 DPI 하나, 이전 방식)
+PDF_RENDER_MODE = os.environ.get("MPS_PDF_RENDER_MODE", "width")
+
+# PDF 래스터화 백엔드: auto (pypdfium2가 설치되어 있으면 pdfium) / pdfium (같은 프로세스) / pdf2image (poppler 외부 프로세스)
+PDF_RASTERIZER = os.environ.get("MPS_PDF_RASTERIZER", "auto")
+
+# 인코딩 프로필 기본값 (요청에 encode_profile이 없을 때, 비어 있으면 기존 인코더 설정)
+# auto 모드 지연 예산은 요청의 latency_budget_ms가 없으면 MPS_ENCODE_LATENCY_BUDGET_MS 사용
+ENCODE_PROFILE = validate_profile(os.environ.get("MPS_ENCODE_PROFILE", ""))
+ENCODE_LATENCY_BUDGET_MS = int(os.environ.get("MPS_ENCODE_LATENCY_BUDGET_MS", DEFAULT_LATENCY_BUDGET_MS))
+
+# 이 크기(MB) 이하의 이미지 업로드는 디스크에 쓰지 않고 bytes 그대로 워커에 전달 (0이면 항상 디스크에 저장)
+# PDF는 pdf2image(poppler)가 파일 경로로만 읽으므로 항상 작업 공간에 저장
+MEMORY_UPLOAD_MAX_MB = float(os.environ.get("MPS_MEMORY_UPLOAD_MAX_MB", 16))
+
+scheduler = JobScheduler({
+    "image": (MAX_IMAGE_JOBS, MAX_IMAGE_QUEUE),
+    "pdf": (MAX_PDF_JOBS, MAX_PDF_QUEUE),
+    "batch": (MAX_BATCH_JOBS, MAX_BATCH_QUEUE),
+    "preview": (MAX_PREVIEW_JOBS, MAX_PREVIEW_QUEUE),
+})
+
+# 비동기 작업 (POST /jobs) 상태 저장소 + 백그라운드 실행 스레드
+job_store = JobStore()
+job_runner = ThreadPoolExecutor(
+    max_workers=MAX_IMAGE_JOBS + MAX_IMAGE_QUEUE + MAX_PDF_JOBS + MAX_PDF_QUEUE,
+    thread_name_prefix="mps-job",
+)
+
+# 배치 파일별 실행 스레드 (스레드 하나가 워커 프로세스 하나를 기다림)
+batch_runner = ThreadPoolExecutor(max_workers=worker_pool.max_workers, thread_name_prefix="mps-batch")
+
+def queue_full_response(error):
+    """대기열 초과 → 429 응답"""
+    telemetry.log("queue_full", level=logging.WARNING, lane=error.lane, retry_after=error.retry_after)
+    return JSONResponse(
+        status_code=429,
+        content={"success": False, "error": str(error), "retryAfter": error.retry_after},
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
+def failure_response(endpoint, error, job_id=None, status_code=None):
+    """
+    처리 실패 → {"success": False} 응답 (오류 수 집계 + 로그)
+
+    status_code: 지정하면 그 상태 코드의 JSONResponse (없으면 200 + 본문만)
+    """
+    metrics.count_error(endpoint)
+    telemetry.log("request_failed", level=logging.ERROR, job_id=job_id, endpoint=endpoint, error=str(error))
+    content = {"success": False, "error": str(error)}
+    if status_code is None:
+        return content
+    return JSONResponse(status_code=status_code, content=content)
+
+def endpoint_label(request):
+    """메트릭 라벨용 엔드포인트 (경로 템플릿, 예: /jobs/{job_id})"""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+@app.middleware("http")
+async def count_requests(request: Request, call_next):
+    """엔드포인트별 요청 수 / 응답 시간 / 4xx·5xx 오류 수"""
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        metrics.observe_request(endpoint_label(request), time.perf_counter() - start, error=True)
+        raise
+    metrics.observe_request(endpoint_label(request), time.perf_counter() - start,
+                            error=response.status_code >= 400)
+    return response
+
+@app.middleware("http")
+async def touch_served_outputs(request: Request, call_next):
+    """
+    출력 파일을 제공하는 동안 보관 관리자에게서 빌려 둠 (본문 전송이 끝날 때까지 삭제하지 않음),
+    끝나면 마지막 제공 시각 갱신 → LRU 순서 갱신
+    """
+    if request.method != "GET" or not request.url.path.startswith("/output/"):
+        return await call_next(request)
+
+    lease = contextlib.ExitStack()
+    lease.enter_context(retention.use([request.url.path]))
+    try:
+        response = await call_next(request)
+    except BaseException:
+        lease.close()
+        raise
+
+    body = response.body_iterator
+
+    async def serve():
+        try:
+            async for chunk in body:
+                yield chunk
+        finally:
+            lease.close()
+
+    response.body_iterator = serve()
+    return response
+
+@app.on_event("startup")
+def start_worker_pool():
+    worker_pool.start()
+    retention.adopt_existing()
+    pdf_sources.reset()
+    retention.start(RETENTION_SWEEP_SECONDS, sweepers=(pdf_sources.sweep,))
+
+@app.on_event("shutdown")
+def stop_worker_pool():
+    job_runner.shutdown(wait=False, cancel_futures=True)
+    batch_runner.shutdown(wait=False, cancel_futures=True)
+    worker_pool.shutdown()
+    retention.stop()
+
 # CORS 설정 (React 앱 허용)
 app.add_middleware(
     CORSMiddleware,
@@ -20,11 +193,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 디렉토리 설정
+# 디렉토리 설정 (업로드/출력/원본 보관 폴더는 MPS_DATA_DIR 아래, 기본은 이 파일이 있는 폴더)
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
-UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
-OUTPUT_DIR = os.path.join(BASE_DIR, "output")
+DATA_DIR = os.environ.get("MPS_DATA_DIR") or BASE_DIR
+UPLOAD_DIR = os.path.join(DATA_DIR, "uploads")
+OUTPUT_DIR = os.path.join(DATA_DIR, "output")
 
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
@@ -32,135 +206,863 @@ os.makedirs(OUTPUT_DIR, exist_ok=True)
 # 정적 파일 서빙 (결과 이미지 접근용)
 app.mount("/output", StaticFiles(directory=OUTPUT_DIR), name="output")
 
+# 출력 보관 (마지막 제공 후 MPS_OUTPUT_TTL_SECONDS 지나면 삭제, 전체 MPS_OUTPUT_MAX_MB 초과 시 LRU 삭제,
+# 0이면 해당 제한 없음) + 작업별 중간 파일 정리. MPS_RETENTION_SWEEP_SECONDS 주기로 정리
+OUTPUT_TTL_SECONDS = int(os.environ.get("MPS_OUTPUT_TTL_SECONDS", 3600))
+OUTPUT_MAX_MB = int(os.environ.get("MPS_OUTPUT_MAX_MB", 1024))
+RETENTION_SWEEP_SECONDS = int(os.environ.get("MPS_RETENTION_SWEEP_SECONDS", 60))
+retention = RetentionManager(OUTPUT_DIR, UPLOAD_DIR, "/output/", OUTPUT_TTL_SECONDS,
+                             OUTPUT_MAX_MB * 1024 * 1024, on_reclaim=metrics.count_reclaimed)
+
+# 결과 캐시 (업로드 해시 + 옵션, 디스크 한도 MPS_CACHE_MAX_MB, 0이면 비활성화)
+# LRU로 내보낸 파일은 보관 관리자가 삭제 (제공 중인 파일은 남겨 둠)
+CACHE_MAX_MB = int(os.environ.get("MPS_CACHE_MAX_MB", 512))
+result_cache = ResultCache(OUTPUT_DIR, "/output/", CACHE_MAX_MB * 1024 * 1024, remove_files=retention.discard)
+
+# PDF 원본 보관 (미리보기에 올린 PDF를 내용 해시 sourceId로 보관 → /process-pdf 에서 재업로드 없이 사용)
+# 마지막 사용 후 MPS_PDF_SOURCE_TTL_SECONDS 동안 유지 (0이면 TTL 없음), 전체 MPS_PDF_SOURCE_MAX_MB 초과 시 LRU 삭제
+SOURCE_DIR = os.path.join(DATA_DIR, "sources")
+PDF_SOURCE_TTL_SECONDS = int(os.environ.get("MPS_PDF_SOURCE_TTL_SECONDS", 600))
+PDF_SOURCE_MAX_MB = int(os.environ.get("MPS_PDF_SOURCE_MAX_MB", 256))
+pdf_sources = SourceStore(SOURCE_DIR, PDF_SOURCE_TTL_SECONDS, PDF_SOURCE_MAX_MB * 1024 * 1024,
+                          on_reclaim=metrics.count_reclaimed)
+
+def parse_encode_options(encode_profile, latency_budget_ms):
+    """
+    요청의 인코딩 프로필 → (프로필, auto 지연 예산 ms)
+
+    알 수 없는 프로필이면 ValueError. 예산은 auto일 때만 의미가 있으므로 그 외에는 None.
+    """
+    profile = validate_profile(encode_profile) or ENCODE_PROFILE
+    if profile != 'auto':
+        return profile, None
+    return profile, int(latency_budget_ms or ENCODE_LATENCY_BUDGET_MS)
+
+def image_cache_key(file, remove_watermark, optimize_blog, output_format, encode=(None, None)):
+    return make_cache_key(hash_fileobj(file.file), "image", {
+        "remove_watermark": bool(remove_watermark),
+        "optimize_blog": bool(optimize_blog),
+        "output_format": output_format.lower(),
+        "encode_profile": encode[0],
+        "latency_budget_ms": encode[1],
+    })
+
+def pdf_cache_key(content_hash, merge_pages, target_width, output_format, pages, encode=(None, None)):
+    """content_hash: 업로드 내용 해시 (미리보기의 sourceId와 같은 값)"""
+    return make_cache_key(content_hash, "pdf", {
+        "merge_pages": bool(merge_pages),
+        "target_width": int(target_width),
+        "output_format": output_format.lower(),
+        "selected_pages": sorted(set(pages)) if pages else None,
+        "encode_profile": encode[0],
+        "latency_budget_ms": encode[1],
+        "render_mode": PDF_RENDER_MODE,
+        "rasterizer": PDF_RASTERIZER,
+    })
+
+def save_upload(file, file_id, ext):
+    """
+    업로드 파일을 작업 공간(UPLOAD_DIR/{file_id}/)에 저장하고 경로 반환
+
+    작업 중 생기는 파일도 같은 폴더에 두므로 작업 종료 시 release_upload()로 한 번에 삭제
+    """
+    input_path = os.path.join(retention.workspace(file_id), f"{file_id}{ext}")
+    with stage("upload_save", job_id=file_id):
+        with open(input_path, "wb") as buffer:
+            shutil.copyfileobj(file.file, buffer)
+    telemetry.log("upload_saved", job_id=file_id, bytes=os.path.getsize(input_path))
+    return input_path
+
+def upload_size(file):
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+def receive_upload(file, file_id, ext, kind):
+    """
+    업로드 → 워커 입력 (작은 이미지: bytes, 그 외: 작업 공간에 저장한 경로)
+
+    Starlette가 이미 받아 둔 업로드를 한 번만 읽어 넘김 (디스크에 다시 쓰고 워커가 또 읽지 않음)
+    """
+    if kind != "image" or upload_size(file) > MEMORY_UPLOAD_MAX_MB * 1024 * 1024:
+        return save_upload(file, file_id, ext)
+    with stage("upload_read", job_id=file_id):
+        data = file.file.read()
+    telemetry.log("upload_received", job_id=file_id, bytes=len(data), in_memory=True)
+    return data
+
+def pdf_content_hash(file, source_id):
+    """PDF 요청의 내용 해시 (sourceId가 있으면 업로드를 다시 읽지 않음)"""
+    if source_id:
+        return source_id
+    if file is None:
+        raise ValueError("file 또는 source_id가 필요합니다.")
+    return hash_fileobj(file.file)
+
+@contextlib.contextmanager
+def pdf_input(file, content_hash, file_id):
+    """
+    PDF 입력 경로
+
+    미리보기로 보관 중인 원본이 있으면 그 파일을 그대로 사용 (업로드 저장 생략, 처리하는 동안 삭제되지 않음),
+    없으면 업로드를 작업 공간에 저장 (업로드 없이 source_id만 왔으면 SourceExpiredError)
+    """
+    with contextlib.ExitStack() as stack:
+        try:
+            input_path = stack.enter_context(pdf_sources.use(content_hash))
+            telemetry.log("pdf_source_reused", job_id=file_id, source_id=content_hash)
+        except SourceExpiredError:
+            if file is None:
+                raise
+            input_path = save_upload(file, file_id, ".pdf")
+        yield input_path
+
+def source_expired_response(endpoint, error, status_code=None):
+    """보관 기간이 지난 sourceId → 실패 응답 + sourceExpired (클라이언트가 PDF를 다시 올리도록)"""
+    content = {**failure_response(endpoint, error), "sourceExpired": True}
+    if status_code is None:
+        return content
+    return JSONResponse(status_code=status_code, content=content)
+
+def release_upload(file_id):
+    """Cloud Run 메모리 확보를 위해 업로드 원본 + 중간 파일 즉시 삭제"""
+    if file_id:
+        retention.release_job(file_id)
+
+def parse_selected_pages(selected_pages):
+    """JSON 문자열 "[1, 2, 3]" → [1, 2, 3] (없거나 파싱 실패 시 None = 전체 처리)"""
+    if not selected_pages:
+        return None
+    try:
+        pages_list = json.loads(selected_pages)
+        if isinstance(pages_list, list) and len(pages_list) > 0:
+            return [int(p) for p in pages_list]
+    except:
+        pass # 파싱 실패 시 전체 처리
+    return None
+
+# 응답 방식: url (기본, /output/ 경로 목록 → 클라이언트가 다시 요청) / stream (결과 바이트를 응답 본문으로)
+RESPONSE_MODES = ("url", "stream")
+
+def parse_response_mode(response_mode):
+    mode = (response_mode or "url").lower()
+    if mode not in RESPONSE_MODES:
+        raise ValueError(f"알 수 없는 응답 방식: {response_mode} (사용 가능: {', '.join(RESPONSE_MODES)})")
+    return mode
+
+def cached_outputs(files):
+    """캐시에 있는 결과 파일 → (파일명, bytes) (다시 계산하지 않고 그대로 전송)"""
+    for url in files:
+        with retention.use([url]), open(os.path.join(OUTPUT_DIR, url[len("/output/"):]), "rb") as f:
+            data = f.read()
+        yield os.path.basename(url), data
+
+def relay_outputs(future, output_queue):
+    """워커가 큐로 보낸 출력 (파일명, bytes)을 도착하는 대로 전달, 작업이 끝나면 단계 샘플 기록"""
+    yield from iter_queue(future, output_queue)
+    _, samples = future.result()
+    metrics.observe_stages(samples)
+
+def output_response(endpoint, outputs, archive_name, job_id=None, on_close=None):
+    """
+    출력 1개 → 이미지 그대로, 여러 개 → 완성되는 대로 ZIP 스트리밍
+
+    첫 출력 전의 실패는 예외로 올라가 호출한 쪽에서 {"success": False} 응답
+    """
+    try:
+        head, outputs = split_first(outputs)
+    except BaseException:
+        if on_close is not None:
+            on_close()
+        raise
+
+    if len(head) <= 1:
+        if on_close is not None:
+            on_close()
+        if not head:
+            raise ValueError("생성된 출력 파일이 없습니다.")
+        name, data = head[0]
+        return Response(data, media_type=media_type(name),
+                        headers={"Content-Disposition": content_disposition("inline", name)})
+
+    return StreamingResponse(
+        zip_stream(outputs, on_error=lambda e: failure_response(endpoint, e, job_id), on_close=on_close),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": content_disposition("attachment", archive_name)},
+    )
+
+def stream_job(endpoint, lane, file, ext, cache_key, archive_name, submit, open_source=None):
+    """
+    response_mode=stream: 결과를 디스크에 쓰지 않고 응답 본문으로 바로 전송
+
+    submit(source, file_id, work_dir, output_queue) → 워커 future (source: receive_upload() 결과)
+    open_source(file_id): 입력을 다르게 받을 때 source를 돌려주는 컨텍스트 매니저 (예: pdf_input)
+    (대기열 자리와 작업 공간은 응답을 다 보낸 뒤 반납)
+    """
+    cached_files = result_cache.peek(cache_key)
+    if cached_files is not None:
+        return output_response(endpoint, cached_outputs(cached_files), archive_name)
+
+    ticket = scheduler.admit(lane)
+    file_id = str(uuid.uuid4())
+    cleanup = contextlib.ExitStack()
+    cleanup.callback(ticket.cancel)
+    cleanup.callback(release_upload, file_id)
+    try:
+        cleanup.enter_context(ticket)
+        if open_source is not None:
+            source = cleanup.enter_context(open_source(file_id))
+        else:
+            source = receive_upload(file, file_id, ext, lane)
+        output_queue = worker_pool.make_queue()
+        future = submit(source, file_id, retention.workspace(file_id), output_queue)
+        return output_response(endpoint, relay_outputs(future, output_queue), archive_name,
+                               job_id=file_id, on_close=cleanup.close)
+    except BaseException:
+        cleanup.close()
+        raise
+
+def run_image_job(source, file_id, remove_watermark, optimize_blog, output_format, encode=(None, None)):
+    """워터마크 제거 → 블로그 최적화 (예열된 워커 프로세스에서 실행, source: 경로 또는 bytes)"""
+    output_names, samples = worker_pool.run(
+        tasks.run_instrumented, tasks.image_pipeline, file_id,
+        source, file_id, OUTPUT_DIR,
+        remove_watermark, optimize_blog, output_format, *encode
+    )
+    metrics.observe_stages(samples)
+    output_files = [f"/output/{name}" for name in output_names]
+    retention.register(output_files)
+    return output_files
+
+def run_pdf_job(input_path, file_id, merge_pages, target_width, output_format, pages, on_progress=None,
+                encode=(None, None)):
+    """
+    PDF 처리 (예열된 워커 프로세스에서 실행)
+
+    on_progress: 진행 이벤트(dict)를 받을 콜백. 워커가 큐에 넣은 이벤트를 이 스레드에서 전달한다.
+    encode: parse_encode_options() 결과 (프로필, auto 지연 예산)
+
+    반환값: (출력 URL 목록, {"selectedPages", "renderedPages", "totalPages"})
+    """
+    output_subdir = os.path.join(OUTPUT_DIR, file_id) # 별도 폴더 사용
+    # 배치 모드의 페이지 임시 파일 (작업이 실패해도 release_upload()에서 삭제)
+    retention.track_intermediate(file_id, os.path.join(output_subdir, "temp_pages"))
+
+    progress_queue = worker_pool.make_queue() if on_progress else None
+    future = worker_pool.submit(
+        tasks.run_instrumented, tasks.pdf_pipeline, file_id,
+        input_path, output_subdir,
+        merge_pages, target_width, output_format, pages, progress_queue,
+        PDF_PAGE_WORKERS, PDF_MAX_PAGES_IN_FLIGHT or None, *encode,
+        render_mode=PDF_RENDER_MODE, rasterizer=PDF_RASTERIZER
+    )
+
+    if progress_queue is not None:
+        # 작업이 끝날 때까지 진행 이벤트 중계
+        for event in iter_queue(future, progress_queue):
+            on_progress(event)
+
+    result, samples = future.result()
+    metrics.observe_stages(samples)
+    page_counts = {
+        "selectedPages": result["pages"],
+        "renderedPages": result["rendered_pages"],
+        "totalPages": result["total_pages"],
+    }
+
+    # 생성된 파일 목록 조회
+    generated_files = []
+    if os.path.exists(output_subdir):
+        for f in sorted(os.listdir(output_subdir)):
+             generated_files.append(f"/output/{file_id}/{f}")
+    retention.register(generated_files)
+    return generated_files, page_counts
+
 @app.post("/process-image")
 def process_image(
     file: UploadFile = File(...),
     remove_watermark: bool = Form(True),
     optimize_blog: bool = Form(True),
-    output_format: str = Form('webp')
+    output_format: str = Form('webp'),
+    encode_profile: str = Form(None),  # fast / balanced / smallest / auto
+    latency_budget_ms: int = Form(None),  # auto 모드 인코딩 지연 예산
+    response_mode: str = Form('url')  # url: 출력 경로 목록 / stream: 이미지(여러 개면 ZIP)를 바로 응답
 ):
-    try:
-        # 파일 저장
-        file_id = str(uuid.uuid4())
-        ext = os.path.splitext(file.filename)[1]
-        input_path = os.path.join(UPLOAD_DIR, f"{file_id}{ext}")
-        
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+    def submit_stream(source, file_id, work_dir, output_queue):
+        return worker_pool.submit(
+            tasks.run_instrumented, tasks.image_pipeline, file_id,
+            source, file_id, work_dir,
+            remove_watermark, optimize_blog, output_format, *encode, output_queue
+        )
 
-        output_files = []
-        current_path = input_path
-
-        # 1. 워터마크 제거
-        if remove_watermark:
-            script_path = os.path.join(SCRIPTS_DIR, "remove_watermark.py")
-            # remove_watermark.py는 원본을 덮어쓰거나 _no_wm을 붙임. 
-            subprocess.run(["python", script_path, current_path], check=True)
-            
-            # remove_watermark.py는 output 인자가 없으면 {파일명}_clean{확장자}로 저장함
-            # 다음 단계(최적화)에서 이 clean 파일을 사용하도록 current_path 업데이트
-            base, ext = os.path.splitext(current_path)
-            current_path = f"{base}_clean{ext}"
-
-        # 2. 블로그 최적화
-        if optimize_blog:
-            script_path = os.path.join(SCRIPTS_DIR, "optimize_blog.py")
-            final_output_name = f"{file_id}_optimized.{output_format if output_format != 'both' else 'webp'}"
-            final_output_path = os.path.join(OUTPUT_DIR, final_output_name)
-            
-            subprocess.run([
-                "python", script_path, 
-                current_path, 
-                final_output_path
-            ], check=True)
-             
-            output_files.append(f"/output/{final_output_name}")
-            if output_format == 'both':
-                 output_files.append(f"/output/{final_output_name.replace('.webp', '.jpg')}")
+    def compute():
+        file_id = None
+        try:
+            with scheduler.admit("image"):
+                file_id = str(uuid.uuid4())
+                ext = os.path.splitext(file.filename)[1]
+                source = receive_upload(file, file_id, ext, "image")
+                return run_image_job(source, file_id, remove_watermark, optimize_blog, output_format, encode)
+        finally:
+            release_upload(file_id)
+
+    try:
+        # 같은 파일 + 같은 옵션이면 캐시된 결과 반환 (동시 요청은 한 번만 계산)
+        encode = parse_encode_options(encode_profile, latency_budget_ms)
+        key = image_cache_key(file, remove_watermark, optimize_blog, output_format, encode)
+        if parse_response_mode(response_mode) == "stream":
+            ext = os.path.splitext(file.filename)[1]
+            return stream_job("/process-image", "image", file, ext, key, "images.zip", submit_stream)
+        output_files, cached = result_cache.get_or_compute(key, compute)
 
         return {
             "success": True,
-            "outputFiles": output_files
+            "outputFiles": output_files,
+            "cached": cached
         }
 
+    except QueueFullError as e:
+        return queue_full_response(e)
+
     except Exception as e:
-        return {"success": False, "error": str(e)}
-    
-    finally:
-        # Cloud Run 메모리 확보를 위해 원본 파일 즉시 삭제
-        if 'input_path' in locals() and os.path.exists(input_path):
-            try:
-                os.remove(input_path)
-                print(f"🗑️ 메모리 확보: 원본 삭제 완료 ({input_path})")
-            except:
-                pass
-        # 중간 생성된 _clean 파일 등도 삭제 필요하면 추가 가능하지만, 
-        # current_path가 덮어씌워져서 복잡함. 일단 원본이 가장 큼.
+        return failure_response("/process-image", e)
 
 @app.post("/process-pdf")
 def process_pdf(
-    file: UploadFile = File(...),
+    file: UploadFile = File(None),
+    source_id: str = Form(None),  # /pdf-preview 응답의 sourceId (보관 중이면 파일 없이 요청 가능)
     merge_pages: bool = Form(True),
     target_width: int = Form(1200),
     output_format: str = Form('webp'),
-    selected_pages: str = Form(None) # JSON String "[1, 2, 3]" or None
+    selected_pages: str = Form(None), # JSON String "[1, 2, 3]" or None
+    encode_profile: str = Form(None),  # fast / balanced / smallest / auto
+    latency_budget_ms: int = Form(None),  # auto 모드 인코딩 지연 예산
+    response_mode: str = Form('url')  # url: 출력 경로 목록 / stream: 이미지(여러 개면 ZIP)를 바로 응답
 ):
+    pages = parse_selected_pages(selected_pages)
+
+    def submit_stream(input_path, file_id, work_dir, output_queue):
+        # 페이지 임시 파일도 작업 공간 안에 두어 응답이 끝나면 함께 삭제
+        return worker_pool.submit(
+            tasks.run_instrumented, tasks.pdf_pipeline, file_id,
+            input_path, os.path.join(work_dir, "output"),
+            merge_pages, target_width, output_format, pages, None,
+            PDF_PAGE_WORKERS, PDF_MAX_PAGES_IN_FLIGHT or None, *encode, output_queue,
+            render_mode=PDF_RENDER_MODE, rasterizer=PDF_RASTERIZER
+        )
+
+    # 이번 요청에서 실제로 처리한 페이지 수 (캐시 적중이면 비어 있음 → 렌더링 0)
+    page_counts = {}
+
+    def compute():
+        file_id = None
+        try:
+            with scheduler.admit("pdf"):
+                file_id = str(uuid.uuid4())
+                with pdf_input(file, content_hash, file_id) as input_path:
+                    generated_files, counts = run_pdf_job(input_path, file_id, merge_pages, target_width,
+                                                          output_format, pages, encode=encode)
+                    page_counts.update(counts)
+                    return generated_files
+        finally:
+            release_upload(file_id)
+
     try:
-        file_id = str(uuid.uuid4())
-        input_path = os.path.join(UPLOAD_DIR, f"{file_id}.pdf")
-        
-        with open(input_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-            
-        # PDF 처리 스크립트 실행
-        script_path = os.path.join(SCRIPTS_DIR, "pdf_smart.py")
-        output_subdir = os.path.join(OUTPUT_DIR, file_id) # 별도 폴더 사용
-        
-        cmd = [
-            "python", script_path,
-            input_path,
-            "none", # logo path
-            output_subdir,
-            str(merge_pages).lower(),
-            str(target_width),
-            output_format
-        ]
-        
-        # 선택된 페이지가 있으면 인자로 추가
-        if selected_pages:
-            try:
-                # JSON 파싱 검증
-                pages_list = json.loads(selected_pages)
-                if isinstance(pages_list, list) and len(pages_list) > 0:
-                    cmd.append("--pages")
-                    cmd.append(",".join(map(str, pages_list)))
-            except:
-                pass # 파싱 실패 시 전체 처리
-        
-        subprocess.run(cmd, check=True)
-        
-        # 생성된 파일 목록 조회
-        generated_files = []
-        if os.path.exists(output_subdir):
-            for f in os.listdir(output_subdir):
-                 generated_files.append(f"/output/{file_id}/{f}")
+        # 같은 PDF + 같은 옵션이면 캐시된 결과 반환 (동시 요청은 한 번만 계산)
+        encode = parse_encode_options(encode_profile, latency_budget_ms)
+        content_hash = pdf_content_hash(file, source_id)
+        key = pdf_cache_key(content_hash, merge_pages, target_width, output_format, pages, encode)
+        if parse_response_mode(response_mode) == "stream":
+            filename = (file.filename if file is not None else None) or "pages"
+            archive_name = os.path.splitext(os.path.basename(filename))[0] + ".zip"
+            return stream_job("/process-pdf", "pdf", file, ".pdf", key, archive_name, submit_stream,
+                              open_source=lambda file_id: pdf_input(file, content_hash, file_id))
+        generated_files, cached = result_cache.get_or_compute(key, compute)
 
         return {
             "success": True,
-            "outputFiles": generated_files
+            "outputFiles": generated_files,
+            "cached": cached,
+            "selectedPages": page_counts.get("selectedPages"),
+            "renderedPages": page_counts.get("renderedPages", 0),
+            "totalPages": page_counts.get("totalPages")
         }
 
+    except QueueFullError as e:
+        return queue_full_response(e)
+
+    except SourceExpiredError as e:
+        return source_expired_response("/process-pdf", e)
+
     except Exception as e:
-        return {"success": False, "error": str(e)}
+        return failure_response("/process-pdf", e)
+
+# ─────────────────────────────────────────────────────────────────
+# 배치 API (여러 이미지 + 같은 옵션 → 워커 프로세스에 나눠 동시 처리)
+# ─────────────────────────────────────────────────────────────────
+
+def batch_entry_name(index, filename, output_name):
+    """ZIP 항목 이름: 순번_원본파일명.확장자 (같은 이름의 파일이 여러 개여도 겹치지 않음)"""
+    stem = os.path.splitext(os.path.basename(filename or "image"))[0]
+    return f"{index + 1:03d}_{stem}{os.path.splitext(output_name)[1]}"
+
+def batch_summary(results):
+    succeeded = sum(1 for r in results if r["success"])
+    return {"results": results, "succeeded": succeeded, "failed": len(results) - succeeded}
+
+def run_batch_file(file, key, remove_watermark, optimize_blog, output_format, encode):
+    """배치 파일 1개 → /output/ 경로 (파일별로 결과 캐시 사용)"""
+    def compute():
+        file_id = str(uuid.uuid4())
+        try:
+            source = receive_upload(file, file_id, os.path.splitext(file.filename or "")[1], "image")
+            return run_image_job(source, file_id, remove_watermark, optimize_blog, output_format, encode)
+        finally:
+            release_upload(file_id)
+
+    output_files, cached = result_cache.get_or_compute(key, compute)
+    return {"outputFiles": output_files, "cached": cached}
+
+def run_batch(files, keys, options):
+    """파일별로 동시에 처리하고 요청 순서대로 결과 목록 반환 (실패한 파일은 {"success": False, "error"})"""
+    futures = [batch_runner.submit(run_batch_file, file, key, *options) for file, key in zip(files, keys)]
+    results = []
+    for file, future in zip(files, futures):
+        try:
+            results.append({"filename": file.filename, "success": True, **future.result()})
+        except Exception as e:
+            results.append({"filename": file.filename, **failure_response("/process-batch", e)})
+    return results
 
+def batch_file_outputs(item, remove_watermark, optimize_blog, output_format, encode):
+    """배치 파일 1개 → [(파일명, bytes), ...] (캐시에 있으면 그대로, 없으면 디스크 없이 워커에서 인코딩)"""
+    _, _, cached_files, source, file_id = item
+    if cached_files is not None:
+        return list(cached_outputs(cached_files))
+    try:
+        outputs, samples = worker_pool.run(
+            tasks.run_instrumented, tasks.image_outputs_in_memory, file_id,
+            source, file_id, remove_watermark, optimize_blog, output_format, *encode
+        )
     finally:
-        # Cloud Run 메모리 확보를 위해 PDF 원본 즉시 삭제
-        if 'input_path' in locals() and os.path.exists(input_path):
+        release_upload(file_id)
+    metrics.observe_stages(samples)
+    return outputs
+
+def stream_batch_outputs(items, options):
+    """파일이 끝나는 순서대로 ZIP 항목을 내보내고 마지막에 manifest.json (파일별 성공/실패)"""
+    futures = {batch_runner.submit(batch_file_outputs, item, *options): item for item in items}
+    results = [None] * len(items)
+    try:
+        for future in as_completed(futures):
+            index, filename = futures[future][:2]
             try:
-                os.remove(input_path)
-                print(f"🗑️ 메모리 확보: PDF 원본 삭제 완료 ({input_path})")
-            except:
-                pass
+                outputs = future.result()
+            except Exception as e:
+                results[index] = {"filename": filename, **failure_response("/process-batch", e)}
+                continue
+            names = []
+            for name, data in outputs:
+                names.append(batch_entry_name(index, filename, name))
+                yield names[-1], data
+            results[index] = {"filename": filename, "success": True, "files": names}
+    finally:
+        # 클라이언트가 끊으면 아직 시작하지 않은 파일은 취소
+        for future in futures:
+            future.cancel()
+    manifest = json.dumps(batch_summary(results), ensure_ascii=False, indent=2)
+    yield "manifest.json", manifest.encode("utf-8")
+
+def stream_batch(files, keys, options, ticket):
+    """
+    배치 결과를 ZIP으로 스트리밍
+
+    업로드는 응답을 시작하기 전에 모두 받아 둠 (작은 이미지는 메모리, 큰 이미지는 작업 공간)
+    """
+    cleanup = contextlib.ExitStack()
+    cleanup.callback(ticket.cancel)
+    try:
+        cleanup.enter_context(ticket)
+        items = []
+        for index, (file, key) in enumerate(zip(files, keys)):
+            cached_files = result_cache.peek(key)
+            if cached_files is not None:
+                items.append((index, file.filename, cached_files, None, None))
+                continue
+            file_id = str(uuid.uuid4())
+            cleanup.callback(release_upload, file_id)
+            source = receive_upload(file, file_id, os.path.splitext(file.filename or "")[1], "image")
+            items.append((index, file.filename, None, source, file_id))
+    except BaseException:
+        cleanup.close()
+        raise
+
+    return StreamingResponse(
+        zip_stream(stream_batch_outputs(items, options),
+                   on_error=lambda e: failure_response("/process-batch", e), on_close=cleanup.close),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": content_disposition("attachment", "batch.zip")},
+    )
+
+@app.post("/process-batch")
+def process_batch(
+    files: List[UploadFile] = File(...),
+    remove_watermark: bool = Form(True),
+    optimize_blog: bool = Form(True),
+    output_format: str = Form('webp'),
+    encode_profile: str = Form(None),  # fast / balanced / smallest / auto
+    latency_budget_ms: int = Form(None),  # auto 모드 인코딩 지연 예산
+    response_mode: str = Form('url')  # url: 파일별 결과 목록 / stream: ZIP (+ manifest.json)
+):
+    """
+    여러 이미지를 같은 옵션으로 한 번에 처리 (워커 프로세스 수만큼 동시 실행)
+
+    - url: {"success", "results": [{"filename", "success", "outputFiles" | "error"}, ...], "succeeded", "failed"}
+    - stream: 끝나는 순서대로 "순번_원본이름.확장자" ZIP 항목, 마지막에 manifest.json
+    - 파일 하나가 실패해도 나머지는 계속 처리하고 실패는 파일별로 보고
+    """
+    try:
+        encode = parse_encode_options(encode_profile, latency_budget_ms)
+        mode = parse_response_mode(response_mode)
+        if len(files) > MAX_BATCH_FILES:
+            raise ValueError(f"한 번에 최대 {MAX_BATCH_FILES}개까지 처리할 수 있습니다. (요청: {len(files)}개)")
+        keys = [image_cache_key(file, remove_watermark, optimize_blog, output_format, encode) for file in files]
+        options = (remove_watermark, optimize_blog, output_format, encode)
+
+        ticket = scheduler.admit("batch")
+        if mode == "stream":
+            return stream_batch(files, keys, options, ticket)
+        with ticket:
+            results = run_batch(files, keys, options)
+        return {"success": True, **batch_summary(results)}
+
+    except QueueFullError as e:
+        return queue_full_response(e)
+
+    except Exception as e:
+        return failure_response("/process-batch", e)
+
+# ─────────────────────────────────────────────────────────────────
+# PDF 미리보기 API (페이지 선택용 저해상도 썸네일 → sourceId로 본 처리 요청)
+# ─────────────────────────────────────────────────────────────────
+
+# 응답 방식: sprite (썸네일 격자 한 장 + 페이지별 위치, JSON) / list (페이지별 썸네일을 완성되는 대로 NDJSON 스트리밍)
+PREVIEW_MODES = ("sprite", "list")
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# 워커 작업 하나가 렌더링하는 최대 페이지 수 (페이지를 워커 수만큼 고르게 나누되 첫 결과가 빨리 나오도록)
+PREVIEW_PAGES_PER_TASK = 8
+
+def parse_preview_mode(preview_mode):
+    mode = (preview_mode or "sprite").lower()
+    if mode not in PREVIEW_MODES:
+        raise ValueError(f"알 수 없는 미리보기 방식: {preview_mode} (사용 가능: {', '.join(PREVIEW_MODES)})")
+    return mode
+
+def keep_pdf_source(file, source_id):
+    """업로드 PDF를 원본 보관소에 저장 (같은 내용이 이미 있으면 생략) → sourceId"""
+    content_hash = pdf_content_hash(file, source_id)
+    if file is not None:
+        with stage("upload_save"):
+            pdf_sources.put(file.file, content_hash)
+    return content_hash
+
+def preview_page_count(source_id, input_path):
+    """페이지 수 (원본별로 한 번만 워커에서 문서를 열어 확인)"""
+    page_count = pdf_sources.get_info(source_id, "pages")
+    if page_count is None:
+        page_count = worker_pool.run(tasks.pdf_page_count, input_path, PDF_RASTERIZER)
+        pdf_sources.set_info(source_id, "pages", page_count)
+    return page_count
+
+def preview_ranges(page_count):
+    """1 ~ page_count → 워커 작업별 연속 구간 [(first, last), ...]"""
+    per_task = max(1, min(PREVIEW_PAGES_PER_TASK, math.ceil(page_count / worker_pool.max_workers)))
+    return [(first, min(first + per_task - 1, page_count)) for first in range(1, page_count + 1, per_task)]
+
+def iter_preview_tiles(source_id, input_path, page_count, thumb_width, job_id):
+    """
+    구간별로 워커에 나눠 동시에 렌더링, 끝난 구간부터 (페이지, (너비, 높이), WebP bytes) 전달
+
+    모두 끝나면 원본 정보에 캐시 → 같은 PDF·같은 너비의 미리보기는 다시 렌더링하지 않음
+    """
+    cache_key = ("tiles", thumb_width)
+    cached = pdf_sources.get_info(source_id, cache_key)
+    if cached is not None:
+        yield from cached
+        return
+
+    futures = [
+        worker_pool.submit(tasks.run_instrumented, tasks.pdf_preview_tiles, job_id,
+                           input_path, first, last, thumb_width, PDF_RASTERIZER)
+        for first, last in preview_ranges(page_count)
+    ]
+    tiles = []
+    try:
+        for future in as_completed(futures):
+            chunk, samples = future.result()
+            metrics.observe_stages(samples)
+            tiles.extend(chunk)
+            yield from chunk
+    finally:
+        # 클라이언트가 끊었거나 실패하면 아직 시작하지 않은 구간 취소
+        for future in futures:
+            future.cancel()
+    pdf_sources.set_info(source_id, cache_key, sorted(tiles))
+
+def preview_header(source_id, thumb_width, cached):
+    return {
+        "success": True,
+        "sourceId": source_id,
+        "pageCount": pdf_sources.get_info(source_id, "pages"),
+        "thumbWidth": thumb_width,
+        "cached": cached,
+        "expiresInSeconds": PDF_SOURCE_TTL_SECONDS,
+    }
+
+def preview_sprite(source_id, thumb_width):
+    """스프라이트 미리보기 (원본별 캐시, 없으면 대기열 → 썸네일 동시 렌더링 → 격자 합성)"""
+    cache_key = ("sprite", thumb_width)
+    sprite = pdf_sources.get_info(source_id, cache_key)
+    cached = sprite is not None
+    if not cached:
+        job_id = str(uuid.uuid4())
+        with scheduler.admit("preview"), pdf_sources.use(source_id) as input_path:
+            page_count = preview_page_count(source_id, input_path)
+            tiles = list(iter_preview_tiles(source_id, input_path, page_count, thumb_width, job_id))
+            (data, layout), samples = worker_pool.run(
+                tasks.run_instrumented, tasks.pdf_preview_sprite, job_id, tiles)
+        metrics.observe_stages(samples)
+        sprite = {"data": data, "tiles": layout}
+        pdf_sources.set_info(source_id, cache_key, sprite)
+
+    return {
+        **preview_header(source_id, thumb_width, cached),
+        "sprite": data_url(sprite["data"], "image/webp"),
+        "tiles": sprite["tiles"],
+    }
+
+def stream_preview(source_id, thumb_width):
+    """
+    목록 미리보기: 첫 줄은 sourceId/페이지 수, 이후 한 줄에 페이지 하나 (완성되는 순서, page로 위치 지정)
+
+    중간에 실패하면 {"success": false, "error"} 줄로 끝남 (상태 코드는 이미 보냈으므로)
+    """
+    cached = pdf_sources.get_info(source_id, ("tiles", thumb_width)) is not None
+    job_id = str(uuid.uuid4())
+    cleanup = contextlib.ExitStack()
+    try:
+        if not cached:
+            ticket = scheduler.admit("preview")
+            cleanup.callback(ticket.cancel)
+            cleanup.enter_context(ticket)
+        input_path = cleanup.enter_context(pdf_sources.use(source_id))
+        page_count = preview_page_count(source_id, input_path)
+    except BaseException:
+        cleanup.close()
+        raise
+
+    def lines():
+        try:
+            yield json_line(preview_header(source_id, thumb_width, cached))
+            for page_num, (width, height), data in iter_preview_tiles(
+                    source_id, input_path, page_count, thumb_width, job_id):
+                yield json_line({"page": page_num, "width": width, "height": height,
+                                 "image": data_url(data, "image/webp")})
+        except Exception as e:
+            yield json_line(failure_response("/pdf-preview", e, job_id))
+        finally:
+            cleanup.close()
+
+    return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/pdf-preview")
+def pdf_preview(
+    file: UploadFile = File(None),
+    source_id: str = Form(None),  # 이전 응답의 sourceId (보관 중이면 파일 없이 요청 가능)
+    thumb_width: int = Form(THUMB_WIDTH),  # 썸네일 폭 (px, 32~400)
+    preview_mode: str = Form('sprite')  # sprite: 격자 한 장 + 위치 (JSON) / list: 페이지별 NDJSON 스트리밍
+):
+    """
+    PDF 전체 페이지 저해상도 미리보기
+
+    - 원본은 내용 해시(sourceId)로 MPS_PDF_SOURCE_TTL_SECONDS 동안 보관 → /process-pdf, /jobs 에 source_id만 보내면
+      PDF를 다시 올리지 않고 바로 처리
+    - 같은 PDF의 미리보기는 캐시 (원본과 함께 만료)
+    """
+    try:
+        mode = parse_preview_mode(preview_mode)
+        thumb_width = clamp_thumb_width(thumb_width)
+        source_id = keep_pdf_source(file, source_id)
+        if mode == "list":
+            return stream_preview(source_id, thumb_width)
+        return preview_sprite(source_id, thumb_width)
+
+    except QueueFullError as e:
+        return queue_full_response(e)
+
+    except SourceExpiredError as e:
+        return source_expired_response("/pdf-preview", e)
+
+    except Exception as e:
+        return failure_response("/pdf-preview", e)
+
+# ─────────────────────────────────────────────────────────────────
+# 비동기 작업 API (대용량 PDF: 즉시 job id 반환 → 상태 조회 / SSE 진행률)
+# ─────────────────────────────────────────────────────────────────
+
+def _run_job_in_background(job, ticket, run, cache_key, release_source=None):
+    """
+    백그라운드 스레드: 실행 슬롯 대기 → 처리 → 상태 기록 → 업로드/중간 파일 삭제
+
+    release_source: 보관 중인 PDF 원본을 빌려 쓴 경우 반납 함수
+    """
+    def compute():
+        with ticket:
+            job.set_running()
+            return run()
+
+    try:
+        output_files, cached = result_cache.get_or_compute(cache_key, compute)
+        job.set_done({"success": True, "outputFiles": output_files, "cached": cached})
+    except Exception as e:
+        metrics.count_error("/jobs")
+        telemetry.log("job_failed", level=logging.ERROR, job_id=job.id, error=str(e))
+        job.set_failed(e)
+    finally:
+        # 같은 요청이 먼저 계산 중이라 결과를 공유받은 경우 대기열 자리 반납
+        ticket.cancel()
+        release_upload(job.id)
+        if release_source is not None:
+            release_source()
+
+@app.post("/jobs", status_code=202)
+def create_job(
+    file: UploadFile = File(None),
+    source_id: str = Form(None),  # /pdf-preview 응답의 sourceId (PDF, 보관 중이면 파일 없이 요청 가능)
+    remove_watermark: bool = Form(True),
+    optimize_blog: bool = Form(True),
+    merge_pages: bool = Form(True),
+    target_width: int = Form(1200),
+    output_format: str = Form('webp'),
+    selected_pages: str = Form(None), # JSON String "[1, 2, 3]" or None
+    encode_profile: str = Form(None),  # fast / balanced / smallest / auto
+    latency_budget_ms: int = Form(None)  # auto 모드 인코딩 지연 예산
+):
+    """
+    작업 등록 후 즉시 job id 반환 (PDF는 배치/페이지별 진행 이벤트 제공)
+
+    - 상태: GET /jobs/{job_id}
+    - 진행률: GET /jobs/{job_id}/events (Server-Sent Events)
+    """
+    ext = os.path.splitext((file.filename if file is not None else None) or "")[1].lower()
+    if file is None:
+        kind = "pdf"
+    else:
+        kind = "pdf" if ext == ".pdf" or file.content_type == "application/pdf" else "image"
+    pages = parse_selected_pages(selected_pages)
+    try:
+        encode = parse_encode_options(encode_profile, latency_budget_ms)
+        if kind == "pdf":
+            content_hash = pdf_content_hash(file, source_id)
+            cache_key = pdf_cache_key(content_hash, merge_pages, target_width, output_format, pages, encode)
+        else:
+            cache_key = image_cache_key(file, remove_watermark, optimize_blog, output_format, encode)
+    except ValueError as e:
+        # 202로 응답하면 클라이언트가 jobId 없이 진행을 기다리므로 실패는 4xx/5xx
+        return failure_response("/jobs", e, status_code=400)
+
+    # 캐시 적중 → 업로드 저장/대기열 없이 완료된 작업으로 반환
+    cached_files = result_cache.peek(cache_key)
+    if cached_files is not None:
+        job = job_store.create(kind)
+        job.set_done({"success": True, "outputFiles": cached_files, "cached": True})
+        return {
+            "success": True,
+            "jobId": job.id,
+            "status": job.status,
+            "statusUrl": f"/jobs/{job.id}",
+            "eventsUrl": f"/jobs/{job.id}/events",
+        }
+
+    try:
+        ticket = scheduler.admit(kind)
+    except QueueFullError as e:
+        return queue_full_response(e)
+
+    job = job_store.create(kind)
+    source_lease = contextlib.ExitStack()
+    try:
+        if kind == "pdf":
+            # 업로드는 요청이 끝나기 전에 저장, 보관 중인 원본은 작업이 끝날 때까지 빌려 둠
+            source = source_lease.enter_context(pdf_input(file, content_hash, job.id))
+        else:
+            source = receive_upload(file, job.id, ext, kind)
+    except Exception as e:
+        ticket.cancel()
+        release_upload(job.id)
+        if isinstance(e, SourceExpiredError):
+            return source_expired_response("/jobs", e, status_code=410)
+        return failure_response("/jobs", e, status_code=500)
+
+    if kind == "pdf":
+        # 페이지 수는 진행 이벤트(complete)로 전달되므로 결과에는 파일 목록만 캐시
+        run = lambda: run_pdf_job(
+            source, job.id, merge_pages, target_width, output_format, pages,
+            on_progress=job.publish, encode=encode
+        )[0]
+    else:
+        run = lambda: run_image_job(source, job.id, remove_watermark, optimize_blog, output_format, encode)
+
+    job_runner.submit(_run_job_in_background, job, ticket, run, cache_key, source_lease.close)
+
+    return {
+        "success": True,
+        "jobId": job.id,
+        "status": job.status,
+        "statusUrl": f"/jobs/{job.id}",
+        "eventsUrl": f"/jobs/{job.id}/events",
+    }
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/events")
+def stream_job_events(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return StreamingResponse(
+        job.sse_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/scheduler/stats")
+def scheduler_stats():
+    """작업 유형별 실행/대기 수, 대기 시간 (인스턴스 크기 조정용)"""
+    return scheduler.stats()
+
+@app.get("/metrics")
+def prometheus_metrics():
+    """단계별 소요 시간/피크 메모리, 엔드포인트별 요청·오류 수 (Prometheus 텍스트 형식)"""
+    return Response(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+@app.get("/cache/stats")
+def cache_stats():
+    """결과 캐시 항목 수, 사용 용량, 적중/미스 횟수"""
+    return result_cache.stats()
+
+@app.get("/retention/stats")
+def retention_stats():
+    """보관 중인 출력 파일 수/용량, TTL·한도, 사유별 삭제 바이트 (+ 미리보기 PDF 원본 보관 현황)"""
+    return {**retention.stats(), "pdfSources": pdf_sources.stats()}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
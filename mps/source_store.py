@@ -0,0 +1,171 @@
+"""
+PDF 원본 보관소 (미리보기 → 본 처리까지 같은 PDF를 다시 업로드하지 않도록)
+
+- 내용 해시(SHA-256)를 source_id로 원본을 보관, 마지막 사용 후 ttl_seconds가 지나면 삭제 (0이면 TTL 없음)
+- 전체 용량이 max_bytes를 넘으면 가장 오래 쓰지 않은 원본부터 삭제 (처리 중인 원본은 제외)
+- 원본별 미리보기 결과(썸네일/스프라이트)와 페이지 수도 메모리에 함께 보관 → 원본과 같이 만료
+- 서버가 재시작되면 이전 원본은 모두 삭제 (목록이 메모리에만 있으므로)
+"""
+import contextlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+
+import telemetry
+
+_SOURCE_ID = re.compile(r"[0-9a-f]{64}")
+
+class SourceExpiredError(LookupError):
+    """보관 기간이 지났거나 모르는 source_id (원본을 다시 업로드해야 함)"""
+
+class SourceStore:
+    """
+    source_id → PDF 원본 파일 (스레드 안전)
+
+    - reset(): 서버 시작 시 이전 원본 삭제
+    - put(fileobj, source_id): 원본 저장 (이미 있으면 사용 시각만 갱신)
+    - use(source_id): 처리하는 동안 원본 경로를 빌림 (빌린 원본은 삭제하지 않음)
+    - get_info / set_info: 원본별 부가 정보 (페이지 수, 미리보기 결과)
+    - sweep(): TTL 만료 + 용량 초과분 삭제
+    """
+
+    def __init__(self, source_dir, ttl_seconds=600, max_bytes=256 * 1024 * 1024, on_reclaim=None):
+        self.source_dir = source_dir
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.on_reclaim = on_reclaim
+
+        self._entries = {}  # source_id → {"path", "bytes", "last_used", "leases", "info"}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self._hits = 0
+        self._removed = 0
+        self._reclaimed = 0
+
+    def reset(self):
+        """
+        서버 시작 시 이전 인스턴스가 남긴 원본 삭제
+
+        (생성자에서 지우지 않음: spawn 워커가 서버 모듈을 다시 import해도 보관 중인 원본이 지워지지 않도록)
+        """
+        shutil.rmtree(self.source_dir, ignore_errors=True)
+        os.makedirs(self.source_dir, exist_ok=True)
+
+    def _path(self, source_id):
+        if not isinstance(source_id, str) or not _SOURCE_ID.fullmatch(source_id):
+            raise SourceExpiredError(f"잘못된 source_id: {source_id}")
+        return os.path.join(self.source_dir, f"{source_id}.pdf")
+
+    def contains(self, source_id):
+        with self._lock:
+            return source_id in self._entries
+
+    def put(self, fileobj, source_id):
+        """업로드 파일 객체를 원본으로 저장 → 경로"""
+        path = self._path(source_id)
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is not None:
+                entry["last_used"] = time.time()
+                self._hits += 1
+                return path
+
+        # 같은 원본이 동시에 올라와도 임시 파일에 쓴 뒤 교체하므로 내용은 항상 온전함
+        os.makedirs(self.source_dir, exist_ok=True)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        fileobj.seek(0)
+        with open(temp_path, "wb") as f:
+            shutil.copyfileobj(fileobj, f)
+        fileobj.seek(0)
+        os.replace(temp_path, path)
+        size = os.path.getsize(path)
+
+        with self._lock:
+            if source_id not in self._entries:
+                self._entries[source_id] = {"path": path, "bytes": size, "last_used": time.time(),
+                                            "leases": 0, "info": {}}
+                self._total_bytes += size
+        telemetry.log("pdf_source_saved", source_id=source_id, bytes=size)
+        if self.max_bytes and self._total_bytes > self.max_bytes:
+            self.sweep()
+        return path
+
+    @contextlib.contextmanager
+    def use(self, source_id):
+        """원본 경로를 빌림 (with 블록 동안은 만료/용량 정리에서 제외)"""
+        self._path(source_id)
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is None:
+                raise SourceExpiredError("미리보기 원본의 보관 기간이 지났습니다. PDF를 다시 업로드하세요.")
+            entry["leases"] += 1
+            entry["last_used"] = time.time()
+            self._hits += 1
+        try:
+            yield entry["path"]
+        finally:
+            with self._lock:
+                entry["leases"] -= 1
+                entry["last_used"] = time.time()
+
+    def get_info(self, source_id, key):
+        """부가 정보 조회 (캐시된 미리보기를 돌려주는 것도 사용으로 보고 사용 시각 갱신)"""
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is None:
+                return None
+            entry["last_used"] = time.time()
+            return entry["info"].get(key)
+
+    def set_info(self, source_id, key, value):
+        with self._lock:
+            entry = self._entries.get(source_id)
+            if entry is not None:
+                entry["info"][key] = value
+
+    def _remove(self, source_id):
+        entry = self._entries.pop(source_id)
+        self._total_bytes -= entry["bytes"]
+        try:
+            os.remove(entry["path"])
+        except OSError:
+            return 0
+        return entry["bytes"]
+
+    def sweep(self):
+        """TTL 만료 → 용량 초과 순서로 삭제 (빌려 간 원본 제외) → 삭제한 원본 수"""
+        now = time.time()
+        removed = reclaimed = 0
+        with self._lock:
+            idle = [(entry["last_used"], source_id) for source_id, entry in self._entries.items()
+                    if entry["leases"] == 0]
+            for last_used, source_id in sorted(idle):
+                expired = self.ttl_seconds and now - last_used > self.ttl_seconds
+                over_quota = self.max_bytes and self._total_bytes > self.max_bytes
+                if not (expired or over_quota):
+                    continue
+                reclaimed += self._remove(source_id)
+                removed += 1
+            self._removed += removed
+            self._reclaimed += reclaimed
+
+        if removed:
+            if self.on_reclaim is not None:
+                self.on_reclaim("source", reclaimed)
+            telemetry.log("pdf_sources_removed", count=removed, bytes=reclaimed)
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sources": len(self._entries),
+                "bytes": self._total_bytes,
+                "maxBytes": self.max_bytes,
+                "ttlSeconds": self.ttl_seconds,
+                "hits": self._hits,
+                "removedSources": self._removed,
+                "reclaimedBytes": self._reclaimed,
+            }
@@ -0,0 +1,97 @@
+"""
+결과 직접 응답 (response_mode=stream)
+
+- 출력이 1개면 이미지 바이트를 그대로 응답 본문으로 (Content-Type: image/webp 등)
+- 여러 개면 파일이 완성되는 대로 ZIP 항목으로 이어 보내는 스트리밍 응답
+  - 이미 압축된 이미지라 무압축(STORED)으로 저장, 항목 뒤에 크기/CRC를 적는 방식이라 전체 크기를 몰라도 됨
+  - 중간에 실패하면 지금까지의 항목 + error.json 으로 ZIP을 마무리 (상태 코드는 이미 보냈으므로)
+- /output/ 경로를 다시 요청할 필요가 없고 결과 파일을 디스크에 쓰지도 않음
+"""
+import base64
+import io
+import itertools
+import json
+import os
+import time
+import zipfile
+from urllib.parse import quote
+
+MEDIA_TYPES = {
+    ".webp": "image/webp",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+ZIP_MEDIA_TYPE = "application/zip"
+
+def media_type(name):
+    return MEDIA_TYPES.get(os.path.splitext(name)[1].lower(), "application/octet-stream")
+
+def data_url(data, media_type):
+    """bytes → data: URL (JSON 응답에 작은 이미지를 바로 넣을 때)"""
+    return f"data:{media_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+def json_line(obj):
+    """NDJSON 스트리밍 응답의 한 줄"""
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+def content_disposition(disposition, filename):
+    """한글 파일명도 깨지지 않도록 filename*(UTF-8) 함께 지정"""
+    stem, ext = os.path.splitext(filename)
+    fallback = stem.encode("ascii", "ignore").decode().replace('"', "").strip() or "download"
+    fallback += ext.encode("ascii", "ignore").decode()
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}"
+
+def split_first(outputs):
+    """
+    출력 이터레이터 → (처음 최대 2개, 전체를 다시 이어 붙인 이터레이터)
+
+    2개를 받기 전에 작업이 끝나면 목록 길이가 1 → 단일 이미지 응답
+    """
+    outputs = iter(outputs)
+    head = list(itertools.islice(outputs, 2))
+    return head, itertools.chain(head, outputs)
+
+class _ChunkWriter(io.RawIOBase):
+    """ZipFile이 쓴 바이트를 모아 두는 seek 불가 스트림 (항목마다 꺼내서 응답으로 보냄)"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+def _entry(name):
+    return zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+
+def zip_stream(outputs, on_error=None, on_close=None):
+    """
+    (이름, bytes) 이터레이터 → ZIP 바이트 조각 제너레이터
+
+    - on_error(e): 중간 실패 시 호출, 반환값(dict)을 error.json 항목으로 기록
+    - on_close(): 응답이 끝나거나 클라이언트가 끊었을 때 호출 (대기열 자리/작업 공간 정리)
+    """
+    writer = _ChunkWriter()
+    try:
+        with zipfile.ZipFile(writer, "w", zipfile.ZIP_STORED) as archive:
+            try:
+                for name, data in outputs:
+                    archive.writestr(_entry(name), data)
+                    yield writer.drain()
+            except Exception as e:
+                error = on_error(e) if on_error else {"success": False, "error": str(e)}
+                archive.writestr(_entry("error.json"), json.dumps(error, ensure_ascii=False))
+        yield writer.drain()
+    finally:
+        if on_close is not None:
+            on_close()
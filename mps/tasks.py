@@ -0,0 +1,157 @@
+"""
+워커 프로세스에서 실행되는 처리 파이프라인
+
+server.py는 이 함수들을 WorkerPool에 넘기기만 한다.
+모든 인자/반환값은 프로세스 간 전달이 가능하도록 경로 문자열, bytes 등 단순 타입만 사용.
+"""
+import io
+import os
+import queue
+import contextlib
+import logging
+
+from PIL import Image
+
+from worker_pool import SCRIPTS_DIR  # noqa: F401  (scripts 경로 등록)
+from remove_watermark import clean_image, find_watermark
+from optimize_blog import optimize_blog
+from multi_format import normalize_formats
+from pdf_smart import process_pdf_optimized
+from pdf_preview import render_thumbnails, make_sprite
+from rasterizer import open_rasterizer
+from output_sink import capture
+import telemetry
+
+def summarize_samples(samples):
+    """단계별 합계 {단계: {"count", "seconds", "peak_rss_mb"}} (작업 요약 로그용)"""
+    summary = {}
+    for sample in samples:
+        entry = summary.setdefault(sample["stage"], {"count": 0, "seconds": 0.0, "peak_rss_mb": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += sample["seconds"]
+        entry["peak_rss_mb"] = max(entry["peak_rss_mb"], sample.get("peak_rss_bytes", 0) / (1024 * 1024))
+    for entry in summary.values():
+        entry["seconds"] = round(entry["seconds"], 4)
+        entry["peak_rss_mb"] = round(entry["peak_rss_mb"], 1)
+    return summary
+
+def outputs_to_queue(output_queue, output_dir):
+    """
+    출력 파일을 디스크 대신 output_queue로 보내는 범위 (output_queue가 None이면 그대로 저장)
+
+    큐 항목: (output_dir 기준 상대 경로, bytes) → 서버가 도착하는 대로 응답에 씀
+    """
+    if output_queue is None:
+        return contextlib.nullcontext()
+    return capture(lambda path, data: output_queue.put((os.path.relpath(path, output_dir), data)))
+
+def run_instrumented(fn, job_id, *args, **kwargs):
+    """
+    파이프라인 함수를 작업 id 범위에서 실행 (워커 프로세스)
+
+    - 단계별 시간/피크 메모리 샘플을 모아 결과와 함께 반환 → 서버가 /metrics에 반영
+    - 스크립트의 print()는 job_id가 붙은 JSON 로그 줄로 출력
+
+    Returns:
+    - (fn 결과, 샘플 목록)
+    """
+    with telemetry.job(job_id, track_peak=True) as samples:
+        telemetry.log("job_started", pipeline=fn.__name__)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            telemetry.log("job_failed", level=logging.ERROR, pipeline=fn.__name__, error=str(e),
+                          stages=summarize_samples(samples))
+            raise
+        telemetry.log("job_finished", pipeline=fn.__name__, stages=summarize_samples(samples))
+    return result, samples
+
+def image_pipeline(source, file_id, output_dir, use_remove_watermark=True,
+                   use_optimize_blog=True, output_format='webp', encode_profile=None,
+                   latency_budget_ms=None, output_queue=None):
+    """
+    이미지 1장 처리: 워터마크 감지 → 제거 (있을 때만) → 블로그 최적화
+
+    source: 입력 이미지 경로 또는 업로드 내용(bytes, 작은 업로드는 디스크를 거치지 않음)
+    워터마크가 없고 원본이 이미 출력 규격(포맷, 너비, 용량)을 만족하면 원본 bytes를 그대로 출력
+    encode_profile / latency_budget_ms: 블로그 최적화 인코딩 프로필 (encode_profiles.py)
+    output_queue: 지정하면 최종 출력을 디스크 대신 큐로 보냄 (outputs_to_queue)
+
+    Returns:
+    - output_dir 기준 상대 파일명 목록
+    """
+    output_names = []
+    current = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    original = source
+
+    # 1. 워터마크 제거 (결과 이미지를 _clean 파일로 저장했다 다시 읽지 않고 메모리로 넘김)
+    if use_remove_watermark:
+        current = Image.open(current)
+        watermark = find_watermark(current)
+        telemetry.log("watermark_detected", found=watermark["found"], box=watermark["box"],
+                      score=watermark["score"])
+        if watermark["found"]:
+            original = None
+        current = clean_image(current, watermark=watermark)
+
+    # 2. 블로그 최적화 (요청한 포맷만 동시에 인코딩)
+    if use_optimize_blog:
+        formats = [f for f in normalize_formats(output_format) if f in ('webp', 'jpeg')] or ['webp']
+        final_output_path = os.path.join(output_dir, f"{file_id}_optimized.webp")
+
+        with outputs_to_queue(output_queue, output_dir):
+            saved = optimize_blog(current, final_output_path, formats=formats,
+                                  profile=encode_profile, latency_budget_ms=latency_budget_ms,
+                                  original=original)
+        output_names.extend(os.path.basename(p) for p in saved)
+
+    return output_names
+
+def image_outputs_in_memory(source, file_id, use_remove_watermark=True, use_optimize_blog=True,
+                            output_format='webp', encode_profile=None, latency_budget_ms=None):
+    """
+    image_pipeline과 같지만 결과를 디스크에 쓰지 않고 [(파일명, bytes), ...]로 반환 (배치 ZIP 응답용)
+    """
+    outputs = queue.SimpleQueue()
+    image_pipeline(source, file_id, os.curdir, use_remove_watermark, use_optimize_blog, output_format,
+                   encode_profile, latency_budget_ms, output_queue=outputs)
+    return [outputs.get() for _ in range(outputs.qsize())]
+
+def pdf_pipeline(input_path, output_subdir, merge_pages=True, target_width=1200,
+                 output_format='webp', selected_pages=None, progress_queue=None,
+                 page_workers=1, max_pages_in_flight=None, encode_profile=None,
+                 latency_budget_ms=None, output_queue=None, render_mode='width', rasterizer='auto'):
+    """
+    PDF 처리 (로고 없음)
+
+    progress_queue: 서버 프로세스로 진행 이벤트를 보낼 큐 (WorkerPool.make_queue())
+    page_workers: 2 이상이면 페이지를 여러 프로세스로 나눠 처리 (병렬 모드)
+    encode_profile / latency_budget_ms: 출력 인코딩 프로필 (encode_profiles.py)
+    output_queue: 지정하면 결과 파일을 디스크 대신 큐로 보냄 (페이지별 출력은 인코딩되는 대로 전달)
+    render_mode: 'width' (페이지마다 목표 너비로 렌더링) / 'dpi' (첫 페이지 기준 DPI)
+    rasterizer: 'auto' / 'pdfium' / 'pdf2image' (rasterizer.py)
+
+    반환값: process_pdf_optimized() 결과 (출력 파일, 선택/렌더링/전체 페이지 수)
+    """
+    progress = progress_queue.put if progress_queue is not None else None
+    with outputs_to_queue(output_queue, output_subdir):
+        return process_pdf_optimized(
+            input_path, "none", output_subdir,
+            merge_pages, target_width, output_format, selected_pages,
+            progress=progress, workers=page_workers, max_pages_in_flight=max_pages_in_flight,
+            encode_profile=encode_profile, latency_budget_ms=latency_budget_ms,
+            render_mode=render_mode, rasterizer=rasterizer
+        )
+
+def pdf_page_count(input_path, rasterizer='auto'):
+    """PDF 페이지 수 (미리보기를 워커별 구간으로 나누기 위해, 서버 프로세스에서는 문서를 열지 않음)"""
+    with open_rasterizer(input_path, rasterizer) as raster:
+        return raster.page_count
+
+def pdf_preview_tiles(input_path, first_page, last_page, thumb_width, rasterizer='auto'):
+    """PDF 구간 썸네일 → [(페이지 번호, (너비, 높이), WebP bytes), ...]"""
+    return render_thumbnails(input_path, first_page, last_page, thumb_width, rasterizer)
+
+def pdf_preview_sprite(thumbnails):
+    """썸네일 목록 → (스프라이트 WebP bytes, 페이지별 위치)"""
+    return make_sprite(thumbnails)
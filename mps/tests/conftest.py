@@ -0,0 +1,51 @@
+"""
+테스트 공통 설정
+
+서버 모듈(mps/)과 처리 스크립트(mps/scripts/)는 평평한 import를 쓰므로 두 경로를 sys.path에 추가
+"""
+import os
+import sys
+
+import pytest
+
+MPS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (MPS_DIR, os.path.join(MPS_DIR, "scripts")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+@pytest.fixture(scope="session")
+def server(tmp_path_factory):
+    """
+    서버 모듈 (업로드/출력 폴더는 임시 폴더, 워커 2개)
+
+    설정은 import 시점에 환경변수에서 읽으므로 처음 import하기 전에 지정
+    """
+    os.environ.setdefault("MPS_DATA_DIR", str(tmp_path_factory.mktemp("mps-data")))
+    os.environ.setdefault("MPS_WORKERS", "2")
+    import server as server_module
+    return server_module
+
+@pytest.fixture(scope="session")
+def client(server):
+    """예열된 워커 풀과 함께 시작한 TestClient (세션 동안 유지)"""
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+@pytest.fixture(scope="session")
+def pdf_bytes():
+    """3페이지 PDF (흰 바탕 + 페이지마다 위치가 다른 회색 상자), 서버 PDF 엔드포인트 테스트용"""
+    import io
+
+    from PIL import Image
+
+    pages = []
+    for i in range(3):
+        page = Image.new("RGB", (600, 340), (255, 255, 255))
+        page.paste((80, 80, 80), (50 + i * 20, 60, 300, 200))
+        pages.append(page)
+    buf = io.BytesIO()
+    pages[0].save(buf, "PDF", save_all=True, append_images=pages[1:], resolution=72)
+    return buf.getvalue()
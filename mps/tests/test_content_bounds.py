@@ -0,0 +1,82 @@
+"""
+컨텐츠 영역 감지: 축소 → 원본 순서 스캔(_content_bounds_coarse)이 전체 해상도 스캔과 항상 같은지
+
+- 드문드문 찍힌 1~3px 점 (threshold 240 바로 아래/위 회색), 샘플 사이에 빠지는 얇은 선
+- 빈 페이지, factor*2보다 작은 이미지 (전체 스캔 경로), L / RGB 모드
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from pdf_smart import (CONTENT_PADDING, CONTENT_SCAN_FACTOR, _content_bounds_coarse, _content_bounds_full,
+                       detect_content_bounds)
+
+THRESHOLD = 240
+
+def sparse_specks(rng, width, height, count, background=255):
+    """배경 위에 1~3px 점 count개 (회색 239/240/230/0 중 하나, 240은 컨텐츠가 아님)"""
+    arr = np.full((height, width), background, dtype=np.uint8)
+    for _ in range(count):
+        size = int(rng.integers(1, 4))
+        x = int(rng.integers(0, width))
+        y = int(rng.integers(0, height))
+        arr[y:y + size, x:x + size] = rng.choice([239, 240, 230, 0])
+    return arr
+
+def expected_box(img):
+    """전체 해상도 스캔 + 여백 (detect_content_bounds의 기대값)"""
+    bounds = _content_bounds_full(img, THRESHOLD)
+    if bounds is None:
+        return (0, 0, img.width, img.height)
+    left, top, right, bottom = (int(v) for v in bounds)
+    return (max(0, left - CONTENT_PADDING), max(0, top - CONTENT_PADDING),
+            min(img.width, right + CONTENT_PADDING), min(img.height, bottom + CONTENT_PADDING))
+
+@pytest.mark.parametrize("seed", range(400))
+def test_random_sparse_specks_match_full_scan(seed):
+    rng = np.random.default_rng(seed)
+    width = int(rng.integers(16, 400))
+    height = int(rng.integers(16, 300))
+    arr = sparse_specks(rng, width, height, int(rng.integers(0, 6)))
+    img = Image.fromarray(arr) if seed % 2 else Image.fromarray(np.stack([arr] * 3, axis=2))
+
+    assert _content_bounds_coarse(img, THRESHOLD, CONTENT_SCAN_FACTOR) == _content_bounds_full(img, THRESHOLD)
+    assert detect_content_bounds(img) == expected_box(img)
+
+@pytest.mark.parametrize("factor", [2, 4, 8, 16])
+@pytest.mark.parametrize("seed", range(20))
+def test_other_factors_match_full_scan(factor, seed):
+    rng = np.random.default_rng(1000 + seed)
+    img = Image.fromarray(sparse_specks(rng, 257, 191, 4))
+    assert _content_bounds_coarse(img, THRESHOLD, factor) == _content_bounds_full(img, THRESHOLD)
+
+@pytest.mark.parametrize("value,found", [(239, True), (240, False)])
+def test_single_pixel_near_threshold(value, found):
+    arr = np.full((120, 160), 255, dtype=np.uint8)
+    arr[37, 91] = value
+    img = Image.fromarray(arr)
+    bounds = _content_bounds_coarse(img, THRESHOLD, CONTENT_SCAN_FACTOR)
+    assert bounds == ((91, 37, 91, 37) if found else None)
+
+def test_thin_lines_between_samples():
+    """샘플 위치(블록 중앙)를 비껴가는 1px 선 → 축소 이미지에는 없고 여백 확인에서 찾음"""
+    arr = np.full((200, 240), 255, dtype=np.uint8)
+    arr[50:150, 60:180] = 0          # 축소 이미지에서 보이는 블록
+    arr[3, 10:230] = 200             # 위쪽 가로선 (행 3은 샘플 행 4와 다름)
+    arr[20:190, 235] = 200           # 오른쪽 세로선
+    img = Image.fromarray(arr)
+    assert _content_bounds_coarse(img, THRESHOLD, CONTENT_SCAN_FACTOR) == (10, 3, 235, 189)
+    assert detect_content_bounds(img) == expected_box(img)
+
+def test_blank_page_is_whole_image():
+    img = Image.new("RGB", (300, 200), (255, 255, 255))
+    assert detect_content_bounds(img) == (0, 0, 300, 200)
+
+@pytest.mark.parametrize("size", [(1, 1), (5, 40), (15, 15), (40, 15)])
+def test_smaller_than_two_blocks_uses_full_scan(size):
+    width, height = size
+    arr = np.full((height, width), 255, dtype=np.uint8)
+    arr[height // 2, width - 1] = 0
+    img = Image.fromarray(arr)
+    assert min(img.size) < CONTENT_SCAN_FACTOR * 2
+    assert detect_content_bounds(img) == expected_box(img)
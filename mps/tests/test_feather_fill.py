@@ -0,0 +1,150 @@
+"""
+feather_fill (벡터화) 결과가 이전 픽셀 루프 구현과 같은지 (허용 오차 ±1)
+
+- smooth=True: 이전 remove_watermark.create_gradient_fill 루프 (smoothstep, 4방향)
+- smooth=False: 이전 pdf_smart.apply_gradient_blend 루프 (선형, 좌/상만)
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from remove_watermark import create_gradient_fill, feather_fill
+
+def legacy_gradient_fill(arr, wm_x1, wm_y1, wm_x2, wm_y2, bg_color):
+    """이전 create_gradient_fill의 픽셀 루프 (그대로 복사)"""
+    height, width = arr.shape[:2]
+    wm_width = wm_x2 - wm_x1
+    wm_height = wm_y2 - wm_y1
+    feather_size = min(10, wm_width // 4, wm_height // 4)
+
+    arr[wm_y1:wm_y2, wm_x1:wm_x2] = bg_color
+
+    if wm_x1 >= feather_size:
+        for i in range(feather_size):
+            t = (i + 1) / feather_size
+            alpha = t * t * (3 - 2 * t)
+            x = wm_x1 + i
+            for y in range(wm_y1, wm_y2):
+                if x - feather_size >= 0:
+                    original = arr[y, x - feather_size].astype(float)
+                    blended = original * (1 - alpha) + np.array(bg_color) * alpha
+                    arr[y, x] = blended.astype(np.uint8)
+
+    if wm_y1 >= feather_size:
+        for i in range(feather_size):
+            t = (i + 1) / feather_size
+            alpha = t * t * (3 - 2 * t)
+            y = wm_y1 + i
+            for x in range(wm_x1, wm_x2):
+                if y - feather_size >= 0:
+                    original = arr[y - feather_size, x].astype(float)
+                    blended = original * (1 - alpha) + np.array(bg_color) * alpha
+                    arr[y, x] = blended.astype(np.uint8)
+
+    if wm_x2 < width - feather_size:
+        for i in range(feather_size):
+            t = (i + 1) / feather_size
+            alpha = 1 - (t * t * (3 - 2 * t))
+            x = wm_x2 - 1 - i
+            for y in range(wm_y1, wm_y2):
+                if x + feather_size < width:
+                    original = arr[y, x + feather_size].astype(float)
+                    blended = np.array(bg_color) * alpha + original * (1 - alpha)
+                    arr[y, x] = blended.astype(np.uint8)
+
+    if wm_y2 < height - feather_size:
+        for i in range(feather_size):
+            t = (i + 1) / feather_size
+            alpha = 1 - (t * t * (3 - 2 * t))
+            y = wm_y2 - 1 - i
+            for x in range(wm_x1, wm_x2):
+                if y + feather_size < height:
+                    original = arr[y + feather_size, x].astype(float)
+                    blended = np.array(bg_color) * alpha + original * (1 - alpha)
+                    arr[y, x] = blended.astype(np.uint8)
+    return arr
+
+def legacy_gradient_blend(arr, wm_x1, wm_y1, wm_x2, wm_y2, bg_color):
+    """이전 pdf_smart.apply_gradient_blend의 픽셀 루프 (그대로 복사, 선형 램프, 좌/상만)"""
+    feather_size = min(10, (wm_x2 - wm_x1) // 4, (wm_y2 - wm_y1) // 4)
+
+    arr[wm_y1:wm_y2, wm_x1:wm_x2] = bg_color
+
+    if wm_x1 >= feather_size:
+        for i in range(feather_size):
+            alpha = (i + 1) / feather_size
+            x = wm_x1 + i
+            for y in range(wm_y1, wm_y2):
+                if x - feather_size >= 0:
+                    original = arr[y, x - feather_size].astype(float)
+                    arr[y, x] = (original * (1 - alpha) + np.array(bg_color) * alpha).astype(np.uint8)
+
+    if wm_y1 >= feather_size:
+        for i in range(feather_size):
+            alpha = (i + 1) / feather_size
+            y = wm_y1 + i
+            for x in range(wm_x1, wm_x2):
+                if y - feather_size >= 0:
+                    original = arr[y - feather_size, x].astype(float)
+                    arr[y, x] = (original * (1 - alpha) + np.array(bg_color) * alpha).astype(np.uint8)
+    return arr
+
+WIDTH, HEIGHT = 320, 200
+
+# (x1, y1, x2, y2): 안쪽, 각 경계에 붙은 박스, 경계에서 feather 폭보다 가까운 박스, 페더링 없는 작은 박스
+BOXES = {
+    "interior": (100, 60, 250, 95),
+    "bottom_right_corner": (WIDTH - 150, HEIGHT - 35, WIDTH, HEIGHT),
+    "right_edge": (WIDTH - 90, 40, WIDTH, 120),
+    "bottom_edge": (30, HEIGHT - 40, 200, HEIGHT),
+    "top_left_corner": (0, 0, 120, 50),
+    "near_left_top": (4, 6, 160, 70),
+    "near_right_bottom": (100, 80, WIDTH - 5, HEIGHT - 3),
+    "whole_image": (0, 0, WIDTH, HEIGHT),
+    "tiny": (150, 100, 153, 103),
+}
+
+def make_image(seed):
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+def max_diff(a, b):
+    return int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+@pytest.mark.parametrize("name", sorted(BOXES))
+@pytest.mark.parametrize("seed", [0, 1])
+def test_smooth_matches_legacy_loop(name, seed):
+    box = BOXES[name]
+    bg = (231, 228, 219)
+    src = make_image(seed)
+
+    expected = legacy_gradient_fill(src.copy(), *box, bg)
+    actual = feather_fill(src.copy(), *box, bg, smooth=True)
+    assert max_diff(actual, expected) <= 1
+
+    # create_gradient_fill (전체 프레임 경로)도 같은 결과
+    via_image = np.asarray(create_gradient_fill(Image.fromarray(src), *box, bg))
+    assert max_diff(via_image, expected) <= 1
+
+@pytest.mark.parametrize("name", sorted(BOXES))
+@pytest.mark.parametrize("seed", [0, 1])
+def test_linear_matches_legacy_loop(name, seed):
+    x1, y1, x2, y2 = box = BOXES[name]
+    bg = (240, 240, 240)
+    src = make_image(seed)
+
+    expected = legacy_gradient_blend(src.copy(), *box, bg)
+    actual = feather_fill(src.copy(), *box, bg, smooth=False)
+
+    # 이전 PDF 루프는 좌/상 경계만 페더링했으므로, 박스가 우/하 경계에서 떨어져 있으면
+    # 새로 페더링되는 우/하 띠를 제외하고 비교 (PDF 워터마크 박스는 항상 우측 하단 모서리에 붙어 있음)
+    f = min(10, (x2 - x1) // 4, (y2 - y1) // 4)
+    mask = np.ones((HEIGHT, WIDTH), dtype=bool)
+    if f and x2 < WIDTH - f:
+        mask[y1:y2, x2 - f:x2] = False
+    if f and y2 < HEIGHT - f:
+        mask[y2 - f:y2, x1:x2] = False
+    assert max_diff(actual[mask], expected[mask]) <= 1
+
+    if x2 == WIDTH and y2 == HEIGHT:
+        assert max_diff(actual, expected) <= 1
@@ -0,0 +1,49 @@
+"""/jobs: 등록 실패는 202가 아닌 4xx/5xx (클라이언트가 jobId 없이 기다리지 않도록)"""
+import io
+
+from PIL import Image
+
+def png_bytes():
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 48), (250, 250, 250)).save(buf, "PNG")
+    return buf.getvalue()
+
+def test_invalid_encode_profile_is_rejected(client):
+    response = client.post("/jobs", files={"file": ("a.png", png_bytes(), "image/png")},
+                           data={"encode_profile": "no-such-profile"})
+    assert response.status_code == 400
+    body = response.json()
+    assert body["success"] is False
+    assert "jobId" not in body
+
+def test_missing_pdf_input_is_rejected(client):
+    response = client.post("/jobs", data={})
+    assert response.status_code == 400
+    assert response.json()["success"] is False
+
+def test_expired_source_id_is_rejected(client):
+    response = client.post("/jobs", data={"source_id": "0" * 64})
+    assert response.status_code == 410
+    body = response.json()
+    assert body["success"] is False
+    assert body["sourceExpired"] is True
+
+def test_unknown_job_is_404(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
+    assert client.get("/jobs/does-not-exist/events").status_code == 404
+
+def test_image_job_completes(client):
+    response = client.post("/jobs", files={"file": ("a.png", png_bytes(), "image/png")},
+                           data={"output_format": "png"})
+    assert response.status_code == 202
+    body = response.json()
+    assert body["success"] is True
+
+    # SSE 스트림은 작업이 끝나면 done/failed 이벤트 후 닫힘
+    with client.stream("GET", body["eventsUrl"]) as events:
+        text = "".join(events.iter_text())
+    assert "event: done" in text
+
+    job = client.get(body["statusUrl"]).json()
+    assert job["status"] == "done"
+    assert job["result"]["outputFiles"]
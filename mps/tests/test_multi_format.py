@@ -0,0 +1,65 @@
+"""emit_formats: 여러 포맷을 스레드로 동시에 저장한 결과가 포맷별 순차 img.save()와 바이트 단위로 같은지"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+from budget_encoder import encode_to_bytes
+from multi_format import emit_formats
+
+# 포맷마다 옵션을 다르게 해서 스레드 사이에 인코더 옵션이 섞이면 결과가 달라지도록
+TARGET_OPTIONS = {
+    "webp": ("WebP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 85, "optimize": True, "progressive": True}),
+    "png": ("PNG", {"compress_level": 6}),
+}
+
+def make_image(width=640, height=360, seed=0):
+    rng = np.random.default_rng(seed)
+    img = Image.new("RGB", (width, height), (245, 244, 240))
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((30, 30, width // 2, height // 2), fill=(50, 100, 180))
+    draw.text((40, height - 60), "multi format", fill=(20, 20, 20))
+    arr = np.asarray(img).astype(np.int16) + rng.integers(-8, 9, (height, width, 3))
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8))
+
+def sequential_bytes(img, pil_format, options):
+    buffer = io.BytesIO()
+    img.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+@pytest.mark.parametrize("formats", [("webp", "jpeg", "png"), ("webp", "jpeg"), ("png",)])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_threaded_output_matches_sequential_save(formats, seed, tmp_path):
+    img = make_image(seed=seed)
+    targets = [(str(tmp_path / f"out_{fmt}"), fmt, dict(TARGET_OPTIONS[fmt][1])) for fmt in formats]
+
+    results = emit_formats(img, targets)
+
+    assert [r["path"] for r in results] == [path for path, _, _ in targets]
+    for path, fmt, _ in targets:
+        pil_format, options = TARGET_OPTIONS[fmt]
+        with open(path, "rb") as f:
+            assert f.read() == sequential_bytes(img, pil_format, options), fmt
+
+def test_threaded_budget_output_matches_sequential(tmp_path):
+    """용량 한도가 있으면 포맷마다 품질을 찾아 저장 → 순차 encode_within_budget과 같은 품질/바이트"""
+    img = make_image(1200, 675, seed=3)
+    max_bytes = 60 * 1024
+    targets = [(str(tmp_path / f"out_{fmt}"), fmt, {}) for fmt in ("webp", "jpeg")]
+
+    results = emit_formats(img, targets, max_bytes)
+
+    for result, (path, fmt, _) in zip(results, targets):
+        pil_format = TARGET_OPTIONS[fmt][0]
+        with open(path, "rb") as f:
+            assert f.read() == encode_to_bytes(img, pil_format, quality=result["quality"])
+        assert result["quality"] < 85  # 한도 때문에 품질을 낮춘 경우까지 확인
+
+def test_source_image_is_unchanged(tmp_path):
+    img = make_image(seed=4)
+    before = np.asarray(img).copy()
+    emit_formats(img, [(str(tmp_path / f"out_{fmt}"), fmt, dict(TARGET_OPTIONS[fmt][1]))
+                       for fmt in ("webp", "jpeg", "png")])
+    assert np.array_equal(np.asarray(img), before)
@@ -0,0 +1,111 @@
+"""
+/pdf-preview: 페이지 선택용 썸네일 + 원본 보관 (sourceId)
+
+- sprite / list(NDJSON) 응답, 같은 PDF·같은 폭의 두 번째 요청은 다시 렌더링하지 않음 (cached)
+- sourceId만으로 다시 미리보기 / /process-pdf 처리
+- 만료·잘못된 sourceId, 잘못된 방식, PDF가 아닌 파일 → {"success": false}, 목록 중간 실패는 마지막 줄
+"""
+import base64
+import hashlib
+import io
+import json
+from concurrent.futures import Future
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("pypdfium2")
+
+def variant(pdf_bytes, tag):
+    """같은 내용의 PDF를 테스트마다 다른 sourceId로 (파일 끝 주석만 다름)"""
+    return pdf_bytes + f"\n% {tag}\n".encode()
+
+def upload(data):
+    return {"file": ("deck.pdf", data, "application/pdf")}
+
+def no_rendering(monkeypatch, server):
+    """워커 호출이 생기면 실패 (캐시 적중 확인용)"""
+    def fail(*args, **kwargs):
+        raise AssertionError("rendered again")
+
+    monkeypatch.setattr(server.worker_pool, "submit", fail)
+    monkeypatch.setattr(server.worker_pool, "run", fail)
+
+def test_sprite_preview_is_cached(client, server, pdf_bytes, monkeypatch):
+    data = variant(pdf_bytes, "sprite")
+    first = client.post("/pdf-preview", files=upload(data), data={"thumb_width": "120"}).json()
+
+    assert first["success"] is True and first["cached"] is False
+    assert first["sourceId"] == hashlib.sha256(data).hexdigest()
+    assert first["pageCount"] == 3 and first["thumbWidth"] == 120
+    assert [tile["page"] for tile in first["tiles"]] == [1, 2, 3]
+    prefix = "data:image/webp;base64,"
+    assert first["sprite"].startswith(prefix)
+    with Image.open(io.BytesIO(base64.b64decode(first["sprite"][len(prefix):]))) as sprite:
+        assert sprite.format == "WEBP"
+
+    no_rendering(monkeypatch, server)
+    again = client.post("/pdf-preview", data={"source_id": first["sourceId"], "thumb_width": "120"}).json()
+    assert again["cached"] is True
+    assert again["sprite"] == first["sprite"] and again["tiles"] == first["tiles"]
+
+def test_list_preview_streams_pages(client, server, pdf_bytes, monkeypatch):
+    data = variant(pdf_bytes, "list")
+    response = client.post("/pdf-preview", files=upload(data), data={"preview_mode": "list"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    header, *pages = [json.loads(line) for line in response.text.splitlines()]
+    assert header["success"] is True and header["cached"] is False and header["pageCount"] == 3
+    assert sorted(page["page"] for page in pages) == [1, 2, 3]
+    assert all(page["image"].startswith("data:image/webp;base64,") for page in pages)
+
+    no_rendering(monkeypatch, server)
+    cached = client.post("/pdf-preview", data={"source_id": header["sourceId"], "preview_mode": "list"})
+    lines = [json.loads(line) for line in cached.text.splitlines()]
+    assert lines[0]["cached"] is True
+    assert sorted(lines[1:], key=lambda p: p["page"]) == sorted(pages, key=lambda p: p["page"])
+
+def test_source_id_is_processed_without_upload(client, pdf_bytes):
+    data = variant(pdf_bytes, "process")
+    source_id = client.post("/pdf-preview", files=upload(data)).json()["sourceId"]
+
+    body = client.post("/process-pdf", data={"source_id": source_id, "merge_pages": "false"}).json()
+    assert body["success"] is True
+    assert body["totalPages"] == 3 and len(body["outputFiles"]) == 3
+
+@pytest.mark.parametrize("source_id", ["0" * 64, "../../etc/passwd"])
+def test_unknown_source_id_is_expired(client, source_id):
+    for endpoint in ("/pdf-preview", "/process-pdf"):
+        body = client.post(endpoint, data={"source_id": source_id}).json()
+        assert body["success"] is False
+        assert body["sourceExpired"] is True
+
+@pytest.mark.parametrize("files,data", [
+    (None, {}),                                                       # 파일도 sourceId도 없음
+    ({"file": ("deck.pdf", b"not a pdf", "application/pdf")}, {}),    # PDF가 아님
+    (None, {"source_id": "0" * 64, "preview_mode": "grid"}),          # 알 수 없는 방식
+])
+def test_invalid_request_fails(client, files, data):
+    body = client.post("/pdf-preview", files=files, data=data).json()
+    assert body["success"] is False
+    assert not body.get("sourceExpired")
+
+def test_list_failure_ends_with_error_line(client, server, pdf_bytes, monkeypatch):
+    data = variant(pdf_bytes, "list-failure")
+    # 스프라이트로 원본 보관 + 페이지 수 확인 (썸네일은 다른 폭이라 다시 렌더링해야 함)
+    source_id = client.post("/pdf-preview", files=upload(data)).json()["sourceId"]
+
+    def failing_submit(*args, **kwargs):
+        future = Future()
+        future.set_exception(RuntimeError("render failed"))
+        return future
+
+    monkeypatch.setattr(server.worker_pool, "submit", failing_submit)
+    response = client.post("/pdf-preview",
+                           data={"source_id": source_id, "preview_mode": "list", "thumb_width": "90"})
+
+    header, *rest = [json.loads(line) for line in response.text.splitlines()]
+    assert header["success"] is True
+    assert rest[-1] == {"success": False, "error": "render failed"}
+    assert client.get("/scheduler/stats").json()["preview"]["running"] == 0
@@ -0,0 +1,103 @@
+"""process_pdf_optimized: 래스터화 백엔드 정리, 렌더링한 페이지 수, 병렬/순차 모드 결과"""
+import logging
+
+import pytest
+from PIL import Image
+
+import pdf_smart
+import rasterizer
+
+pytest.importorskip("pypdfium2")
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    """3페이지 PDF (흰 바탕 + 회색 상자)"""
+    pages = []
+    for i in range(3):
+        page = Image.new("RGB", (600, 340), (255, 255, 255))
+        page.paste((80, 80, 80), (50 + i * 20, 60, 300, 200))
+        pages.append(page)
+    path = tmp_path / "deck.pdf"
+    pages[0].save(path, "PDF", save_all=True, append_images=pages[1:], resolution=72)
+    return str(path)
+
+@pytest.fixture
+def closed(monkeypatch):
+    """닫힌 PdfiumRasterizer 수"""
+    calls = []
+    close = rasterizer.PdfiumRasterizer.close
+
+    def tracking_close(self):
+        calls.append(self)
+        close(self)
+
+    monkeypatch.setattr(rasterizer.PdfiumRasterizer, "close", tracking_close)
+    return calls
+
+def test_rasterizer_closed_when_planning_fails(pdf_path, tmp_path, closed, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ValueError("bad pages")
+
+    monkeypatch.setattr(pdf_smart, "plan_batches", fail)
+    with pytest.raises(ValueError):
+        pdf_smart.process_pdf_optimized(pdf_path, "none", str(tmp_path / "out"), rasterizer="pdfium")
+    assert len(closed) == 1
+
+def test_rasterizer_closed_after_success(pdf_path, tmp_path, closed):
+    pdf_smart.process_pdf_optimized(pdf_path, "none", str(tmp_path / "out"), rasterizer="pdfium")
+    assert len(closed) == 1
+
+def test_result_reports_rendered_pages(pdf_path, tmp_path):
+    result = pdf_smart.process_pdf_optimized(pdf_path, "none", str(tmp_path / "out"), merge_pages=False,
+                                             selected_pages=[1, 3], rasterizer="pdfium")
+    assert result["pages"] == 2
+    assert result["rendered_pages"] == 2
+    assert result["total_pages"] == 3
+    assert len(result["files"]) == 2
+
+@pytest.fixture
+def long_pdf_path(tmp_path):
+    """8페이지 PDF (BATCH_SIZE로 나누면 배치 여러 개, 페이지마다 내용 위치가 다름)"""
+    pages = []
+    for i in range(8):
+        page = Image.new("RGB", (600, 340), (255, 255, 255))
+        page.paste((30 * i, 80, 200 - 20 * i), (40 + i * 15, 40 + i * 10, 320 + i * 20, 260))
+        pages.append(page)
+    path = tmp_path / "long.pdf"
+    pages[0].save(path, "PDF", save_all=True, append_images=pages[1:], resolution=72)
+    return str(path)
+
+def run_pdf(pdf_path, out_dir, **kwargs):
+    """process_pdf_optimized 실행 → {파일명: bytes}"""
+    result = pdf_smart.process_pdf_optimized(pdf_path, "none", str(out_dir), rasterizer="pdfium", **kwargs)
+    contents = {}
+    for path in result["files"]:
+        with open(path, "rb") as f:
+            contents[path.rsplit("/", 1)[-1]] = f.read()
+    return result, contents
+
+@pytest.mark.parametrize("options", [
+    dict(merge_pages=False, output_format="all"),
+    dict(merge_pages=True, output_format="png"),
+    dict(merge_pages=False, output_format="webp", selected_pages=[1, 2, 5, 6, 7]),
+])
+def test_parallel_matches_sequential(long_pdf_path, tmp_path, options, caplog):
+    sequential, expected = run_pdf(long_pdf_path, tmp_path / "seq", workers=1, **options)
+    with caplog.at_level(logging.WARNING, logger="mps"):
+        parallel, actual = run_pdf(long_pdf_path, tmp_path / "par", workers=3, **options)
+
+    assert not caplog.records  # 순차 모드로 대신 처리되지 않고 병렬로 끝남
+    assert actual == expected
+    assert parallel["rendered_pages"] == sequential["rendered_pages"]
+
+def test_parallel_failure_falls_back_with_warning(long_pdf_path, tmp_path, monkeypatch, caplog):
+    def broken_context():
+        raise OSError("no processes")
+
+    monkeypatch.setattr(pdf_smart, "page_pool_context", broken_context)
+    _, expected = run_pdf(long_pdf_path, tmp_path / "seq", workers=1, merge_pages=False, output_format="png")
+    with caplog.at_level(logging.WARNING, logger="mps"):
+        _, actual = run_pdf(long_pdf_path, tmp_path / "par", workers=3, merge_pages=False, output_format="png")
+
+    assert actual == expected
+    assert [r.getMessage() for r in caplog.records if r.levelno == logging.WARNING] == ["parallel_pages_failed"]
@@ -0,0 +1,93 @@
+"""
+/process-batch: 여러 이미지를 같은 옵션으로 한 번에 처리
+
+- url: 요청 순서대로 파일별 결과, 읽을 수 없는 파일은 그 파일만 실패로 보고
+- stream: "순번_원본이름.확장자" ZIP 항목 + manifest.json
+- 파일 수 초과 / 잘못된 옵션 → {"success": false}, 대기열 초과 → 429
+"""
+import io
+import json
+import zipfile
+
+from PIL import Image
+
+from scheduler import QueueFullError
+
+def png_bytes(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (72, 48), color).save(buf, "PNG")
+    return buf.getvalue()
+
+def batch_files(*colors, broken_at=None):
+    files = []
+    for i, color in enumerate(colors):
+        data = b"not an image" if i == broken_at else png_bytes(color)
+        files.append(("files", (f"slide{i}.png", data, "image/png")))
+    return files
+
+def test_results_in_request_order_with_per_file_failure(client):
+    response = client.post("/process-batch",
+                           files=batch_files((200, 0, 0), (0, 200, 0), (0, 0, 200), broken_at=1))
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["success"] is True
+    assert (body["succeeded"], body["failed"]) == (2, 1)
+    assert [r["filename"] for r in body["results"]] == ["slide0.png", "slide1.png", "slide2.png"]
+
+    ok, broken, last = body["results"]
+    assert broken["success"] is False and broken["error"]
+    for result in (ok, last):
+        assert result["success"] is True
+        for url in result["outputFiles"]:
+            assert client.get(url).status_code == 200
+
+def test_stream_zip_with_manifest(client, server):
+    response = client.post("/process-batch",
+                           files=batch_files((10, 20, 30), (40, 50, 60), (70, 80, 90), broken_at=2),
+                           data={"response_mode": "stream"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        names = archive.namelist()
+        manifest = json.loads(archive.read("manifest.json"))
+        assert names[-1] == "manifest.json"
+        assert sorted(names[:-1]) == ["001_slide0.webp", "002_slide1.webp"]
+        for name in names[:-1]:
+            with Image.open(io.BytesIO(archive.read(name))) as img:
+                assert img.format == "WEBP" and img.size == (72, 48)
+
+    assert (manifest["succeeded"], manifest["failed"]) == (2, 1)
+    assert manifest["results"][0]["files"] == ["001_slide0.webp"]
+    assert manifest["results"][2]["success"] is False
+    assert client.get("/scheduler/stats").json()["batch"]["running"] == 0
+
+def test_stream_uses_cached_results(client):
+    files = batch_files((1, 2, 3))
+    stored = client.post("/process-batch", files=files).json()["results"][0]["outputFiles"][0]
+
+    response = client.post("/process-batch", files=files, data={"response_mode": "stream"})
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        assert archive.read("001_slide0.webp") == client.get(stored).content
+
+def test_too_many_files_fails(client, server, monkeypatch):
+    monkeypatch.setattr(server, "MAX_BATCH_FILES", 2)
+    body = client.post("/process-batch", files=batch_files((1, 1, 1), (2, 2, 2), (3, 3, 3))).json()
+    assert body["success"] is False
+    assert "2" in body["error"]
+
+def test_invalid_options_fail(client):
+    for data in ({"encode_profile": "no-such-profile"}, {"response_mode": "inline"}):
+        body = client.post("/process-batch", files=batch_files((5, 5, 5)), data=data).json()
+        assert body["success"] is False
+
+def test_full_queue_is_429(client, server, monkeypatch):
+    def full(lane):
+        raise QueueFullError(lane, 7)
+
+    monkeypatch.setattr(server.scheduler, "admit", full)
+    response = client.post("/process-batch", files=batch_files((9, 9, 9)))
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "7"
+    assert response.json()["success"] is False
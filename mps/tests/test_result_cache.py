@@ -0,0 +1,170 @@
+"""결과 캐시: 적중/미스, single-flight 중복 제거, LRU 삭제, /process-image 캐시 응답"""
+import io
+import threading
+
+import pytest
+from PIL import Image
+
+from result_cache import ResultCache, hash_fileobj, make_cache_key
+
+def write_output(output_dir, name, size):
+    path = output_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    return f"/output/{name}"
+
+@pytest.fixture
+def output_dir(tmp_path):
+    path = tmp_path / "output"
+    path.mkdir()
+    return path
+
+def test_cache_key_ignores_option_order():
+    a = make_cache_key("abc", "image", {"output_format": "webp", "optimize_blog": True})
+    b = make_cache_key("abc", "image", {"optimize_blog": True, "output_format": "webp"})
+    assert a == b
+    assert a != make_cache_key("abc", "image", {"optimize_blog": False, "output_format": "webp"})
+    assert a != make_cache_key("abc", "pdf", {"optimize_blog": True, "output_format": "webp"})
+
+def test_hash_fileobj_rewinds():
+    fileobj = io.BytesIO(b"same bytes")
+    fileobj.seek(4)
+    assert hash_fileobj(fileobj) == hash_fileobj(io.BytesIO(b"same bytes"))
+    assert fileobj.tell() == 0
+
+def test_hit_after_miss(output_dir):
+    cache = ResultCache(str(output_dir), max_bytes=1024)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return [write_output(output_dir, "a.webp", 10)]
+
+    assert cache.get_or_compute("k", compute) == (["/output/a.webp"], False)
+    assert cache.get_or_compute("k", compute) == (["/output/a.webp"], True)
+    assert cache.peek("k") == ["/output/a.webp"]
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+
+def test_concurrent_requests_compute_once(output_dir):
+    cache = ResultCache(str(output_dir), max_bytes=1024)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return [write_output(output_dir, "shared.webp", 10)]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_compute("k", compute)))
+               for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    # 모든 요청이 계산 중인 결과를 기다리는 상태가 된 뒤 계산 완료
+    while cache.stats()["sharedInflight"] < 5:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert sorted(cached for _, cached in results) == [False] + [True] * 5
+    assert all(files == ["/output/shared.webp"] for files, _ in results)
+    assert cache.stats()["inflight"] == 0
+
+def test_failure_is_shared_and_not_cached(output_dir):
+    cache = ResultCache(str(output_dir), max_bytes=1024)
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise ValueError("broken upload")
+
+    def request():
+        try:
+            cache.get_or_compute("k", failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    while cache.stats()["sharedInflight"] < 2:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert cache.peek("k") is None
+    # 실패한 결과는 캐시하지 않으므로 다음 요청은 다시 계산
+    assert cache.get_or_compute("k", lambda: [write_output(output_dir, "ok.webp", 1)]) == (["/output/ok.webp"], False)
+
+def test_lru_eviction_deletes_least_recently_used(output_dir):
+    cache = ResultCache(str(output_dir), max_bytes=250)
+    cache.get_or_compute("a", lambda: [write_output(output_dir, "a.webp", 100)])
+    cache.get_or_compute("b", lambda: [write_output(output_dir, "pdf-b/page1.png", 100)])
+    assert cache.peek("a")  # a를 최근 사용으로
+
+    cache.get_or_compute("c", lambda: [write_output(output_dir, "c.webp", 100)])
+
+    assert cache.peek("b") is None
+    assert not (output_dir / "pdf-b").exists()  # 빈 PDF 결과 폴더까지 삭제
+    assert cache.peek("a") and cache.peek("c")
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] == 200
+
+def test_entry_with_missing_files_is_recomputed(output_dir):
+    cache = ResultCache(str(output_dir), max_bytes=1024)
+    cache.get_or_compute("k", lambda: [write_output(output_dir, "gone.webp", 10)])
+    (output_dir / "gone.webp").unlink()
+
+    assert cache.peek("k") is None
+    files, cached = cache.get_or_compute("k", lambda: [write_output(output_dir, "again.webp", 10)])
+    assert (files, cached) == (["/output/again.webp"], False)
+
+def test_disabled_cache_always_computes(output_dir):
+    cache = ResultCache(str(output_dir), max_bytes=0)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return []
+
+    cache.get_or_compute("k", compute)
+    cache.get_or_compute("k", compute)
+    assert len(calls) == 2
+    assert cache.peek("k") is None
+
+def png_upload(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (80, 60), color).save(buf, "PNG")
+    return buf.getvalue()
+
+def test_process_image_second_request_is_cached(client):
+    data = png_upload((12, 34, 56))
+    first = client.post("/process-image", files={"file": ("a.png", data, "image/png")})
+    second = client.post("/process-image", files={"file": ("b.png", data, "image/png")})
+
+    assert first.status_code == second.status_code == 200
+    assert first.json()["success"] and first.json()["cached"] is False
+    assert second.json()["cached"] is True
+    assert second.json()["outputFiles"] == first.json()["outputFiles"]
+    for url in first.json()["outputFiles"]:
+        assert client.get(url).status_code == 200
+
+    # 옵션이 다르면 다른 결과
+    other = client.post("/process-image", files={"file": ("a.png", data, "image/png")},
+                        data={"output_format": "jpeg"})
+    assert other.json()["cached"] is False
+    assert client.get("/cache/stats").json()["hits"] >= 1
+
+def test_process_image_failure_is_not_cached(client):
+    data = b"not an image"
+    for _ in range(2):
+        body = client.post("/process-image", files={"file": ("a.png", data, "image/png")}).json()
+        assert body["success"] is False
+        assert "cached" not in body
@@ -0,0 +1,213 @@
+"""
+출력 보관 관리: TTL / 용량 한도 삭제, 작업 공간 정리, 제공 중이거나 빌려 간 파일은 지우지 않는지
+
+- use(urls) 동안은 만료/용량 정리와 결과 캐시 LRU 삭제(discard)에서 제외, 끝나면 다음 정리에서 삭제
+- /output/ 제공 미들웨어가 본문 전송이 끝날 때까지 파일을 빌려 두는지
+"""
+import asyncio
+import os
+import pathlib
+import time
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+from result_cache import ResultCache
+from retention import RetentionManager
+
+@pytest.fixture
+def dirs(tmp_path):
+    output_dir, work_dir = tmp_path / "output", tmp_path / "uploads"
+    output_dir.mkdir()
+    work_dir.mkdir()
+    return output_dir, work_dir
+
+def make_manager(dirs, ttl_seconds=3600, max_bytes=0):
+    output_dir, work_dir = dirs
+    return RetentionManager(str(output_dir), str(work_dir), "/output/", ttl_seconds, max_bytes)
+
+def write_output(output_dir, name, size=100, age=0):
+    path = output_dir / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x" * size)
+    if age:
+        old = time.time() - age
+        os.utime(path, (old, old))
+    return f"/output/{name}"
+
+def exists(output_dir, url):
+    return (output_dir / url[len("/output/"):]).exists()
+
+def test_ttl_removes_only_expired_files(dirs):
+    output_dir, _ = dirs
+    old = write_output(output_dir, "old.webp", age=7200)
+    old_page = write_output(output_dir, "pdf-old/page1.png", age=7200)
+    fresh = write_output(output_dir, "fresh.webp", age=60)
+    manager = make_manager(dirs, ttl_seconds=3600)
+
+    manager.adopt_existing()  # 수정 시각 기준 등록 후 정리
+
+    assert not exists(output_dir, old) and not exists(output_dir, old_page)
+    assert not (output_dir / "pdf-old").exists()
+    assert exists(output_dir, fresh)
+    stats = manager.stats()
+    assert stats["files"] == 1 and stats["removedFiles"]["expired"] == 2
+    assert stats["reclaimedBytes"]["expired"] == 200
+
+def test_quota_removes_least_recently_served(dirs):
+    output_dir, _ = dirs
+    manager = make_manager(dirs, max_bytes=250)
+    a, b = write_output(output_dir, "a.webp"), write_output(output_dir, "b.webp")
+    manager.register([a])
+    manager.register([b])
+    time.sleep(0.01)
+    manager.touch(a)
+
+    c = write_output(output_dir, "c.webp")
+    manager.register([c])
+
+    assert not exists(output_dir, b)
+    assert exists(output_dir, a) and exists(output_dir, c)
+    assert manager.stats()["bytes"] == 200
+
+def test_leased_file_survives_ttl_sweep(dirs):
+    output_dir, _ = dirs
+    url = write_output(output_dir, "served.webp", age=7200)
+    manager = make_manager(dirs, ttl_seconds=3600)
+
+    with manager.use([url]):
+        manager.adopt_existing()
+        assert manager.sweep()["expired"] == 0
+        assert exists(output_dir, url)
+        assert manager.stats()["leasedFiles"] == 1
+
+    # 방금 제공했으므로 만료 시각도 다시 시작
+    assert manager.sweep()["expired"] == 0
+    assert exists(output_dir, url)
+    assert manager.stats()["leasedFiles"] == 0
+
+def test_leased_file_survives_quota_sweep(dirs):
+    output_dir, _ = dirs
+    manager = make_manager(dirs, max_bytes=150)
+    oldest = write_output(output_dir, "oldest.webp")
+    manager.register([oldest])
+
+    with manager.use([oldest]):
+        newer = write_output(output_dir, "newer.webp")
+        manager.register([newer])
+        # 가장 오래된 파일은 빌려 갔으므로 그다음 파일을 삭제
+        assert exists(output_dir, oldest)
+        assert not exists(output_dir, newer)
+
+        newest = write_output(output_dir, "newest.webp")
+        manager.register([newest])
+        assert exists(output_dir, oldest)
+        assert not exists(output_dir, newest)
+
+    # 빌린 파일만 남아 한도 아래
+    assert manager.stats()["bytes"] == 100
+
+def test_nested_leases(dirs):
+    output_dir, _ = dirs
+    manager = make_manager(dirs, max_bytes=1)
+    url = write_output(output_dir, "twice.webp")
+
+    with manager.use([url]):
+        with manager.use([url]):
+            manager.register([url])
+        manager.sweep()
+        assert exists(output_dir, url)  # 바깥 with 블록이 아직 빌려 둠
+    manager.sweep()
+    assert not exists(output_dir, url)
+
+def test_discard_skips_leased_files(dirs):
+    output_dir, _ = dirs
+    manager = make_manager(dirs, max_bytes=1024)
+    kept, removed = write_output(output_dir, "pdf-x/page1.png"), write_output(output_dir, "pdf-y/page1.png")
+    manager.register([kept, removed])
+
+    with manager.use([kept]):
+        assert manager.discard([kept, removed]) == 100
+
+    assert exists(output_dir, kept)
+    assert not exists(output_dir, removed) and not (output_dir / "pdf-y").exists()
+    # 남겨 둔 파일은 계속 보관 관리 대상 (한도를 낮추면 정리됨)
+    manager.max_bytes = 1
+    manager.sweep()
+    assert not exists(output_dir, kept)
+
+def test_cache_eviction_goes_through_retention(dirs):
+    output_dir, _ = dirs
+    manager = make_manager(dirs, max_bytes=1024 * 1024)
+    cache = ResultCache(str(output_dir), "/output/", 150, remove_files=manager.discard)
+
+    def compute(name):
+        url = write_output(output_dir, name)
+        manager.register([url])
+        return [url]
+
+    first, _ = cache.get_or_compute("a", lambda: compute("a.webp"))
+    with manager.use(first):
+        cache.get_or_compute("b", lambda: compute("b.webp"))
+        assert cache.peek("a") is None   # 캐시에서는 내보냈지만
+        assert exists(output_dir, first[0])  # 제공 중인 파일은 남아 있음
+
+    cache.get_or_compute("c", lambda: compute("c.webp"))
+    assert not exists(output_dir, "/output/b.webp")  # 빌리지 않은 파일은 바로 삭제
+
+def test_release_job_removes_workspace_and_intermediates(dirs):
+    output_dir, work_dir = dirs
+    manager = make_manager(dirs)
+    workspace = manager.workspace("job1")
+    with open(os.path.join(workspace, "upload.pdf"), "wb") as f:
+        f.write(b"x" * 50)
+    temp_pages = output_dir / "pdf-job1" / "temp_pages"
+    temp_pages.mkdir(parents=True)
+    (temp_pages / "p1.png").write_bytes(b"x" * 30)
+    manager.track_intermediate("job1", str(temp_pages))
+
+    assert manager.release_job("job1") == 80
+    assert not (work_dir / "job1").exists() and not temp_pages.exists()
+    assert manager.stats()["reclaimedBytes"]["intermediate"] == 80
+
+# ── 서버: /output/ 제공 중 보호 ─────────────────────────────────────
+
+def serve_request(path):
+    return Request({"type": "http", "method": "GET", "path": path, "headers": [], "query_string": b""})
+
+def test_file_is_leased_until_body_is_sent(server, dirs, monkeypatch):
+    output_dir, _ = dirs
+    manager = make_manager(dirs, max_bytes=1)
+    monkeypatch.setattr(server, "retention", manager)
+    url = write_output(output_dir, "big.png")
+
+    async def call_next(request):
+        async def body():
+            yield b"first"
+            yield b"second"
+        return StreamingResponse(body())
+
+    async def serve():
+        response = await server.touch_served_outputs(serve_request(url), call_next)
+        chunks = []
+        async for chunk in response.body_iterator:
+            chunks.append(chunk)
+            # 본문을 보내는 중에 정리가 돌아도 삭제하지 않음
+            manager.register([url])
+            assert exists(output_dir, url)
+        return chunks
+
+    assert asyncio.run(serve()) == [b"first", b"second"]
+    assert manager.stats()["leasedFiles"] == 0
+    manager.sweep()
+    assert not exists(output_dir, url)
+
+def test_output_request_releases_lease(client, server):
+    url = write_output(pathlib.Path(server.OUTPUT_DIR), "served.txt", 10)
+    server.retention.register([url])
+
+    response = client.get(url)
+    assert response.status_code == 200 and response.content == b"x" * 10
+    assert client.get("/output/missing.webp").status_code == 404
+    assert client.get("/retention/stats").json()["leasedFiles"] == 0
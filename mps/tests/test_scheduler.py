@@ -0,0 +1,40 @@
+"""JobLane 대기열 한도, PDF 페이지 워커 상한"""
+import pytest
+
+from scheduler import JobLane, QueueFullError
+
+def test_admit_bounded_while_slots_free():
+    # /jobs는 admit()만 하고 슬롯 진입은 나중에 하므로, 슬롯이 비어 있어도 합계 한도로 거절해야 함
+    lane = JobLane("pdf", max_running=1, max_queued=2)
+    tickets = [lane.admit() for _ in range(3)]
+
+    with pytest.raises(QueueFullError):
+        lane.admit()
+    assert lane.stats()["queued"] == 3
+    assert lane.stats()["rejected"] == 1
+
+    tickets[0].cancel()
+    tickets.append(lane.admit())
+    for ticket in tickets[1:]:
+        ticket.cancel()
+    assert lane.stats()["queued"] == 0
+
+def test_admit_bounded_with_running_jobs():
+    lane = JobLane("image", max_running=1, max_queued=1)
+    running = lane.admit()
+    with running:
+        waiting = lane.admit()
+        with pytest.raises(QueueFullError):
+            lane.admit()
+        waiting.cancel()
+    assert lane.stats()["running"] == 0
+
+@pytest.mark.parametrize("requested,pool_size,max_pdf_jobs,expected", [
+    (4, 8, 1, 4),    # 풀에 여유가 있으면 그대로
+    (4, 8, 4, 2),    # 동시 PDF 작업 4개 x 2 = 풀 크기
+    (8, 2, 1, 2),
+    (3, 2, 4, 1),    # 풀보다 PDF 작업이 많아도 최소 1 (순차 모드)
+    (1, 8, 1, 1),
+])
+def test_page_workers_capped_by_pool(server, requested, pool_size, max_pdf_jobs, expected):
+    assert server.cap_page_workers(requested, pool_size, max_pdf_jobs) == expected
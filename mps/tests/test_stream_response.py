@@ -0,0 +1,96 @@
+"""
+response_mode=stream: 결과를 디스크에 남기지 않고 응답 본문으로 전송
+
+- 출력 1개 → 이미지 bytes 그대로, 여러 개(PDF 페이지) → ZIP
+- 캐시된 결과는 저장된 파일을 그대로 전송
+- 알 수 없는 응답 방식 / 읽을 수 없는 업로드 → {"success": false}
+"""
+import io
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("pypdfium2")
+
+def png_bytes(color=(200, 120, 40)):
+    buf = io.BytesIO()
+    Image.new("RGB", (96, 64), color).save(buf, "PNG")
+    return buf.getvalue()
+
+def workspaces(server):
+    return os.listdir(server.UPLOAD_DIR)
+
+def test_single_image_is_returned_as_bytes(client, server):
+    response = client.post("/process-image", files={"file": ("photo.png", png_bytes(), "image/png")},
+                           data={"response_mode": "stream"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert "inline" in response.headers["content-disposition"]
+    with Image.open(io.BytesIO(response.content)) as img:
+        assert img.format == "WEBP" and img.size == (96, 64)
+    assert workspaces(server) == []  # 작업 공간은 응답 후 삭제
+
+def test_cached_result_is_streamed_from_disk(client):
+    data = png_bytes((10, 200, 90))
+    url_mode = client.post("/process-image", files={"file": ("a.png", data, "image/png")}).json()
+    stored = client.get(url_mode["outputFiles"][0]).content
+
+    response = client.post("/process-image", files={"file": ("a.png", data, "image/png")},
+                           data={"response_mode": "stream"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/webp"
+    assert response.content == stored
+
+def test_pdf_pages_are_streamed_as_zip(client, server, pdf_bytes):
+    response = client.post("/process-pdf", files={"file": ("deck.pdf", pdf_bytes, "application/pdf")},
+                           data={"response_mode": "stream", "merge_pages": "false",
+                                 "output_format": "png", "target_width": "300"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert 'filename="deck.zip"' in response.headers["content-disposition"]
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        names = archive.namelist()
+        assert len(names) == 3 and "error.json" not in names
+        for name in names:
+            with Image.open(io.BytesIO(archive.read(name))) as img:
+                assert img.format == "PNG" and img.width <= 300  # 컨텐츠 영역만 남김
+    assert workspaces(server) == []
+
+def test_unknown_response_mode_fails(client):
+    body = client.post("/process-image", files={"file": ("a.png", png_bytes(), "image/png")},
+                       data={"response_mode": "inline"}).json()
+    assert body["success"] is False
+    assert "inline" in body["error"]
+
+def test_unreadable_upload_fails_before_streaming(client, server):
+    response = client.post("/process-image", files={"file": ("a.png", b"not an image", "image/png")},
+                           data={"response_mode": "stream"})
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["success"] is False
+    assert workspaces(server) == []
+
+def test_failure_mid_stream_is_recorded_in_zip(client, server, monkeypatch, pdf_bytes):
+    """두 번째 페이지 이후 실패 → 이미 보낸 페이지 + error.json, 대기열 자리/작업 공간은 반납"""
+    relay = server.relay_outputs
+
+    def failing_relay(future, output_queue):
+        outputs = relay(future, output_queue)
+        yield next(outputs)
+        yield next(outputs)
+        raise RuntimeError("encoder crashed")
+
+    monkeypatch.setattr(server, "relay_outputs", failing_relay)
+    response = client.post("/process-pdf", files={"file": ("other.pdf", pdf_bytes + b"\n", "application/pdf")},
+                           data={"response_mode": "stream", "merge_pages": "false", "output_format": "png"})
+
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as archive:
+        names = archive.namelist()
+        assert len(names) == 3 and names[-1] == "error.json"
+        assert b"encoder crashed" in archive.read("error.json")
+    assert workspaces(server) == []
+    assert client.get("/scheduler/stats").json()["pdf"]["running"] == 0
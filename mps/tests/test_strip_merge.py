@@ -0,0 +1,117 @@
+"""
+스트리밍 병합 (strip_merge.merge_vertical)이 캔버스 한 장을 Pillow로 한 번에 저장한 것과 같은지
+
+- PNG: 디코딩한 픽셀 + 필터된 행(IDAT 압축 해제 결과)까지 같음 (png_filter_rows가 Pillow 인코더 출력에 의존)
+- JPEG baseline 띠 인코딩: 디코딩한 픽셀이 같음
+- JPEG progressive/optimize: JPEG_CANVAS_MAX_PIXELS 이하면 캔버스 한 번 저장과 같은 bytes, 넘으면 baseline 띠
+"""
+import io
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import strip_merge
+from strip_merge import merge_vertical
+
+def make_pages(widths_heights, seed=0):
+    """글자/도형 + 약간의 잡음이 있는 페이지들 (RGB ndarray)"""
+    rng = np.random.default_rng(seed)
+    pages = []
+    for i, (width, height) in enumerate(widths_heights):
+        img = Image.new("RGB", (width, height), (248, 247, 242))
+        draw = ImageDraw.Draw(img)
+        draw.rectangle((10, 10, width // 2, height // 3), fill=(40 + 30 * i, 90, 160))
+        draw.text((20, height // 2), f"page {i}", fill=(10, 10, 10))
+        arr = np.asarray(img).copy()
+        noise = rng.integers(-6, 7, arr.shape)
+        pages.append(np.clip(arr.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    return pages
+
+def canvas_of(pages, width, align="left", background=(255, 255, 255)):
+    """기대값: 같은 규칙으로 만든 전체 캔버스"""
+    canvas = Image.new("RGB", (width, sum(p.shape[0] for p in pages)), background)
+    y = 0
+    for page in pages:
+        page_width = min(page.shape[1], width)
+        x = (width - page_width) // 2 if align == "center" else 0
+        canvas.paste(Image.fromarray(page[:, :page_width]), (x, y))
+        y += page.shape[0]
+    return canvas
+
+def pixels(data):
+    with Image.open(io.BytesIO(data)) as img:
+        return np.asarray(img.convert("RGB"))
+
+def idat(data):
+    return zlib.decompress(strip_merge._png_idat(data))
+
+# 높이가 MCU(16)/띠(256)의 배수가 아닌 페이지, 폭이 다른 페이지 포함
+LAYOUTS = {
+    "same_width": [(320, 200), (320, 301), (320, 77)],
+    "mixed_width": [(320, 270), (250, 333), (400, 129)],
+    "single_tall": [(160, 1000)],
+}
+
+@pytest.mark.parametrize("align", ["left", "center"])
+@pytest.mark.parametrize("layout", sorted(LAYOUTS))
+def test_png_stream_matches_one_shot_save(layout, align, tmp_path):
+    pages = make_pages(LAYOUTS[layout])
+    width = 320
+    path = str(tmp_path / "merged.png")
+    assert merge_vertical(pages, path, "png", width=width, align=align) == [path]
+
+    expected = io.BytesIO()
+    canvas_of(pages, width, align).save(expected, "PNG")
+    streamed = open(path, "rb").read()
+
+    assert np.array_equal(pixels(streamed), pixels(expected.getvalue()))
+    assert idat(streamed) == idat(expected.getvalue())
+
+@pytest.mark.parametrize("layout", sorted(LAYOUTS))
+def test_baseline_jpeg_stream_matches_one_shot_save(layout, tmp_path):
+    pages = make_pages(LAYOUTS[layout], seed=1)
+    width = 320
+    path = str(tmp_path / "merged.jpg")
+    merge_vertical(pages, path, "jpeg", width=width, quality=85)
+
+    expected = io.BytesIO()
+    canvas_of(pages, width).save(expected, "JPEG", quality=85)
+    streamed = open(path, "rb").read()
+
+    with Image.open(io.BytesIO(streamed)) as img:
+        assert img.size == (width, sum(p.shape[0] for p in pages))
+    assert np.array_equal(pixels(streamed), pixels(expected.getvalue()))
+
+def test_progressive_jpeg_below_cap_is_one_shot_save(tmp_path):
+    pages = make_pages(LAYOUTS["mixed_width"], seed=2)
+    path = str(tmp_path / "merged.jpg")
+    merge_vertical(pages, path, "jpeg", width=320, quality=85, optimize=True, progressive=True)
+
+    expected = io.BytesIO()
+    canvas_of(pages, 320).save(expected, "JPEG", quality=85, optimize=True, progressive=True)
+    assert open(path, "rb").read() == expected.getvalue()
+
+def test_progressive_jpeg_above_cap_streams_baseline(tmp_path, monkeypatch):
+    pages = make_pages(LAYOUTS["same_width"], seed=3)
+    monkeypatch.setattr(strip_merge, "JPEG_CANVAS_MAX_PIXELS", 320 * 100)
+    path = str(tmp_path / "merged.jpg")
+    merge_vertical(pages, path, "jpeg", width=320, quality=85, optimize=True, progressive=True)
+
+    streamed = open(path, "rb").read()
+    with Image.open(io.BytesIO(streamed)) as img:
+        assert not img.info.get("progressive")
+
+    expected = io.BytesIO()
+    canvas_of(pages, 320).save(expected, "JPEG", quality=85)
+    assert np.array_equal(pixels(streamed), pixels(expected.getvalue()))
+
+def test_webp_part_matches_one_shot_save(tmp_path):
+    pages = make_pages(LAYOUTS["mixed_width"], seed=4)
+    path = str(tmp_path / "merged.webp")
+    merge_vertical(pages, path, "webp", width=320, quality=85, method=4)
+
+    expected = io.BytesIO()
+    canvas_of(pages, 320).save(expected, "WebP", quality=85, method=4)
+    assert open(path, "rb").read() == expected.getvalue()
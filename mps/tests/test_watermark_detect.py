@@ -0,0 +1,130 @@
+"""
+워터마크 감지 (watermark_detect.detect_watermark)와 감지 결과에 따른 원본 통과
+
+- 글자 마크 (진한/연한/저대비, 여러 크기와 해상도) → found=True, box가 글자를 덮음
+- 깨끗한 슬라이드 → found=False
+- 복잡한 배경 / 너무 작은 이미지 → 판단 불가, found=True (기존처럼 제거)
+- image_pipeline: 깨끗한 입력은 원본 bytes 그대로, 마크가 있으면 재인코딩
+"""
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+import tasks
+from optimize_blog import passthrough_format
+from remove_watermark import find_watermark, get_watermark_region
+from watermark_detect import MIN_SCORE, detect_watermark
+
+MARK_TEXT = "NotebookLM"
+
+def blank(width=1376, height=768, background=(255, 255, 255)):
+    return Image.new("RGB", (width, height), background)
+
+def draw_mark(img, gray, size):
+    """우측 하단 (get_watermark_region 안쪽)에 NotebookLM 글자 마크, 반환값: 글자 범위 (x1, y1, x2, y2)"""
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=size)
+    left, top, right, bottom = draw.textbbox((0, 0), MARK_TEXT, font=font)
+    x = img.width - 13 - (right - left)
+    y = img.height - 14 - (bottom - top)
+    draw.text((x - left, y - top), MARK_TEXT, fill=(gray, gray, gray), font=font)
+    return x, y, x + right - left, y + bottom - top
+
+def slide_with_content():
+    """제목, 막대 그래프, 좌측 하단 출처 글자 (우측 하단은 비어 있음)"""
+    img = blank()
+    draw = ImageDraw.Draw(img)
+    draw.text((80, 60), "Quarterly results", fill=(20, 20, 20), font=ImageFont.load_default(size=48))
+    for i in range(5):
+        draw.rectangle((200 + i * 150, 600 - i * 60, 300 + i * 150, 640), fill=(60, 110, 200))
+    draw.text((80, 680), "Source: internal data", fill=(120, 120, 120), font=ImageFont.load_default(size=16))
+    return img
+
+def slide_with_footer_line():
+    img = blank()
+    ImageDraw.Draw(img).line((40, 740, 1336, 740), fill=(150, 150, 150), width=1)
+    return img
+
+def gradient_slide():
+    ramp = np.linspace(235, 255, 1376).astype(np.uint8)
+    return Image.fromarray(np.repeat(np.tile(ramp[None, :, None], (768, 1, 1)), 3, axis=2))
+
+@pytest.mark.parametrize("gray", [120, 170, 200, 215])
+@pytest.mark.parametrize("size", [11, 13, 16, 20])
+@pytest.mark.parametrize("width,height", [(1376, 768), (2752, 1536), (1024, 576), (800, 450)])
+def test_text_mark_found(width, height, size, gray):
+    img = blank(width, height)
+    mark = draw_mark(img, gray, size)
+
+    result = find_watermark(img)
+    assert result["found"]
+    assert result["score"] >= MIN_SCORE
+
+    # 상자는 고정 템플릿 크기가 아니라 글자 범위 (안티에일리어싱 가장자리 ±3px)
+    box = result["box"]
+    assert all(abs(a - b) <= 3 for a, b in zip(box, mark)), (box, mark)
+
+@pytest.mark.parametrize("background,gray", [
+    ((246, 244, 238), 205),   # 미색 배경 + 연한 마크
+    ((30, 34, 44), 110),      # 어두운 슬라이드 + 밝은 마크
+    ((255, 255, 255), 224),   # 배경과 차이가 거의 FOREGROUND_DELTA인 마크
+])
+def test_low_contrast_mark_found(background, gray):
+    img = blank(background=background)
+    draw_mark(img, gray, 13)
+    assert find_watermark(img)["found"]
+
+@pytest.mark.parametrize("make", [blank, slide_with_content, slide_with_footer_line, gradient_slide])
+def test_clean_slide_not_found(make):
+    result = find_watermark(make())
+    assert not result["found"]
+    assert result["box"] is None
+    assert result["score"] < MIN_SCORE
+
+def test_busy_region_falls_back_to_found():
+    arr = np.full((768, 1376, 3), 255, dtype=np.uint8)
+    arr[500:, 1000:] = np.random.default_rng(0).integers(0, 256, (268, 376, 3))
+    result = find_watermark(Image.fromarray(arr))
+    assert result == {"found": True, "box": None, "score": None}
+
+@pytest.mark.parametrize("width,height", [(100, 60), (60, 30)])
+def test_too_small_image_falls_back_to_found(width, height):
+    result = detect_watermark(blank(width, height), (0, 0, width, height))
+    assert result == {"found": True, "box": None, "score": None}
+
+def jpeg_bytes(img):
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+def marked_slide():
+    img = blank(1200, 675)
+    draw_mark(img, 170, 13)
+    return img
+
+def test_passthrough_format_accepts_clean_jpeg():
+    data = jpeg_bytes(blank(1200, 675))
+    assert passthrough_format(Image.open(io.BytesIO(data)), data, ("jpeg",)) == "jpeg"
+
+def test_clean_input_passes_through(tmp_path):
+    data = jpeg_bytes(slide_with_content().resize((1200, 670)))
+    names = tasks.image_pipeline(data, "clean", str(tmp_path), output_format="jpeg")
+    assert names == ["clean_optimized.jpg"]
+    assert (tmp_path / names[0]).read_bytes() == data
+
+def test_marked_input_is_cleaned(tmp_path):
+    img = marked_slide()
+    data = jpeg_bytes(img)
+    # 포맷/크기만 보면 통과 대상이지만 워터마크가 있으므로 제거 후 재인코딩
+    assert passthrough_format(Image.open(io.BytesIO(data)), data, ("jpeg",)) == "jpeg"
+
+    names = tasks.image_pipeline(data, "marked", str(tmp_path), output_format="jpeg")
+    output = (tmp_path / names[0]).read_bytes()
+    assert output != data
+
+    wm = get_watermark_region(img.width, img.height)
+    cleaned = np.asarray(Image.open(io.BytesIO(output)).convert("L"))
+    region = cleaned[wm["y1"]:wm["y2"], wm["x1"]:wm["x2"]]
+    assert region.min() > 200  # 글자(회색 170)가 배경색으로 채워짐
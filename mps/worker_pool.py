@@ -0,0 +1,103 @@
+"""
+사전 예열(pre-warmed) 워커 프로세스 풀
+
+요청마다 `python script.py`로 인터프리터를 새로 띄우면 매번 PIL/NumPy import
+비용을 치르게 된다. 서버 시작 시 워커 프로세스를 미리 만들어 스크립트 모듈을
+import 해 두고, 이후 요청은 함수 호출만 워커에 넘긴다.
+"""
+import os
+import sys
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(BASE_DIR, "scripts")
+
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+import telemetry  # noqa: E402  (scripts 경로 등록 후 import)
+
+# 워커 수 (환경변수로 조정, 기본: CPU 코어 수)
+DEFAULT_WORKERS = int(os.environ.get("MPS_WORKERS", os.cpu_count() or 1))
+
+def _warm_up():
+    """워커 시작 시 무거운 모듈을 미리 import"""
+    import numpy  # noqa: F401
+    from PIL import Image  # noqa: F401
+    import tasks  # noqa: F401  (remove_watermark, optimize_blog, pdf_smart)
+    import telemetry
+    telemetry.configure_logging()
+    from logo_registry import get_registry
+    get_registry()  # logos/ 미리 디코딩
+
+def _ping():
+    return os.getpid()
+
+def iter_queue(future, items, poll_seconds=0.2):
+    """
+    워커가 make_queue() 큐에 넣은 항목을 작업이 끝날 때까지 도착하는 대로 반환
+
+    작업이 끝나면 남은 항목까지 모두 꺼낸 뒤 종료 (결과/예외는 호출하는 쪽에서 future.result())
+    """
+    while not future.done():
+        try:
+            yield items.get(timeout=poll_seconds)
+        except queue.Empty:
+            pass
+    while True:
+        try:
+            yield items.get_nowait()
+        except queue.Empty:
+            break
+
+class WorkerPool:
+    """
+    서버가 소유하는 워커 프로세스 풀
+
+    - start(): 프로세스 생성 + 모듈 예열 (서버 startup 시 호출)
+    - run(): 함수를 워커에서 실행하고 결과 반환 (블로킹)
+    - shutdown(): 서버 종료 시 정리
+    """
+
+    def __init__(self, max_workers=None):
+        self.max_workers = max(1, max_workers or DEFAULT_WORKERS)
+        self._executor = None
+        self._manager = None
+
+    def start(self):
+        if self._executor is not None:
+            return
+        # fork는 uvicorn 스레드와 섞이면 위험하므로 spawn 사용
+        ctx = multiprocessing.get_context("spawn")
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=ctx,
+            initializer=_warm_up,
+        )
+        # spawn 방식은 프로세스를 필요할 때 만들기 때문에 미리 작업을 던져 예열
+        wait([self._executor.submit(_ping) for _ in range(self.max_workers)])
+        telemetry.log("worker_pool_ready", workers=self.max_workers)
+
+    def submit(self, fn, *args, **kwargs):
+        if self._executor is None:
+            self.start()
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def run(self, fn, *args, **kwargs):
+        return self.submit(fn, *args, **kwargs).result()
+
+    def make_queue(self):
+        """워커 → 서버 진행 이벤트 전달용 큐 (프로세스 간 공유 가능)"""
+        if self._manager is None:
+            self._manager = multiprocessing.get_context("spawn").Manager()
+        return self._manager.Queue()
+
+    def shutdown(self):
+        if self._manager is not None:
+            self._manager.shutdown()
+            self._manager = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
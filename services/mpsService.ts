@@ -7,13 +7,19 @@
 
 const BACKEND_URL = 'https://mps-backend-595259465274.us-west2.run.app';
 const BACKEND_TIMEOUT = 30000; // 30초 타임아웃
+const JOB_POLL_INTERVAL = 2000; // SSE 연결 실패 시 상태 폴링 간격
 
 export type ProcessingMode = 'auto' | 'backend' | 'client';
 
+// 백엔드 인코딩 프로필 (auto: 이미지 크기와 지연 예산으로 서버가 선택)
+export type EncodeProfile = 'fast' | 'balanced' | 'smallest' | 'auto';
+
 export interface MpsImageOptions {
     removeWatermark: boolean;
     optimizeForBlog: boolean;
     outputFormat: 'webp' | 'jpg' | 'both';
+    encodeProfile?: EncodeProfile; // 지정하지 않으면 서버 기본값
+    latencyBudgetMs?: number; // auto 모드 인코딩 지연 예산
 }
 
 export interface MpsPdfOptions extends MpsImageOptions {
@@ -33,6 +39,25 @@ export interface MpsResult {
 
 export type FileType = 'image' | 'pdf' | 'unknown';
 
+/**
+ * 비동기 작업 진행 이벤트 (GET /jobs/{id}/events)
+ * - start: total (처리할 페이지 수)
+ * - batch: batch, first_page, last_page
+ * - page: page, done, total
+ * - merge / complete / status
+ */
+export interface MpsJobProgress {
+    type: 'start' | 'batch' | 'page' | 'merge' | 'complete' | 'status' | string;
+    page?: number;
+    done?: number;
+    total?: number;
+    batch?: number;
+    first_page?: number;
+    last_page?: number;
+    status?: string;
+    error?: string;
+}
+
 // ─────────────────────────────────────────────────────────────────
 // 유틸리티 함수
 // ─────────────────────────────────────────────────────────────────
@@ -53,6 +78,18 @@ export function detectFileType(file: File): FileType {
     return 'unknown';
 }
 
+/**
+ * 인코딩 프로필 옵션을 폼에 추가 (지정한 경우만)
+ */
+function appendEncodeOptions(formData: FormData, options: MpsImageOptions): void {
+    if (options.encodeProfile) {
+        formData.append('encode_profile', options.encodeProfile);
+    }
+    if (options.latencyBudgetMs) {
+        formData.append('latency_budget_ms', String(Math.round(options.latencyBudgetMs)));
+    }
+}
+
 /**
  * 타임아웃 적용 fetch
  */
@@ -87,6 +124,7 @@ export async function processImageWithBackend(
     formData.append('remove_watermark', String(options.removeWatermark));
     formData.append('optimize_blog', String(options.optimizeForBlog));
     formData.append('output_format', options.outputFormat);
+    appendEncodeOptions(formData, options);
 
     try {
         const response = await fetchWithTimeout(`${BACKEND_URL}/process-image`, {
@@ -131,24 +169,83 @@ export async function processImageWithBackend(
 }
 
 /**
- * PDF 처리 (백엔드 서버 호출)
+ * 비동기 작업 완료 대기
+ * SSE(/jobs/{id}/events)로 진행 이벤트를 받고, 연결이 끊기면 상태 폴링으로 전환
+ */
+function waitForJob(jobId: string, onProgress?: (event: MpsJobProgress) => void): Promise<any> {
+    return new Promise((resolve, reject) => {
+        const finish = (job: any) => {
+            if (job.status === 'done') {
+                resolve(job.result);
+            } else {
+                reject(new Error(job.error || 'Server processing failed'));
+            }
+        };
+
+        const poll = async () => {
+            try {
+                const response = await fetchWithTimeout(`${BACKEND_URL}/jobs/${jobId}`, { method: 'GET' }, BACKEND_TIMEOUT);
+                if (!response.ok) {
+                    // 404: 작업이 만료돼 서버에서 지워짐 → 더 기다려도 끝나지 않음
+                    reject(new Error(response.status === 404
+                        ? '작업을 찾을 수 없습니다. (만료됨)'
+                        : `작업 상태 조회 실패 (HTTP ${response.status})`));
+                    return;
+                }
+                const job = await response.json();
+                if (job.status === 'done' || job.status === 'failed') {
+                    finish(job);
+                } else {
+                    setTimeout(poll, JOB_POLL_INTERVAL);
+                }
+            } catch (error) {
+                reject(error);
+            }
+        };
+
+        const source = new EventSource(`${BACKEND_URL}/jobs/${jobId}/events`);
+        source.addEventListener('progress', (e) => {
+            onProgress?.(JSON.parse((e as MessageEvent).data));
+        });
+        source.addEventListener('done', (e) => {
+            source.close();
+            finish(JSON.parse((e as MessageEvent).data));
+        });
+        source.addEventListener('failed', (e) => {
+            source.close();
+            finish(JSON.parse((e as MessageEvent).data));
+        });
+        source.onerror = () => {
+            source.close();
+            console.warn('[MPS Backend] SSE 연결 끊김, 상태 폴링으로 전환');
+            poll();
+        };
+    });
+}
+
+/**
+ * PDF 처리 (백엔드 비동기 작업)
+ * POST /jobs로 즉시 job id를 받고, 완료될 때까지 진행률을 전달받는다.
+ * (대용량 PDF도 HTTP 요청 하나가 처리 시간 동안 묶이지 않음)
  */
 export async function processPdfWithBackend(
     file: File,
-    options: MpsPdfOptions
+    options: MpsPdfOptions,
+    onProgress?: (event: MpsJobProgress) => void
 ): Promise<MpsResult> {
     const formData = new FormData();
     formData.append('file', file);
     formData.append('merge_pages', String(options.mergePages));
     formData.append('target_width', '1200');
     formData.append('output_format', options.outputFormat);
+    appendEncodeOptions(formData, options);
 
     if (options.selectedPages && options.selectedPages.length > 0) {
         formData.append('selected_pages', JSON.stringify(options.selectedPages));
     }
 
     try {
-        const response = await fetchWithTimeout(`${BACKEND_URL}/process-pdf`, {
+        const response = await fetchWithTimeout(`${BACKEND_URL}/jobs`, {
             method: 'POST',
             body: formData,
         }, BACKEND_TIMEOUT);
@@ -158,11 +255,18 @@ export async function processPdfWithBackend(
             throw new Error(errorData.error || 'Server processing failed');
         }
 
-        const data = await response.json();
+        const job = await response.json();
+        if (!job.success || !job.jobId) {
+            throw new Error(job.error || 'Server processing failed');
+        }
+        const jobId: string = job.jobId;
+        console.log('[MPS Backend] PDF 작업 등록:', jobId);
+
+        const data = await waitForJob(jobId, onProgress);
         console.log('[MPS Backend] PDF 응답 데이터:', data);
 
         // outputFiles 유효성 검사
-        if (!data.outputFiles || !Array.isArray(data.outputFiles) || data.outputFiles.length === 0) {
+        if (!data || !data.outputFiles || !Array.isArray(data.outputFiles) || data.outputFiles.length === 0) {
             console.error('[MPS Backend] PDF 출력 파일 없음:', data);
             return {
                 success: false,